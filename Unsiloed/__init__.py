@@ -1,44 +1,59 @@
 # App package
 import os
-import tempfile
-import requests
-from Unsiloed.services.chunking import process_document_chunking, determine_file_type_from_url
+import time
+import asyncio
+import queue
+import threading
+import contextvars
+from Unsiloed.services.chunking import (
+    process_document_chunking,
+    process_document_chunking_async,
+)
+from Unsiloed.services.result_cache import prepare_result_cache, lookup_result, store_result
 from Unsiloed.utils.chunking import ChunkingStrategy
-from Unsiloed.utils.web_utils import validate_url, get_content_type_from_url
+from Unsiloed.utils.extractionutils import track_extraction_failures
+from Unsiloed.utils.web_utils import validate_url, download_document, aclose_async_http_sessions
+from Unsiloed.utils.metrics import LLMUsageTracker, timed_stage, track_stage_timings
+from Unsiloed.utils.request_context import RequestContext, get_request_api_key
+from Unsiloed.utils.openai import get_openai_client, aclose_async_openai_clients
+from Unsiloed.utils.yolo_model_utils import get_model
+from Unsiloed.parse_config import MAX_CONCURRENT_DOCUMENTS
 
 async def process(options):
     """
     Process a document file or URL with the specified chunking strategy.
     
+    Downloads, LLM calls and the semantic pipeline are awaited on the running
+    event loop, and blocking work (text extraction, the result cache) runs on worker
+    threads, so other coroutines keep running meanwhile.
+    
     Args:
         options: Dictionary containing:
             - filePath: Path to file or URL
             - credentials: Dictionary with API credentials (optional)
-                - apiKey: OpenAI API key
+                - apiKey: OpenAI API key, used for this call only (os.environ is
+                  not modified). Defaults to the OPENAI_API_KEY environment variable
             - strategy: Chunking strategy ("semantic", "fixed", "paragraph", "heading", "page")
             - chunkSize: Size of chunks for fixed strategy (default: 1000)
             - overlap: Overlap size for fixed strategy (default: 100)
+            - cache: Reuse results for identical file bytes and options (optional).
+                True for defaults, or a dictionary with enabled, dir, ttlSeconds, maxBytes
     
     Returns:
-        Dictionary with chunking results
+        Dictionary with chunking results. With the cache enabled it carries
+        "cache_hit"; a cached result reports no LLM usage and the timings of
+        this call (download and cache lookup) rather than those of the run
+        that stored it. Results of degraded runs are not cached.
     """
     file_path = options.get("filePath")
     if not file_path:
         raise ValueError("filePath is required")
     
-    # Handle credentials
-    credentials = options.get("credentials", {})
-    api_key = credentials.get("apiKey")
-    
-    # Set OpenAI API key in environment if provided
-    original_api_key = os.environ.get("OPENAI_API_KEY")
-    if api_key:
-        os.environ["OPENAI_API_KEY"] = api_key
-    elif not original_api_key:
-        # Check if semantic strategy is being used without API key
-        strategy = options.get("strategy", "semantic")
-        if strategy == "semantic":
-            raise ValueError("OpenAI API key is required for semantic chunking. Please provide it in credentials.apiKey or set OPENAI_API_KEY environment variable.")
+    # Credentials travel with the request instead of through os.environ, so
+    # concurrent calls with different keys don't see each other's key
+    context = RequestContext.from_options(options)
+    if options.get("strategy", "semantic") == "semantic" and not get_request_api_key(context.api_key):
+        raise ValueError("OpenAI API key is required for semantic chunking. Please provide it in credentials.apiKey or set OPENAI_API_KEY environment variable.")
     
     # Get chunking options
     strategy = options.get("strategy", "semantic")
@@ -49,90 +64,100 @@ async def process(options):
     temp_file = None
     local_file_path = file_path
     
-    try:
-        if file_path.startswith(("http://", "https://")):
-            # Handle URLs
-            validated_url = validate_url(file_path)
-            
-            # Check if it's a direct file download or a web page
-            content_type = get_content_type_from_url(validated_url)
+    # The download is timed together with processing
+    start_time = time.perf_counter()
+    with track_stage_timings() as timings:
+        try:
+            if file_path.startswith(("http://", "https://")):
+                # Handle URLs
+                validated_url = validate_url(file_path)
             
-            if validated_url.lower().endswith((".pdf", ".docx", ".pptx", ".html", ".htm", ".md", ".markdown")):
-                # Direct file download
-                response = requests.get(validated_url)
-                response.raise_for_status()
-                
-                # Determine file type from URL
-                if validated_url.lower().endswith(".pdf"):
+                # One GET decides between a document download and a web page:
+                # both are typed by their first bytes and Content-Type and
+                # streamed to a temporary file that is processed from then on
+                with timed_stage("download", cpu=False):
+                    file_type, temp_file = await download_document(validated_url)
+                local_file_path = temp_file
+            else:
+                # Local file
+                if file_path.lower().endswith(".pdf"):
                     file_type = "pdf"
-                    suffix = ".pdf"
-                elif validated_url.lower().endswith(".docx"):
+                elif file_path.lower().endswith(".docx"):
                     file_type = "docx"
-                    suffix = ".docx"
-                elif validated_url.lower().endswith(".pptx"):
+                elif file_path.lower().endswith(".pptx"):
                     file_type = "pptx"
-                    suffix = ".pptx"
-                elif validated_url.lower().endswith((".html", ".htm")):
+                elif file_path.lower().endswith((".html", ".htm")):
                     file_type = "html"
-                    suffix = ".html"
-                elif validated_url.lower().endswith((".md", ".markdown")):
+                elif file_path.lower().endswith((".md", ".markdown")):
                     file_type = "markdown"
-                    suffix = ".md"
                 else:
                     raise ValueError("Unsupported file type. Supported formats: PDF, DOCX, PPTX, HTML, Markdown.")
-                    
-                # Save to temporary file
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-                temp_file.write(response.content)
-                temp_file.close()
-                local_file_path = temp_file.name
-            else:
-                # Web page - process directly as URL
-                file_type = determine_file_type_from_url(validated_url)
-                local_file_path = validated_url
-        else:
-            # Local file
-            if file_path.lower().endswith(".pdf"):
-                file_type = "pdf"
-            elif file_path.lower().endswith(".docx"):
-                file_type = "docx"
-            elif file_path.lower().endswith(".pptx"):
-                file_type = "pptx"
-            elif file_path.lower().endswith((".html", ".htm")):
-                file_type = "html"
-            elif file_path.lower().endswith((".md", ".markdown")):
-                file_type = "markdown"
-            else:
-                raise ValueError("Unsupported file type. Supported formats: PDF, DOCX, PPTX, HTML, Markdown.")
         
-        # Process the document
-        result = process_document_chunking(
-            local_file_path, 
-            file_type,
-            strategy,
-            chunk_size,
-            overlap
-        )
+            # Duplicate documents are answered from the result cache when enabled
+            result_cache, cache_key = await asyncio.to_thread(
+                prepare_result_cache,
+                options.get("cache"), local_file_path, file_type, strategy, chunk_size, overlap
+            )
+            if result_cache is not None:
+                with timed_stage("result_cache", cpu=False):
+                    cached_result = await asyncio.to_thread(lookup_result, result_cache, cache_key)
+                if cached_result is not None:
+                    cached_result["llm_usage"] = LLMUsageTracker().summary()
+                    cached_result["timings"] = dict(
+                        timings.summary(), total_wall_seconds=round(time.perf_counter() - start_time, 4)
+                    )
+                    cached_result["cache_hit"] = True
+                    return cached_result
         
-        return result
+            # Process the document
+            with track_extraction_failures() as failures:
+                result = await process_document_chunking_async(
+                    local_file_path, 
+                    file_type,
+                    strategy,
+                    chunk_size,
+                    overlap,
+                    context=context,
+                )
         
-    finally:
-        # Clean up temporary file if created
-        if temp_file and os.path.exists(local_file_path):
-            os.unlink(local_file_path)
+            if result_cache is not None:
+                # A degraded run (failed picture descriptions, tables read by
+                # OCR, heuristic fallbacks) is not cached so the next call retries
+                if not failures:
+                    await asyncio.to_thread(store_result, result_cache, cache_key, result)
+                result["cache_hit"] = False
         
-        # Restore original API key if we modified it
-        if api_key:
-            if original_api_key:
-                os.environ["OPENAI_API_KEY"] = original_api_key
-            else:
-                # Remove the key we set if there wasn't one originally
-                os.environ.pop("OPENAI_API_KEY", None)
+            return result
+        
+        finally:
+            # Clean up temporary file if created
+            if temp_file:
+                await asyncio.to_thread(_remove_file, temp_file)
+
+
+def _remove_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _process_on_own_loop(options):
+    """Run process() on a private event loop and close that loop's clients afterwards."""
+    try:
+        return await process(options)
+    finally:
+        await aclose_async_openai_clients()
+        await aclose_async_http_sessions()
+
 
 # Also provide a synchronous version for simpler usage
 def process_sync(options):
     """
     Synchronous version of the process function
+
+    Runs process() on a new event loop, so it must not be called from a
+    coroutine; await process() there instead.
     
     Args:
         options: Dictionary containing:
@@ -142,12 +167,172 @@ def process_sync(options):
             - strategy: Chunking strategy ("semantic", "fixed", "paragraph", "heading", "page")
             - chunkSize: Size of chunks for fixed strategy (default: 1000)
             - overlap: Overlap size for fixed strategy (default: 100)
+            - cache: Reuse results for identical file bytes and options (optional)
     
     Returns:
         Dictionary with chunking results
     """
-    import asyncio
+    return asyncio.run(_process_on_own_loop(options))
+
+
+def _check_max_concurrent_documents(max_concurrent_documents):
+    if max_concurrent_documents is None:
+        max_concurrent_documents = MAX_CONCURRENT_DOCUMENTS
+    if not isinstance(max_concurrent_documents, int) or max_concurrent_documents <= 0:
+        raise ValueError(
+            f"max_concurrent_documents must be a positive integer, got {max_concurrent_documents}"
+        )
+    return max_concurrent_documents
+
+
+def _preload(options_list):
+    """Load the OpenAI clients and YOLO model once instead of racing to load them per document."""
+    semantic = [options for options in options_list if options.get("strategy", "semantic") == "semantic"]
+    # Documents may use different keys; each key's client is shared by its documents
+    api_keys = {get_request_api_key(RequestContext.from_options(options).api_key) for options in semantic} - {None}
+    if not api_keys:
+        return
+    for api_key in api_keys:
+        get_openai_client(api_key)
+    # Only PDFs (and URLs that may turn out to be PDFs) go through YOLO
+    text_suffixes = (".docx", ".pptx", ".html", ".htm", ".md", ".markdown")
+    if any(not str(options.get("filePath", "")).lower().endswith(text_suffixes) for options in semantic):
+        try:
+            get_model()
+        except RuntimeError:
+            pass  # Reported by each document that needs the model
+
+
+def _document_entry(index, options, result=None, error=None):
+    """Build the process_many entry of a finished document."""
+    return {
+        "index": index,
+        "filePath": options.get("filePath"),
+        "result": result,
+        "error": str(error) if error is not None else None,
+        "errorType": type(error).__name__ if error is not None else None,
+    }
+
+
+async def process_many(options_list, max_concurrent_documents=None):
+    """
+    Process many documents concurrently, yielding each result as soon as it is ready.
+    
+    Every document runs process() as a task on the calling event loop, at most
+    max_concurrent_documents at once. They share this loop's OpenAI clients and
+    HTTP session as well as the YOLO model, CPU stage pools and OpenAI rate
+    limiter, so pages of different documents are scheduled into the same pools.
+    A failing document does not affect the others.
+    
+    Args:
+        options_list: Options dictionaries as accepted by process(). Documents may
+            use different credentials.apiKey values; each one's LLM calls use its own key.
+        max_concurrent_documents: Documents in flight at once.
+            Defaults to parse_config.MAX_CONCURRENT_DOCUMENTS (UNSILOED_MAX_CONCURRENT_DOCUMENTS)
+    
+    Yields:
+        Dictionaries in completion order with:
+            - index: Position of the document in options_list
+            - filePath: The document's filePath
+            - result: Chunking result as returned by process(), or None on failure
+            - error: Error message, or None on success
+            - errorType: Exception class name, or None on success
+    """
+    options_list = list(options_list)
+    semaphore = asyncio.Semaphore(_check_max_concurrent_documents(max_concurrent_documents))
+    await asyncio.to_thread(_preload, options_list)
+
+    async def process_document(index, options):
+        async with semaphore:
+            try:
+                result = await process(options)
+            except Exception as e:
+                return _document_entry(index, options, error=e)
+        return _document_entry(index, options, result)
+
+    # A fresh context per document keeps its usage and timings separate
+    tasks = [
+        contextvars.Context().run(asyncio.ensure_future, process_document(index, options))
+        for index, options in enumerate(options_list)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # Documents not yet finished are cancelled when the caller stops early
+        for task in tasks:
+            task.cancel()
+
+
+# Marks the end of the entries a process_many_sync loop puts on its queue
+_END_OF_ENTRIES = object()
+
+
+async def _queue_entries(options_list, max_concurrent_documents, entries):
+    """Put the process_many entries on a queue, then close this loop's clients."""
+    try:
+        async for entry in process_many(options_list, max_concurrent_documents):
+            entries.put(entry)
+    except Exception as e:
+        entries.put(e)
+    finally:
+        try:
+            await aclose_async_openai_clients()
+            await aclose_async_http_sessions()
+        finally:
+            entries.put(_END_OF_ENTRIES)
+
+
+def _run_loop(loop, task):
+    """Run a process_many_sync loop until its task ends, then close it."""
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def process_many_sync(options_list, max_concurrent_documents=None):
+    """
+    Synchronous version of process_many
+
+    All documents run as tasks of process_many on one event loop in a
+    background thread, so they share that loop's OpenAI clients and HTTP
+    session; entries are passed back through a queue as they finish.
+    
+    Args:
+        options_list: Options dictionaries as accepted by process_sync()
+        max_concurrent_documents: Documents in flight at once
+    
+    Yields:
+        Dictionaries with index, filePath, result and error, in completion order
+    """
+    entries = queue.Queue()
     loop = asyncio.new_event_loop()
-    result = loop.run_until_complete(process(options))
-    loop.close()
-    return result
+    task = loop.create_task(_queue_entries(options_list, max_concurrent_documents, entries))
+    thread = threading.Thread(target=_run_loop, args=(loop, task), name="unsiloed-documents", daemon=True)
+    thread.start()
+    try:
+        while True:
+            entry = entries.get()
+            if entry is _END_OF_ENTRIES:
+                break
+            if isinstance(entry, Exception):
+                raise entry
+            yield entry
+    finally:
+        if task.done():
+            thread.join()
+        else:
+            # Documents not yet finished are cancelled when the caller stops early
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # The loop closed in the meantime
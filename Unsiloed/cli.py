@@ -0,0 +1,334 @@
+"""
+Command Line Interface
+
+Bulk ingestion of files, directories and glob patterns:
+
+    Unsiloed report.pdf docs/ "archive/**/*.docx" -o chunks.jsonl --workers 4
+
+Documents are processed with process_sync() on a pool of worker processes
+(see services/worker_pool.py), each of which loads the YOLO model once. Every
+document is appended to the output file as one JSON line as soon as it is done:
+
+    {"filePath": "...", "result": {...}, "error": null, "errorType": null}
+
+Documents already present in the output file are skipped, so an interrupted
+run is resumed by running the same command again; documents whose line
+recorded an error are processed again with --retry-failed. Progress,
+throughput and ETA are reported on stderr.
+"""
+
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from Unsiloed.parse_config import MAX_CONCURRENT_DOCUMENTS
+from Unsiloed.services.worker_pool import WORKER_MODES, DocumentWorkerPool
+from Unsiloed.utils.request_context import get_request_api_key
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".pptx", ".html", ".htm", ".md", ".markdown")
+STRATEGIES = ("semantic", "fixed", "paragraph", "heading", "page")
+
+# Documents submitted per worker, so that a worker never waits for the next one
+QUEUED_DOCUMENTS_PER_WORKER = 2
+
+# Seconds between progress lines when stderr is not a terminal
+PROGRESS_LOG_INTERVAL = 10.0
+
+
+def _scan_directory(directory: str) -> List[str]:
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def expand_inputs(inputs: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Expand files, directories (recursively), glob patterns and URLs into documents.
+
+    Explicitly named files are kept whatever their extension; directories and
+    glob patterns contribute files with a supported extension.
+
+    Args:
+        inputs: Command line inputs
+
+    Returns:
+        (documents, unmatched): absolute paths and URLs without duplicates in input
+        order, and the inputs that matched no document
+    """
+    documents = []
+    unmatched = []
+    seen = set()
+
+    for item in inputs:
+        if item.startswith(("http://", "https://")):
+            matches = [item]
+        elif os.path.isdir(item):
+            matches = _scan_directory(item)
+        elif os.path.isfile(item):
+            matches = [item]
+        elif glob.has_magic(item):
+            matches = []
+            for match in sorted(glob.glob(item, recursive=True)):
+                if os.path.isdir(match):
+                    matches.extend(_scan_directory(match))
+                elif match.lower().endswith(SUPPORTED_EXTENSIONS):
+                    matches.append(match)
+        else:
+            matches = []
+
+        if not matches:
+            unmatched.append(item)
+        for match in matches:
+            document = match if match.startswith(("http://", "https://")) else os.path.abspath(match)
+            if document not in seen:
+                seen.add(document)
+                documents.append(document)
+
+    return documents, unmatched
+
+
+def load_completed(output_path: str, retry_failed: bool = False) -> Set[str]:
+    """
+    Read the documents already recorded in a JSONL output file.
+
+    Args:
+        output_path: Output file of an earlier run (may not exist)
+        retry_failed: Leave out documents whose only lines recorded an error
+
+    Returns:
+        filePath values of the documents to skip
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by an interrupted run
+            if not isinstance(entry, dict) or "filePath" not in entry:
+                continue
+            if retry_failed and entry.get("error") is not None:
+                continue
+            completed.add(entry["filePath"])
+    return completed
+
+
+def _open_output(output_path: str):
+    """Open the output for appending, starting on a fresh line after an interrupted write."""
+    needs_newline = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    output = open(output_path, "a", encoding="utf-8")
+    if needs_newline:
+        output.write("\n")
+    return output
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class _Progress:
+    """Progress line on stderr with throughput and ETA; redrawn in place on a terminal."""
+
+    def __init__(self, total: int, quiet: bool = False, stream=None):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.chunks = 0
+        self._quiet = quiet
+        self._stream = stream or sys.stderr
+        self._interactive = self._stream.isatty()
+        self._start = time.monotonic()
+        self._last_report = self._start
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else None
+        return (
+            f"[{self.done}/{self.total}] {rate:.2f} docs/s, {self.chunks} chunks, "
+            f"{self.failed} failed, elapsed {_format_duration(elapsed)}, ETA {_format_duration(eta)}"
+        )
+
+    def update(self, entry: Dict[str, Any]) -> None:
+        self.done += 1
+        if entry["error"] is not None:
+            self.failed += 1
+        else:
+            self.chunks += entry["result"].get("total_chunks", 0)
+
+        if self._quiet:
+            return
+        now = time.monotonic()
+        if self._interactive:
+            self._stream.write("\r" + self.line() + "\033[K")
+            self._stream.flush()
+        elif now - self._last_report >= PROGRESS_LOG_INTERVAL:
+            self._last_report = now
+            print(self.line(), file=self._stream)
+
+    def finish(self) -> None:
+        if self._quiet:
+            return
+        if self._interactive:
+            self._stream.write("\n")
+        else:
+            print(self.line(), file=self._stream)
+
+
+async def _process_documents(documents: List[str], options: Dict[str, Any], args: argparse.Namespace) -> _Progress:
+    """Process documents on the worker pool and append each result to the output file."""
+    pool = DocumentWorkerPool(
+        args.workers,
+        args.worker_mode,
+        args.max_documents_per_worker,
+        preload_model=options["strategy"] == "semantic",
+        log_level=None if args.verbose else logging.WARNING,
+    )
+
+    if not args.quiet:
+        print(f"Starting {args.workers} {args.worker_mode} workers...", file=sys.stderr)
+    await pool.start()
+    # Throughput and ETA are measured from the moment the workers are ready
+    progress = _Progress(len(documents), quiet=args.quiet)
+
+    completed = False
+    try:
+        with _open_output(args.output) as output:
+            queue = iter(documents)
+            pending = {}
+
+            def fill():
+                room = args.workers * QUEUED_DOCUMENTS_PER_WORKER - len(pending)
+                for path in itertools.islice(queue, max(room, 0)):
+                    pending[asyncio.ensure_future(pool.process(dict(options, filePath=path)))] = path
+
+            fill()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    entry = {"filePath": pending.pop(task), "result": None, "error": None, "errorType": None}
+                    try:
+                        entry["result"] = task.result()
+                    except Exception as e:
+                        entry["error"] = str(e)
+                        entry["errorType"] = type(e).__name__
+                    # One complete line per document, so an interrupted run can be resumed
+                    output.write(json.dumps(entry) + "\n")
+                    output.flush()
+                    progress.update(entry)
+                fill()
+        completed = True
+    finally:
+        # On interruption, don't wait for the documents still running
+        await asyncio.to_thread(pool.shutdown, completed)
+        progress.finish()
+
+    return progress
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Unsiloed",
+        description="Chunk documents in bulk into a resumable JSONL file.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="Files, directories (searched recursively), glob patterns or URLs",
+    )
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("-s", "--strategy", choices=STRATEGIES, default="semantic", help="Chunking strategy (default semantic)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size for the fixed strategy (default 1000)")
+    parser.add_argument("--overlap", type=int, default=100, help="Overlap for the fixed strategy (default 100)")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=MAX_CONCURRENT_DOCUMENTS,
+        help=f"Documents processed in parallel (default {MAX_CONCURRENT_DOCUMENTS})",
+    )
+    parser.add_argument("--worker-mode", choices=WORKER_MODES, default="process", help="Worker processes or threads (default process)")
+    parser.add_argument(
+        "--max-documents-per-worker", type=int, default=50,
+        help="Replace a worker process after this many documents to bound memory (default 50, 0 disables)",
+    )
+    parser.add_argument("--api-key", help="OpenAI API key (default: OPENAI_API_KEY)")
+    parser.add_argument("--retry-failed", action="store_true", help="Process documents whose earlier attempt failed again")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't report progress")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the library's INFO logs")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the Unsiloed console script.
+
+    Returns:
+        Exit code: 0 when every document succeeded, 1 when documents failed or
+        none were found, 130 when interrupted
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.workers <= 0:
+        parser.error("--workers must be a positive integer")
+    if args.max_documents_per_worker < 0:
+        parser.error("--max-documents-per-worker must be >= 0")
+    if args.strategy == "semantic" and not get_request_api_key(args.api_key):
+        parser.error("semantic chunking needs an OpenAI API key (--api-key or OPENAI_API_KEY)")
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    documents, unmatched = expand_inputs(args.inputs)
+    for item in unmatched:
+        print(f"Warning: no documents found for {item}", file=sys.stderr)
+    if not documents:
+        print("No documents to process", file=sys.stderr)
+        return 1
+
+    completed = load_completed(args.output, args.retry_failed)
+    todo = [document for document in documents if document not in completed]
+    if not args.quiet:
+        print(
+            f"{len(documents)} documents, {len(documents) - len(todo)} already in {args.output}, "
+            f"{len(todo)} to process",
+            file=sys.stderr,
+        )
+    if not todo:
+        return 0
+
+    options = {"strategy": args.strategy, "chunkSize": args.chunk_size, "overlap": args.overlap}
+    if args.api_key:
+        options["credentials"] = {"apiKey": args.api_key}
+
+    try:
+        progress = asyncio.run(_process_documents(todo, options, args))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume", file=sys.stderr)
+        return 130
+
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
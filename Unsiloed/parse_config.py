@@ -6,6 +6,103 @@ MODEL_PATH = os.path.join(MODEL_DIR, "yolov11_5_x_best.pt")
 
 _model = None
 
+# Number of pages sent through YOLO in a single forward pass
+DEFAULT_YOLO_BATCH_SIZE = 8
+
+# PDF rasterization: pages are rendered in windows of DEFAULT_RENDER_WINDOW_PAGES
+# on a background thread, with at most DEFAULT_MAX_QUEUED_PAGES rendered pages
+# waiting to be consumed
+DEFAULT_RENDER_DPI = 200
+
+# Resolution for the YOLO layout pass. Text, table and formula regions are then
+# re-rendered at DEFAULT_RENDER_DPI for OCR and the vision LLM. Set equal to
+# DEFAULT_RENDER_DPI to render every page once at full resolution.
+DEFAULT_LAYOUT_DPI = 100
+DEFAULT_RENDER_WINDOW_PAGES = 4
+DEFAULT_MAX_QUEUED_PAGES = 8
+
+# Worker threads for the CPU-bound stages of the semantic pipeline. YOLO keeps a
+# single worker so the model is only ever driven from one thread; other values
+# of UNSILOED_DETECTION_WORKERS are rejected by utils/executors.py.
+DEFAULT_DETECTION_WORKERS = int(os.environ.get("UNSILOED_DETECTION_WORKERS", "1"))
+DEFAULT_OCR_WORKERS = int(os.environ.get("UNSILOED_OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_RENDER_WORKERS = int(os.environ.get("UNSILOED_RENDER_WORKERS", str(DEFAULT_OCR_WORKERS)))
+
+# OCR engine used for text regions: "pytesseract" (tesseract CLI) or "tesserocr"
+# (in-process Tesseract API, requires the optional tesserocr package)
+OCR_BACKEND = os.environ.get("UNSILOED_OCR_BACKEND", "pytesseract")
+OCR_LANGUAGE = os.environ.get("UNSILOED_OCR_LANGUAGE", "eng")
+
+# OpenAI clients are shared process-wide, one per API key (async clients also
+# per event loop). A successful models.list() health check is trusted for
+# OPENAI_HEALTH_CHECK_TTL seconds before it is repeated.
+OPENAI_TIMEOUT = 60.0
+OPENAI_MAX_RETRIES = 2
+OPENAI_HEALTH_CHECK_TTL = float(os.environ.get("UNSILOED_OPENAI_HEALTH_CHECK_TTL", "300"))
+
+# Process-wide governor for OpenAI requests (utils/rate_limiter.py). Retries
+# (OPENAI_MAX_RETRIES) are made by complete_chat so every 429 reaches the
+# governor. Requests/tokens per minute are unlimited unless set; the number of
+# requests in flight starts at OPENAI_INITIAL_CONCURRENCY and adapts (AIMD) up to
+# OPENAI_MAX_CONCURRENCY.
+OPENAI_REQUESTS_PER_MINUTE = (
+    int(os.environ["UNSILOED_OPENAI_RPM"]) if os.environ.get("UNSILOED_OPENAI_RPM") else None
+)
+OPENAI_TOKENS_PER_MINUTE = (
+    int(os.environ["UNSILOED_OPENAI_TPM"]) if os.environ.get("UNSILOED_OPENAI_TPM") else None
+)
+OPENAI_MAX_CONCURRENCY = int(os.environ.get("UNSILOED_OPENAI_MAX_CONCURRENCY", "32"))
+OPENAI_INITIAL_CONCURRENCY = min(8, OPENAI_MAX_CONCURRENCY)
+OPENAI_LATENCY_TOLERANCE = 3.0
+
+# Persistent cache of LLM responses, keyed by a hash of the full request (model,
+# prompts and image bytes). Disabled unless UNSILOED_LLM_CACHE_PATH is set or
+# configure_llm_cache() is called.
+LLM_CACHE_PATH = os.environ.get("UNSILOED_LLM_CACHE_PATH")
+LLM_CACHE_MAX_BYTES = int(os.environ.get("UNSILOED_LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+LLM_CACHE_TTL = float(os.environ["UNSILOED_LLM_CACHE_TTL"]) if os.environ.get("UNSILOED_LLM_CACHE_TTL") else None
+
+# Document result cache for process()/process_sync(), enabled per call with the
+# "cache" option. Bump RESULT_CACHE_VERSION when the result format changes.
+RESULT_CACHE_DIR = os.environ.get(
+    "UNSILOED_RESULT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "unsiloed")
+)
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("UNSILOED_RESULT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+RESULT_CACHE_VERSION = 1
+
+# Per-page store for incremental re-processing of revised PDFs: bbox results of
+# unchanged pages (by content fingerprint) and boundary decisions are reused.
+# Disabled unless UNSILOED_PAGE_CACHE_PATH is set or configure_page_store() is called.
+PAGE_CACHE_PATH = os.environ.get("UNSILOED_PAGE_CACHE_PATH")
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("UNSILOED_PAGE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Pooled HTTP sessions for downloads and web scraping (utils/web_utils.py): one
+# requests session per process and one aiohttp session per event loop, keeping
+# up to HTTP_MAX_CONNECTIONS_PER_HOST connections per host alive between calls.
+# HTTP_TIMEOUT bounds a scraped page (a download, only the wait between reads).
+HTTP_TIMEOUT = float(os.environ.get("UNSILOED_HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("UNSILOED_HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("UNSILOED_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("UNSILOED_HTTP_MAX_CONNECTIONS_PER_HOST", "8"))
+HTTP_KEEPALIVE_TIMEOUT = 30.0
+
+# Largest document process() downloads for a URL input; larger ones are
+# rejected before or while streaming them to disk (0 disables the limit)
+MAX_DOWNLOAD_BYTES = int(os.environ.get("UNSILOED_MAX_DOWNLOAD_BYTES", str(512 * 1024 * 1024)))
+
+# Documents processed at once by process_many()/process_many_sync(). Their pages
+# share the CPU stage pools and the OpenAI rate limiter above.
+MAX_CONCURRENT_DOCUMENTS = int(os.environ.get("UNSILOED_MAX_CONCURRENT_DOCUMENTS", "4"))
+
+# HTTP server (Unsiloed.server). Documents run on a pool of SERVER_WORKERS
+# "process" or "thread" workers; worker processes are replaced after
+# SERVER_MAX_DOCUMENTS_PER_WORKER documents to bound memory growth (0 disables).
+SERVER_WORKERS = int(os.environ.get("UNSILOED_SERVER_WORKERS", "2"))
+SERVER_WORKER_MODE = os.environ.get("UNSILOED_SERVER_WORKER_MODE", "process")
+SERVER_MAX_DOCUMENTS_PER_WORKER = int(os.environ.get("UNSILOED_SERVER_MAX_DOCUMENTS_PER_WORKER", "50"))
+SERVER_PRELOAD_MODEL = os.environ.get("UNSILOED_SERVER_PRELOAD_MODEL", "1").lower() not in ("0", "false", "no")
+SERVER_UPLOAD_DIR = os.environ.get("UNSILOED_SERVER_UPLOAD_DIR")  # Defaults to the system temp directory
+
 
 YOLO_CLASSES = {
     "caption",
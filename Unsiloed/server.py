@@ -0,0 +1,211 @@
+"""
+HTTP Server
+
+FastAPI app serving process() over HTTP:
+
+    uvicorn Unsiloed.server:app
+    python -m Unsiloed.server --host 0.0.0.0 --port 8000
+
+Endpoints:
+- POST /process: one or more uploaded documents (multipart field "files") with
+  optional "strategy", "chunkSize", "overlap" and "apiKey" form fields. The
+  response is NDJSON with one line per document in completion order, shaped
+  like the entries of process_many: index, filename, result, error, errorType.
+- GET /health: worker pool status.
+
+Uploads are copied to disk in UPLOAD_CHUNK_BYTES chunks and never held in
+memory as a whole. Documents run on a bounded pool of SERVER_WORKERS workers,
+either processes (default) or threads. Every worker loads the YOLO model and
+the OpenAI client when it starts, before it takes a document, so requests
+don't pay for model loading. Worker processes are replaced after
+SERVER_MAX_DOCUMENTS_PER_WORKER documents, which returns memory held by
+PIL/torch allocations to the OS.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from Unsiloed.parse_config import (
+    SERVER_WORKERS,
+    SERVER_WORKER_MODE,
+    SERVER_MAX_DOCUMENTS_PER_WORKER,
+    SERVER_PRELOAD_MODEL,
+    SERVER_UPLOAD_DIR,
+)
+from Unsiloed.services.worker_pool import DocumentWorkerPool
+from Unsiloed.utils.request_context import get_request_api_key
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+STRATEGIES = ("semantic", "fixed", "paragraph", "heading", "page")
+
+
+async def _save_upload(upload: UploadFile, upload_dir: Optional[str]) -> str:
+    """Copy an upload to a temporary file, keeping its extension for type detection."""
+    suffix = os.path.splitext(upload.filename or "")[1].lower()
+    target = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, prefix="unsiloed-upload-", dir=upload_dir)
+    try:
+        await asyncio.to_thread(shutil.copyfileobj, upload.file, target, UPLOAD_CHUNK_BYTES)
+    except BaseException:
+        target.close()
+        _remove_file(target.name)
+        raise
+    finally:
+        target.close()
+        await upload.close()
+    return target.name
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _stream_results(
+    pool: DocumentWorkerPool,
+    filenames: List[str],
+    paths: List[str],
+    options: Dict[str, Any],
+):
+    """Process the saved uploads and yield one NDJSON line per document as it finishes."""
+    tasks = {
+        asyncio.ensure_future(pool.process(dict(options, filePath=path))): index
+        for index, path in enumerate(paths)
+    }
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks[task]
+                entry = {
+                    "index": index,
+                    "filename": filenames[index],
+                    "result": None,
+                    "error": None,
+                    "errorType": None,
+                }
+                try:
+                    entry["result"] = task.result()
+                except Exception as e:
+                    entry["error"] = str(e)
+                    entry["errorType"] = type(e).__name__
+                _remove_file(paths[index])
+                yield json.dumps(entry) + "\n"
+    finally:
+        # The client went away: drop documents that have not started yet
+        for task in tasks:
+            task.cancel()
+        for path in paths:
+            _remove_file(path)
+
+
+def create_app(
+    workers: int = None,
+    worker_mode: str = None,
+    max_documents_per_worker: int = None,
+    preload_model: bool = None,
+    upload_dir: str = None,
+) -> FastAPI:
+    """
+    Create the FastAPI app and its document worker pool.
+
+    Args:
+        workers: Documents processed at once. Defaults to parse_config.SERVER_WORKERS
+        worker_mode: "process" or "thread". Defaults to parse_config.SERVER_WORKER_MODE
+        max_documents_per_worker: Documents after which a worker process is replaced
+            (0 keeps workers). Defaults to parse_config.SERVER_MAX_DOCUMENTS_PER_WORKER
+        preload_model: Load the YOLO model when workers start.
+            Defaults to parse_config.SERVER_PRELOAD_MODEL
+        upload_dir: Directory for uploaded files. Defaults to parse_config.SERVER_UPLOAD_DIR
+
+    Returns:
+        FastAPI app; the pool is available as app.state.pool
+    """
+    pool = DocumentWorkerPool(
+        SERVER_WORKERS if workers is None else workers,
+        SERVER_WORKER_MODE if worker_mode is None else worker_mode,
+        SERVER_MAX_DOCUMENTS_PER_WORKER if max_documents_per_worker is None else max_documents_per_worker,
+        SERVER_PRELOAD_MODEL if preload_model is None else preload_model,
+    )
+    upload_dir = SERVER_UPLOAD_DIR if upload_dir is None else upload_dir
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await pool.start()
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(pool.shutdown)
+
+    app = FastAPI(title="Unsiloed Parser", lifespan=lifespan)
+    app.state.pool = pool
+
+    @app.get("/health")
+    async def health():
+        return dict(status="ok", **pool.status())
+
+    @app.post("/process")
+    async def process_documents(
+        files: List[UploadFile] = File(...),
+        strategy: str = Form("semantic"),
+        chunkSize: int = Form(1000),
+        overlap: int = Form(100),
+        apiKey: Optional[str] = Form(None),
+    ):
+        if strategy not in STRATEGIES:
+            raise HTTPException(status_code=400, detail=f"strategy must be one of {STRATEGIES}")
+        if strategy == "semantic" and not get_request_api_key(apiKey):
+            raise HTTPException(status_code=400, detail="apiKey is required for semantic chunking")
+
+        paths = []
+        try:
+            for upload in files:
+                paths.append(await _save_upload(upload, upload_dir))
+        except BaseException:
+            for path in paths:
+                _remove_file(path)
+            raise
+
+        options = {"strategy": strategy, "chunkSize": chunkSize, "overlap": overlap}
+        if apiKey:
+            options["credentials"] = {"apiKey": apiKey}
+
+        return StreamingResponse(
+            _stream_results(pool, [upload.filename for upload in files], paths, options),
+            media_type="application/x-ndjson",
+        )
+
+    return app
+
+
+app = create_app()
+
+
+def main():
+    """Run the server with uvicorn."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Unsiloed Parser HTTP server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default 8000)")
+    args = parser.parse_args()
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
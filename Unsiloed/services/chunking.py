@@ -4,6 +4,7 @@ from Unsiloed.utils.chunking import (
     paragraph_chunking,
     heading_chunking,
     semantic_chunking,
+    semantic_chunking_async,
     preserve_reading_order_in_chunks,
 )
 from Unsiloed.utils.openai import (
@@ -14,9 +15,13 @@ from Unsiloed.utils.openai import (
     extract_text_from_markdown_file,
     extract_text_from_url,
 )
-from Unsiloed.utils.web_utils import get_content_type_from_url, validate_url
+from Unsiloed.utils.web_utils import get_content_type_from_url, scrape_website_async, validate_url
+from Unsiloed.utils.metrics import timed_stage, track_llm_usage, track_stage_timings
+from Unsiloed.utils.request_context import use_request_context
 
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +32,7 @@ def process_document_chunking(
     strategy,
     chunk_size=1000,
     overlap=100,
+    context=None,
 ):
     """
     Process a document file (PDF, DOCX, PPTX, HTML, Markdown) or URL with the specified chunking strategy.
@@ -37,50 +43,143 @@ def process_document_chunking(
         strategy: Chunking strategy to use
         chunk_size: Size of chunks for fixed strategy
         overlap: Overlap size for fixed strategy
+        context: RequestContext with the credentials for the document's LLM calls.
+                 Defaults to the active context, then the OPENAI_API_KEY environment variable
 
     Returns:
-        Dictionary with chunking results
+        Dictionary with chunking results, including an "llm_usage" summary of the
+        OpenAI calls made for this document (tokens, latency and estimated cost,
+        overall and per purpose) and "timings", the wall-clock and CPU time spent
+        in each processing stage with a per-page breakdown for PDFs
     """
     logger.info(
         f"Processing {file_type.upper()} document with {strategy} chunking strategy"
     )
 
+    start_time = time.perf_counter()
+    with use_request_context(context), track_llm_usage() as llm_usage, track_stage_timings() as timings:
+        result = _chunk_document(file_path, file_type, strategy, chunk_size, overlap)
+    result["llm_usage"] = llm_usage.summary()
+    result["timings"] = dict(timings.summary(), total_wall_seconds=round(time.perf_counter() - start_time, 4))
+
+    return result
+
+
+async def process_document_chunking_async(
+    file_path,
+    file_type,
+    strategy,
+    chunk_size=1000,
+    overlap=100,
+    context=None,
+):
+    """
+    Async version of process_document_chunking.
+
+    The semantic pipeline is awaited on the caller's event loop, web pages are
+    fetched with scrape_website_async, and blocking work (text extraction,
+    chunking, reading order) runs on worker threads, so the loop stays free to
+    serve other requests.
+
+    Args and return value are the same as for process_document_chunking.
+    """
+    logger.info(
+        f"Processing {file_type.upper()} document with {strategy} chunking strategy"
+    )
+
+    start_time = time.perf_counter()
+    with use_request_context(context), track_llm_usage() as llm_usage, track_stage_timings() as timings:
+        result = await _chunk_document_async(file_path, file_type, strategy, chunk_size, overlap)
+    result["llm_usage"] = llm_usage.summary()
+    result["timings"] = dict(timings.summary(), total_wall_seconds=round(time.perf_counter() - start_time, 4))
+
+    return result
+
+
+def _chunk_document(file_path, file_type, strategy, chunk_size, overlap):
+    """Run the chunking strategy for process_document_chunking and build its result."""
+    semantic_result = None
+
     # Handle page-based chunking for PDFs only
     if strategy == "page" and file_type == "pdf":
-        chunks = page_based_chunking(file_path)
+        with timed_stage("text_extraction"):
+            chunks = page_based_chunking(file_path)
     elif strategy == "semantic":
         # For semantic chunking, pass the file path directly to enable YOLO segmentation for PDFs
         # For other file types, extract text first
         if file_type == "pdf":
             semantic_result = semantic_chunking(file_path)
-            chunks = semantic_result.get('chunks', []) if isinstance(semantic_result, dict) else semantic_result
         else:
             # Extract text first for non-PDF files
-            text = _extract_text_by_type(file_path, file_type)
+            with timed_stage("text_extraction"):
+                text = _extract_text_by_type(file_path, file_type)
             semantic_result = semantic_chunking(text)
-            chunks = semantic_result.get('chunks', []) if isinstance(semantic_result, dict) else semantic_result
+        chunks = semantic_result.get('chunks', []) if isinstance(semantic_result, dict) else semantic_result
     else:
         # Extract text based on file type for other strategies
-        text = _extract_text_by_type(file_path, file_type)
-
-        # Apply the selected chunking strategy
-        if strategy == "fixed":
-            chunks = fixed_size_chunking(text, chunk_size, overlap)
-        elif strategy == "paragraph":
-            chunks = paragraph_chunking(text, file_type)
-        elif strategy == "heading":
-            chunks = heading_chunking(text, file_type)
-        elif strategy == "page" and file_type != "pdf":
-            # For non-PDF files, fall back to paragraph chunking for page strategy
-            logger.warning(
-                f"Page-based chunking not supported for {file_type}, falling back to paragraph chunking"
-            )
-            chunks = paragraph_chunking(text, file_type)
+        with timed_stage("text_extraction"):
+            text = _extract_text_by_type(file_path, file_type)
+
+        with timed_stage("chunking"):
+            chunks = _apply_text_strategy(text, file_type, strategy, chunk_size, overlap)
+
+    with timed_stage("reading_order"):
+        chunks = preserve_reading_order_in_chunks(chunks, file_type)
+
+    return _build_result(chunks, file_type, strategy, semantic_result)
+
+
+async def _chunk_document_async(file_path, file_type, strategy, chunk_size, overlap):
+    """Run the chunking strategy for process_document_chunking_async and build its result."""
+    semantic_result = None
+
+    if strategy == "page" and file_type == "pdf":
+        chunks = await asyncio.to_thread(_run_timed, "text_extraction", page_based_chunking, file_path)
+    elif strategy == "semantic":
+        if file_type == "pdf":
+            semantic_result = await semantic_chunking_async(file_path)
         else:
-            raise ValueError(f"Unknown chunking strategy: {strategy}")
+            text = await _extract_text_by_type_async(file_path, file_type)
+            semantic_result = await semantic_chunking_async(text)
+        chunks = semantic_result.get('chunks', []) if isinstance(semantic_result, dict) else semantic_result
+    else:
+        text = await _extract_text_by_type_async(file_path, file_type)
+        chunks = await asyncio.to_thread(
+            _run_timed, "chunking", _apply_text_strategy, text, file_type, strategy, chunk_size, overlap
+        )
 
-    chunks = preserve_reading_order_in_chunks(chunks, file_type)
+    chunks = await asyncio.to_thread(
+        _run_timed, "reading_order", preserve_reading_order_in_chunks, chunks, file_type
+    )
 
+    return _build_result(chunks, file_type, strategy, semantic_result)
+
+
+def _run_timed(stage, func, *args):
+    """Run func under timed_stage on the calling (worker) thread, so its CPU time is measured."""
+    with timed_stage(stage):
+        return func(*args)
+
+
+def _apply_text_strategy(text, file_type, strategy, chunk_size, overlap):
+    """Apply a text chunking strategy (everything except semantic and PDF page chunking)."""
+    if strategy == "fixed":
+        return fixed_size_chunking(text, chunk_size, overlap)
+    elif strategy == "paragraph":
+        return paragraph_chunking(text, file_type)
+    elif strategy == "heading":
+        return heading_chunking(text, file_type)
+    elif strategy == "page" and file_type != "pdf":
+        # For non-PDF files, fall back to paragraph chunking for page strategy
+        logger.warning(
+            f"Page-based chunking not supported for {file_type}, falling back to paragraph chunking"
+        )
+        return paragraph_chunking(text, file_type)
+    else:
+        raise ValueError(f"Unknown chunking strategy: {strategy}")
+
+
+def _build_result(chunks, file_type, strategy, semantic_result=None):
     # Calculate statistics
     total_chunks = len(chunks)
     avg_chunk_size = (
@@ -97,15 +196,30 @@ def process_document_chunking(
         "chunks": chunks,
     }
 
+    # Report how many semantic boundaries each cascade tier decided
+    if isinstance(semantic_result, dict) and "boundary_stats" in semantic_result:
+        result["boundary_stats"] = semantic_result["boundary_stats"]
+
     return result
 
 
+async def _extract_text_by_type_async(file_path: str, file_type: str) -> str:
+    """Async version of _extract_text_by_type; web pages are fetched without blocking the loop."""
+    if file_type == "url" and file_path.startswith(("http://", "https://")):
+        with timed_stage("text_extraction", cpu=False):
+            scraped = await scrape_website_async(file_path)
+        logger.info(f"Successfully extracted {len(scraped['content'])} characters from URL")
+        return scraped['content']
+    return await asyncio.to_thread(_run_timed, "text_extraction", _extract_text_by_type, file_path, file_type)
+
+
 def _extract_text_by_type(file_path: str, file_type: str) -> str:
     """
     Extract text based on file type.
 
     Args:
-        file_path: Path to the document file or URL
+        file_path: Path to the document file or URL. A 'url' document may also be
+            a web page already saved to a local HTML file (see download_document)
         file_type: Type of document
 
     Returns:
@@ -125,6 +239,8 @@ def _extract_text_by_type(file_path: str, file_type: str) -> str:
         with open(file_path, 'r', encoding='utf-8') as f:
             return f.read()
     elif file_type == "url":
+        if not file_path.startswith(("http://", "https://")):
+            return extract_text_from_html(file_path)
         return extract_text_from_url(file_path)
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
@@ -0,0 +1,126 @@
+"""
+Document result cache for process() / process_sync().
+
+Results are stored under a key made of the SHA-256 of the document bytes and a
+canonical fingerprint of the chunking options and pipeline settings (OCR
+backend and mode, boundary detection, render DPIs, OpenAI model), so duplicate uploads of the same
+file with the same options are answered without running YOLO, OCR or OpenAI.
+Credentials are never part of the key.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from Unsiloed.parse_config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_VERSION
+from Unsiloed.utils.cache import PersistentCache, file_content_hash, make_cache_key, open_cache
+from Unsiloed.utils.chunking import ChunkingConfig
+from Unsiloed.utils.ocr_backends import get_ocr_backend
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_FILENAME = "results.sqlite"
+
+
+def get_result_cache(cache_option: Any) -> Optional[PersistentCache]:
+    """
+    Resolve the "cache" option of process() to a cache instance.
+
+    Args:
+        cache_option: False/None (disabled), True (defaults) or a dictionary with
+            - enabled: Turn the cache on or off (default: True)
+            - dir: Directory of the cache file (default: RESULT_CACHE_DIR)
+            - ttlSeconds: Maximum age of a cached result (default: no expiry)
+            - maxBytes: Size budget before least-recently-used results are evicted
+
+    Returns:
+        PersistentCache, or None when the cache is disabled
+    """
+    if not cache_option:
+        return None
+    if cache_option is True:
+        cache_option = {}
+    if not isinstance(cache_option, dict):
+        raise ValueError("cache must be a boolean or a dictionary")
+    if not cache_option.get("enabled", True):
+        return None
+
+    cache_dir = cache_option.get("dir") or RESULT_CACHE_DIR
+    return open_cache(
+        os.path.join(cache_dir, RESULT_CACHE_FILENAME),
+        max_bytes=cache_option.get("maxBytes", RESULT_CACHE_MAX_BYTES),
+        ttl_seconds=cache_option.get("ttlSeconds"),
+    )
+
+
+def pipeline_settings() -> Dict[str, Any]:
+    """Process-wide pipeline settings that shape a result besides the call options."""
+    return {
+        "ocr_backend": get_ocr_backend().name,
+        "ocr_mode": ChunkingConfig.DEFAULT_OCR_MODE,
+        "boundary_mode": ChunkingConfig.DEFAULT_BOUNDARY_MODE,
+        "boundary_cascade": bool(ChunkingConfig.DEFAULT_BOUNDARY_CASCADE),
+        "threshold": ChunkingConfig.DEFAULT_OPENAI_CONFIDENCE_THRESHOLD,
+        "layout_dpi": ChunkingConfig.LAYOUT_DPI,
+        "ocr_dpi": ChunkingConfig.OCR_DPI,
+        "model": ChunkingConfig.OPENAI_MODEL,
+    }
+
+
+def result_cache_key(
+    file_path: str, file_type: str, strategy: str, chunk_size: int, overlap: int
+) -> str:
+    """Cache key for a local document, the options and the pipeline settings that affect its result."""
+    return make_cache_key({
+        "version": RESULT_CACHE_VERSION,
+        "content_sha256": file_content_hash(file_path),
+        "file_type": file_type,
+        "strategy": strategy,
+        "chunkSize": chunk_size,
+        "overlap": overlap,
+        "settings": pipeline_settings(),
+    })
+
+
+def lookup_result(cache: PersistentCache, key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached result for a key, or None."""
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    logger.info("Serving document result from cache")
+    return json.loads(cached.decode("utf-8"))
+
+
+# Fields that describe the run that produced a result rather than the result itself
+RUN_FIELDS = ("llm_usage", "timings", "cache_hit")
+
+
+def store_result(cache: PersistentCache, key: str, result: Dict[str, Any]) -> None:
+    """
+    Serialize and store a result without its RUN_FIELDS; results that are not
+    JSON-serializable are skipped.
+    """
+    stored = {name: value for name, value in result.items() if name not in RUN_FIELDS}
+    try:
+        cache.set(key, json.dumps(stored, ensure_ascii=False))
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Result not cached: {str(e)}")
+
+
+def prepare_result_cache(
+    cache_option: Any, file_path: str, file_type: str, strategy: str, chunk_size: int, overlap: int
+) -> Tuple[Optional[PersistentCache], Optional[str]]:
+    """
+    Resolve the cache and key for a document.
+
+    Web pages ('url' documents) change without their URL changing and are
+    never cached.
+
+    Returns:
+        (cache, key), or (None, None) when the result should not be cached
+    """
+    cache = get_result_cache(cache_option)
+    if cache is None or file_type == "url" or file_path.startswith(("http://", "https://")):
+        return None, None
+    return cache, result_cache_key(file_path, file_type, strategy, chunk_size, overlap)
@@ -0,0 +1,152 @@
+"""
+Document worker pool shared by the HTTP server and the CLI.
+
+Documents are processed with process_sync() on a bounded pool of workers,
+either spawned processes or threads. Every worker loads the OpenAI client and
+(optionally) the YOLO model when it starts, before it takes a document, and
+worker processes can be replaced after a number of documents so that memory
+held by PIL/torch allocations is returned to the OS.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import sys
+from typing import Any, Callable, Dict, Optional
+
+import Unsiloed
+from Unsiloed.utils.openai import get_openai_client
+from Unsiloed.utils.yolo_model_utils import get_model
+
+logger = logging.getLogger(__name__)
+
+WORKER_MODES = ("process", "thread")
+
+
+def _preload_worker(preload_model: bool, log_level: Optional[int] = None) -> None:
+    """Load the OpenAI client and YOLO model before the worker takes documents."""
+    if log_level is not None:
+        logging.getLogger().setLevel(log_level)
+    if os.environ.get("OPENAI_API_KEY"):
+        get_openai_client()
+    if preload_model:
+        try:
+            get_model()
+        except RuntimeError:
+            logger.warning("YOLO model could not be preloaded; it is loaded again on first use")
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _run_document(options: Dict[str, Any]) -> Dict[str, Any]:
+    return Unsiloed.process_sync(options)
+
+
+class DocumentWorkerPool:
+    """
+    Bounded pool of document workers with preloaded models.
+
+    In "process" mode, workers are spawned (not forked, which is unsafe once the
+    parent runs threads) and, on Python 3.11+, replaced after
+    max_documents_per_worker tasks; the startup warm-up counts as one. In
+    "thread" mode, documents run on threads of the calling process, which loads
+    the models once.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        mode: str = "process",
+        max_documents_per_worker: int = 0,
+        preload_model: bool = True,
+        log_level: Optional[int] = None,
+    ):
+        """
+        Args:
+            workers: Documents processed at once
+            mode: "process" or "thread"
+            max_documents_per_worker: Tasks after which a worker process is replaced (0 keeps workers)
+            preload_model: Load the YOLO model when a worker starts
+            log_level: Root logging level set in worker processes (None keeps the default)
+        """
+        self.workers = workers
+        self.mode = mode
+        self.max_documents_per_worker = max_documents_per_worker
+        self.preload_model = preload_model
+        self.log_level = log_level
+
+        if not isinstance(self.workers, int) or self.workers <= 0:
+            raise ValueError(f"workers must be a positive integer, got {self.workers}")
+        if self.mode not in WORKER_MODES:
+            raise ValueError(f"Worker mode must be one of {WORKER_MODES}, got {self.mode!r}")
+        if self.max_documents_per_worker < 0:
+            raise ValueError(f"max_documents_per_worker must be >= 0, got {self.max_documents_per_worker}")
+
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._in_flight = 0
+        self._completed = 0
+
+    def _create_executor(self) -> concurrent.futures.Executor:
+        if self.mode == "thread":
+            return concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="unsiloed-server"
+            )
+
+        kwargs = {}
+        if self.max_documents_per_worker:
+            if sys.version_info >= (3, 11):
+                kwargs["max_tasks_per_child"] = self.max_documents_per_worker
+            else:
+                logger.warning("Recycling worker processes requires Python 3.11+; workers are kept")
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_preload_worker,
+            initargs=(self.preload_model, self.log_level),
+            **kwargs,
+        )
+
+    async def start(self) -> None:
+        """Create the workers and wait until their models are loaded."""
+        self._executor = self._create_executor()
+        if self.mode == "process":
+            # Start every worker now rather than on the first requests
+            await asyncio.gather(*(self.submit(_worker_ready) for _ in range(self.workers)))
+        else:
+            await asyncio.to_thread(_preload_worker, self.preload_model)
+        logger.info(f"Started {self.workers} {self.mode} document workers")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel queued documents and, with wait, wait for running ones."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, func: Callable[..., Any], *args) -> Any:
+        """Run a picklable function on a worker and await its result."""
+        if self._executor is None:
+            raise RuntimeError("Worker pool is not running")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def process(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Process one document (process() options) on a worker."""
+        self._in_flight += 1
+        try:
+            return await self.submit(_run_document, options)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._executor is not None,
+            "mode": self.mode,
+            "workers": self.workers,
+            "maxDocumentsPerWorker": self.max_documents_per_worker,
+            "documentsInFlight": self._in_flight,
+            "documentsCompleted": self._completed,
+        }
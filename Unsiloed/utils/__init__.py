@@ -12,11 +12,18 @@ from .web_utils import (
     validate_url,
     get_content_type_from_url,
     extract_links_from_html,
+    detect_document_type,
+    download_document,
+    get_http_session,
+    close_http_session,
+    get_async_http_session,
+    aclose_async_http_sessions,
     WebProcessingError,
     URLValidationError,
     WebScrapingError,
     MarkdownProcessingError,
     HTMLProcessingError,
+    DownloadTooLargeError,
 )
 
 __all__ = [
@@ -29,9 +36,16 @@ __all__ = [
     'validate_url',
     'get_content_type_from_url',
     'extract_links_from_html',
+    'detect_document_type',
+    'download_document',
+    'get_http_session',
+    'close_http_session',
+    'get_async_http_session',
+    'aclose_async_http_sessions',
     'WebProcessingError',
     'URLValidationError',
     'WebScrapingError',
     'MarkdownProcessingError',
     'HTMLProcessingError',
+    'DownloadTooLargeError',
 ] 
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Persistent Cache
+
+A small content-addressed key/value store on SQLite, shared by the LLM response
+cache and the document result cache. Entries are evicted least-recently-used
+first once the stored values exceed a size budget, and can optionally expire
+after a TTL. Hit and miss counters are kept per cache instance.
+
+Keys are produced by make_cache_key, a SHA-256 over a canonical JSON encoding,
+so identical requests map to the same entry across processes and runs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(payload: Any) -> str:
+    """
+    Hash a JSON-serializable payload into a cache key.
+
+    Dictionaries are serialized with sorted keys, so the key does not depend on
+    argument order.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_content_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PersistentCache:
+    """
+    SQLite-backed cache with size-based LRU eviction and optional TTL.
+
+    Safe to share between threads; several processes may also open the same
+    file (SQLite serializes the writes).
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        """
+        Open (or create) a cache file.
+
+        Args:
+            path: SQLite database file
+            max_bytes: Total size of stored values before least-recently-used entries are evicted
+            ttl_seconds: Entries older than this are treated as missing. None keeps entries until evicted.
+        """
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise ValueError(f"max_bytes must be a positive integer, got {max_bytes}")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError(f"ttl_seconds must be positive, got {ttl_seconds}")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        self._total_bytes = self._stored_bytes()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored value for key, or None on a miss (including expired entries)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._delete(key)
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return bytes(row[0])
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a value, evicting least-recently-used entries if the size budget is exceeded."""
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        size = len(value)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {size} byte value larger than the cache budget")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size, now, now),
+            )
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                # Other processes may share the file, so re-read the real total first
+                self._total_bytes = self._stored_bytes()
+                self._evict()
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def _evict(self) -> None:
+        evicted = 0
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                evicted += 1
+        if evicted:
+            logger.debug(f"Evicted {evicted} cache entries from {self.path}")
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_open_caches: Dict[str, PersistentCache] = {}
+_open_caches_lock = threading.Lock()
+
+
+def open_cache(path: str, max_bytes: int, ttl_seconds: Optional[float] = None) -> PersistentCache:
+    """
+    Return the shared PersistentCache for a file, opening it on first use.
+
+    Size budget and TTL of an already open cache are updated to the given values.
+    """
+    path = os.path.abspath(path)
+    with _open_caches_lock:
+        cache = _open_caches.get(path)
+        if cache is None:
+            cache = PersistentCache(path, max_bytes, ttl_seconds)
+            _open_caches[path] = cache
+        else:
+            cache.max_bytes = max_bytes
+            cache.ttl_seconds = ttl_seconds
+        return cache
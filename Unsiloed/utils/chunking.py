@@ -31,22 +31,49 @@ Version: 2.2.0
 
 import asyncio
 import concurrent.futures
+import contextvars
 import time
 import os
 import json
 import re
 import numpy as np
-from typing import List, Literal, Union, Dict, Any
+from typing import List, Literal, Optional, Union, Dict, Any, Tuple
 from PIL import Image
 import logging
 import PyPDF2
-from Unsiloed.utils.extractionutils import _extract_image_with_openai_async, _extract_table_with_openai_async, _extract_text_with_ocr
-from Unsiloed.utils.fileutils import pdf_to_images
+from Unsiloed.utils.extractionutils import (
+    _extract_image_with_openai_async,
+    _extract_table_with_openai_async,
+    _extract_text_with_ocr,
+    _extract_region_texts_with_page_ocr,
+    record_extraction_failure,
+    track_extraction_failures,
+)
+from Unsiloed.utils.fileutils import PDFRaster
 from Unsiloed.utils.openai import (
     semantic_chunk_with_structured_output,
-    get_openai_client
+    get_openai_client,
+    get_async_openai_client,
+    aclose_async_openai_clients,
+    complete_chat,
+    complete_chat_async,
+)
+from Unsiloed.utils.yolo_model_utils import batch_pages, run_yolo_inference
+from Unsiloed.utils.lexical import adjacent_similarities, tokenize
+from Unsiloed.utils.incremental import PageStore, get_page_store
+from Unsiloed.utils.ocr_backends import get_ocr_backend
+from Unsiloed.utils.executors import DETECTION_STAGE, OCR_STAGE, RENDER_STAGE, run_in_cpu_stage
+from Unsiloed.utils.metrics import for_pages, timed_stage
+from Unsiloed.utils.request_context import RequestContext, use_request_context
+from Unsiloed.parse_config import (
+    DEFAULT_YOLO_BATCH_SIZE,
+    DEFAULT_RENDER_DPI,
+    DEFAULT_LAYOUT_DPI,
+    DEFAULT_RENDER_WINDOW_PAGES,
+    DEFAULT_MAX_QUEUED_PAGES,
+    OPENAI_TIMEOUT,
+    OPENAI_MAX_RETRIES,
 )
-from Unsiloed.utils.yolo_model_utils import run_yolo_inference
 
 logger = logging.getLogger(__name__)
 
@@ -58,13 +85,55 @@ class ChunkingConfig:
     OPENAI_MODEL = "gpt-4o"
     OPENAI_MAX_TOKENS = 300
     OPENAI_TEMPERATURE = 0.1
-    OPENAI_TIMEOUT = 60.0
-    OPENAI_MAX_RETRIES = 2
+    OPENAI_TIMEOUT = OPENAI_TIMEOUT
+    OPENAI_MAX_RETRIES = OPENAI_MAX_RETRIES
 
     DEFAULT_MAX_CONCURRENT_CALLS = 15
     DEFAULT_EXTRACTION_CONCURRENT_CALLS = 5
     DEFAULT_GROUPING_CONCURRENT_CALLS = 5
 
+    DEFAULT_YOLO_BATCH_SIZE = DEFAULT_YOLO_BATCH_SIZE
+
+    # "region": one Tesseract call per cropped region
+    # "page": one Tesseract call per page, words assigned to regions afterwards
+    OCR_MODES = ("region", "page")
+    DEFAULT_OCR_MODE = "region"
+
+    # Pages rendered per pdf2image call and rendered pages allowed to wait for YOLO
+    RENDER_WINDOW_PAGES = DEFAULT_RENDER_WINDOW_PAGES
+    MAX_QUEUED_PAGES = DEFAULT_MAX_QUEUED_PAGES
+
+    # PDFs are laid out at LAYOUT_DPI; text/table/formula regions are re-rendered at OCR_DPI
+    LAYOUT_DPI = DEFAULT_LAYOUT_DPI
+    OCR_DPI = DEFAULT_RENDER_DPI
+
+    # Regions closer than REGION_MERGE_GAP (fraction of the page height) are re-rendered
+    # together. When the merged regions cover more than REGION_RENDER_MAX_COVERAGE of the
+    # page, or there are more than MAX_REGION_RENDERS of them, the page is rendered whole.
+    REGION_MERGE_GAP = 0.02
+    REGION_RENDER_MAX_COVERAGE = 0.6
+    MAX_REGION_RENDERS = 6
+
+    # "pairwise": one LLM call per adjacent pair of elements
+    # "window": one LLM call per window of BOUNDARY_WINDOW_SIZE consecutive elements,
+    #           windows overlapping by BOUNDARY_WINDOW_OVERLAP elements
+    BOUNDARY_MODES = ("pairwise", "window")
+    DEFAULT_BOUNDARY_MODE = "pairwise"
+    BOUNDARY_WINDOW_SIZE = 12
+    BOUNDARY_WINDOW_OVERLAP = 4
+    BOUNDARY_WINDOW_ELEMENT_CHARS = 600
+    BOUNDARY_WINDOW_MAX_TOKENS = 1500
+
+    # Boundary cascade: confident structural rules first, then lexical similarity
+    # between adjacent elements; only gaps neither tier settles go to the LLM.
+    # Lexical decisions need CASCADE_MIN_TOKENS tokens on both sides of the gap.
+    DEFAULT_BOUNDARY_CASCADE = False
+    CASCADE_CONTINUE_SIMILARITY = 0.35
+    CASCADE_SPLIT_SIMILARITY = 0.02
+    CASCADE_MIN_TOKENS = 12
+    # "fallback" counts heuristic decisions made because the LLM call failed
+    BOUNDARY_TIERS = ("structural", "lexical", "llm", "reused", "fallback")
+
     DEFAULT_CHUNK_SIZE = 1000
     DEFAULT_OVERLAP = 100
     MAX_TEXT_PREVIEW_LENGTH = 80
@@ -179,6 +248,31 @@ Respond with a JSON object containing:
   "boundary_type": "major" | "minor" | "none"
 }
 
+Guidelines:
+- "major" split: Completely different topics, new sections, different document structure
+- "minor" split: Related but distinct subtopics, paragraph breaks, list transitions
+- "none": Continuation of the same semantic context
+- Consider element types: titles/headers usually start new groups
+- Consider content flow: does the next element logically continue the current context?
+- Be conservative: prefer keeping related content together"""
+
+        self.window_system_prompt = """You are an expert document analyzer specialized in semantic boundary detection. You will receive a numbered sequence of consecutive document elements (text blocks, headers, tables, pictures, formulas) in reading order.
+
+For every gap between element i and element i+1, decide whether a semantic boundary (split) belongs there, i.e. whether element i+1 should start a new semantic group.
+
+Respond with a JSON object containing one decision per gap:
+{
+  "boundaries": [
+    {
+      "index": int (the gap after element i),
+      "should_split": boolean,
+      "confidence": float (0.0 to 1.0),
+      "reasoning": "Brief explanation of your decision",
+      "boundary_type": "major" | "minor" | "none"
+    }
+  ]
+}
+
 Guidelines:
 - "major" split: Completely different topics, new sections, different document structure
 - "minor" split: Related but distinct subtopics, paragraph breaks, list transitions
@@ -218,7 +312,9 @@ NEXT ELEMENT METADATA:
 
 Should there be a semantic boundary before adding this next element?"""
 
-            response = self.client.chat.completions.create(
+            content = complete_chat(
+                self.client,
+                purpose="boundary",
                 model=ChunkingConfig.OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": self.system_prompt},
@@ -229,7 +325,7 @@ Should there be a semantic boundary before adding this next element?"""
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             # Validate and normalize the response
             should_split = bool(result.get('should_split', False))
@@ -257,10 +353,38 @@ Should there be a semantic boundary before adding this next element?"""
             # Fallback decision based on heuristics
             return self._fallback_boundary_detection(current_text, next_text, next_metadata)
     
+    def structural_boundary_decision(self, current_metadata: Dict[str, Any], next_metadata: Dict[str, Any]) -> Union[Dict[str, Any], None]:
+        """
+        Decide a boundary from element types alone, when the layout makes it near-certain.
+        
+        Returns:
+            Boundary decision, or None when the element types are not conclusive
+        """
+        current_type = current_metadata.get('element_type', 'Text')
+        next_type = next_metadata.get('element_type', 'Text')
+        
+        if next_type in ['Title', 'Section-header']:
+            should_split, confidence, boundary_type, reasoning = True, 0.9, 'major', 'New heading detected'
+        elif next_type == 'Caption' and current_type in ['Picture', 'Table']:
+            should_split, confidence, boundary_type, reasoning = False, 0.9, 'none', 'Caption follows its figure'
+        elif next_type == 'List-item' and current_type == 'List-item':
+            should_split, confidence, boundary_type, reasoning = False, 0.85, 'none', 'List continues'
+        else:
+            return None
+        
+        return {
+            'should_split': should_split,
+            'confidence': confidence,
+            'reasoning': reasoning,
+            'boundary_type': boundary_type,
+            'meets_threshold': confidence >= self.confidence_threshold
+        }
+
     def _fallback_boundary_detection(self, current_text: str, next_text: str, next_metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
         Fallback boundary detection using heuristics when OpenAI fails.
         """
+        record_extraction_failure("boundary: heuristic fallback")
         element_type = next_metadata.get('element_type', 'Text')
         
         # Heuristic rules
@@ -291,7 +415,8 @@ Should there be a semantic boundary before adding this next element?"""
             'confidence': confidence,
             'reasoning': reasoning,
             'boundary_type': boundary_type,
-            'meets_threshold': confidence >= self.confidence_threshold
+            'meets_threshold': confidence >= self.confidence_threshold,
+            'fallback': True
         }
 
     async def detect_boundary_async(self, current_text: str, next_text: str, next_metadata: Dict[str, Any]) -> Dict[str, Any]:
@@ -307,19 +432,12 @@ Should there be a semantic boundary before adding this next element?"""
             Dictionary with boundary decision and confidence
         """
         try:
-            # Create async OpenAI client
-            from openai import AsyncOpenAI
-            api_key = os.environ.get("OPENAI_API_KEY")
-            if not api_key:
-                logger.warning("OPENAI_API_KEY not available, using fallback")
+            # Shared async OpenAI client for this event loop
+            async_client = get_async_openai_client()
+            if async_client is None:
+                logger.warning("OpenAI API key not available, using fallback")
                 return self._fallback_boundary_detection(current_text, next_text, next_metadata)
             
-            async_client = AsyncOpenAI(
-                api_key=api_key, 
-                timeout=ChunkingConfig.OPENAI_TIMEOUT, 
-                max_retries=ChunkingConfig.OPENAI_MAX_RETRIES
-            )
-            
             # Prepare the analysis prompt
             user_prompt = f"""Analyze whether to insert a semantic boundary:
 
@@ -338,7 +456,9 @@ NEXT ELEMENT METADATA:
 
 Should there be a semantic boundary before adding this next element?"""
 
-            response = await async_client.chat.completions.create(
+            content = await complete_chat_async(
+                async_client,
+                purpose="boundary",
                 model=ChunkingConfig.OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": self.system_prompt},
@@ -349,7 +469,7 @@ Should there be a semantic boundary before adding this next element?"""
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             # Validate and normalize the response
             should_split = bool(result.get('should_split', False))
@@ -378,6 +498,194 @@ Should there be a semantic boundary before adding this next element?"""
             return self._fallback_boundary_detection(current_text, next_text, next_metadata)
 
 
+    async def detect_boundaries_window_async(self, elements: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Detect boundaries for every gap in a window of consecutive elements with one LLM call.
+        
+        Args:
+            elements: Consecutive bbox results ('content' and 'metadata')
+            
+        Returns:
+            Dictionary mapping the gap index within the window (gap i lies between
+            element i and element i + 1) to a boundary decision. Gaps the model did
+            not answer fall back to the heuristic decision.
+        """
+        decisions = {}
+        try:
+            async_client = get_async_openai_client()
+            if async_client is None:
+                logger.warning("OpenAI API key not available, using fallback")
+            else:
+                max_chars = ChunkingConfig.BOUNDARY_WINDOW_ELEMENT_CHARS
+                element_lines = []
+                for i, element in enumerate(elements):
+                    metadata = element.get('metadata', {})
+                    text = element.get('content', '')
+                    element_lines.append(
+                        f"[{i}] type={metadata.get('element_type', 'Unknown')} "
+                        f"page={metadata.get('page_number', 'Unknown')}\n"
+                        f"{text[:max_chars]}{'...' if len(text) > max_chars else ''}"
+                    )
+                user_prompt = (
+                    f"Decide the semantic boundaries for the {len(elements) - 1} gaps "
+                    f"(index 0 to {len(elements) - 2}) between these elements:\n\n"
+                    + "\n\n".join(element_lines)
+                )
+
+                content = await complete_chat_async(
+                    async_client,
+                    purpose="boundary",
+                    model=ChunkingConfig.OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": self.window_system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=ChunkingConfig.BOUNDARY_WINDOW_MAX_TOKENS,
+                    temperature=ChunkingConfig.OPENAI_TEMPERATURE,
+                    response_format={"type": "json_object"}
+                )
+
+                result = json.loads(content)
+                for item in result.get('boundaries', []):
+                    try:
+                        gap = int(item.get('index'))
+                    except (TypeError, ValueError):
+                        continue
+                    if not 0 <= gap < len(elements) - 1:
+                        continue
+                    confidence = max(0.0, min(1.0, float(item.get('confidence', 0.0))))
+                    decisions[gap] = {
+                        'should_split': bool(item.get('should_split', False)),
+                        'confidence': confidence,
+                        'reasoning': str(item.get('reasoning', 'No reasoning provided')),
+                        'boundary_type': str(item.get('boundary_type', 'none')),
+                        'meets_threshold': confidence >= self.confidence_threshold
+                    }
+
+                if self.debug:
+                    logger.debug(f"Window boundary decisions: {len(decisions)} of {len(elements) - 1} gaps answered")
+
+        except Exception as e:
+            logger.error(f"Error in windowed OpenAI boundary detection: {e}")
+
+        # Gaps without an answer from the model use the heuristic decision
+        for gap in range(len(elements) - 1):
+            if gap not in decisions:
+                decisions[gap] = self._fallback_boundary_detection(
+                    elements[gap].get('content', ''),
+                    elements[gap + 1].get('content', ''),
+                    elements[gap + 1].get('metadata', {})
+                )
+        return decisions
+
+
+def _local_boundary_decisions(
+    bbox_results: List[Dict[str, Any]],
+    boundary_detector: OpenAISemanticBoundaryDetector
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Run the local tiers of the boundary cascade.
+    
+    Tier 1 applies the detector's structural rules. Tier 2 compares hashed TF-IDF
+    vectors of adjacent elements: a high cosine similarity settles a continuation
+    and a near-zero one a topic shift, provided both elements are long enough for
+    the comparison to mean something.
+    
+    Args:
+        bbox_results: Content elements in reading order
+        boundary_detector: Detector providing the structural rules and threshold
+        
+    Returns:
+        Dictionary mapping gap index (between element i and i + 1) to a decision
+        tagged with its 'tier'. Gaps left out are ambiguous and go to the LLM.
+    """
+    texts = [result.get('content', '') for result in bbox_results]
+    similarities = adjacent_similarities(texts)
+    token_counts = [len(tokenize(text)) for text in texts]
+    
+    decisions = {}
+    for i in range(len(bbox_results) - 1):
+        decision = boundary_detector.structural_boundary_decision(
+            bbox_results[i].get('metadata', {}), bbox_results[i + 1].get('metadata', {})
+        )
+        if decision is not None:
+            decisions[i] = dict(decision, tier='structural')
+            continue
+        
+        if min(token_counts[i], token_counts[i + 1]) < ChunkingConfig.CASCADE_MIN_TOKENS:
+            continue
+        
+        similarity = float(similarities[i])
+        if similarity >= ChunkingConfig.CASCADE_CONTINUE_SIMILARITY:
+            should_split, boundary_type = False, 'none'
+            confidence = min(1.0, 0.5 + similarity / 2)
+        elif similarity <= ChunkingConfig.CASCADE_SPLIT_SIMILARITY:
+            should_split, boundary_type = True, 'minor'
+            confidence = 0.6 + 0.2 * (1.0 - similarity / ChunkingConfig.CASCADE_SPLIT_SIMILARITY)
+        else:
+            continue
+        
+        decisions[i] = {
+            'should_split': should_split,
+            'confidence': confidence,
+            'reasoning': f'Lexical similarity {similarity:.2f}',
+            'boundary_type': boundary_type,
+            'meets_threshold': confidence >= boundary_detector.confidence_threshold,
+            'tier': 'lexical'
+        }
+    
+    return decisions
+
+
+def _plan_boundary_windows(element_count: int, window_size: int, overlap: int) -> List[int]:
+    """
+    Return the start indices of overlapping windows covering every gap between elements.
+    
+    Consecutive windows share `overlap` elements, so each gap near a window edge
+    is also seen away from the edge by a neighbouring window.
+    """
+    if window_size < 2:
+        raise InvalidConfigurationError(f"Boundary window size must be at least 2, got {window_size}")
+    if not 0 <= overlap < window_size - 1:
+        raise InvalidConfigurationError(
+            f"Boundary window overlap must be between 0 and {window_size - 2}, got {overlap}"
+        )
+    if element_count < 2:
+        return []
+
+    step = window_size - overlap
+    starts = list(range(0, max(element_count - window_size, 0) + 1, step))
+    # Make sure the last gap is covered by a full-size window
+    if starts[-1] + window_size < element_count:
+        starts.append(element_count - window_size)
+    return starts
+
+
+def _reconcile_window_decisions(
+    window_decisions: List[Tuple[int, int, Dict[int, Dict[str, Any]]]]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Merge the decisions of overlapping windows into one decision per gap.
+    
+    Args:
+        window_decisions: (window start, window length, {gap within window: decision}) tuples
+        
+    Returns:
+        Dictionary mapping the global gap index to a boundary decision. When several
+        windows decide the same gap, the window where the gap sits furthest from an
+        edge (most context on both sides) wins.
+    """
+    best = {}
+    for start, length, decisions in window_decisions:
+        last_gap = length - 2
+        for gap, decision in decisions.items():
+            margin = min(gap, last_gap - gap)
+            global_gap = start + gap
+            if global_gap not in best or margin > best[global_gap][0]:
+                best[global_gap] = (margin, decision)
+    return {gap: decision for gap, (_, decision) in best.items()}
+
+
 def fixed_size_chunking(text: str, chunk_size: int = None, overlap: int = None) -> List[Dict[str, Any]]:
     """
     Split text into fixed-size chunks with optional overlap.
@@ -701,7 +1009,15 @@ def heading_chunking(text: str, file_type: str = "text") -> List[Dict[str, Any]]
     return chunks
 
 
-def semantic_chunking(text_or_file_path: Union[str, List[Image.Image]], max_concurrent_calls: int = None):
+def semantic_chunking(
+    text_or_file_path: Union[str, List[Image.Image]],
+    max_concurrent_calls: int = None,
+    yolo_batch_size: int = None,
+    ocr_mode: str = None,
+    boundary_mode: str = None,
+    boundary_cascade: bool = None,
+    context: Optional[RequestContext] = None,
+):
     """
     Advanced semantic chunking using YOLO for page segmentation with PARALLEL OpenAI-based semantic grouping.
     
@@ -712,26 +1028,129 @@ def semantic_chunking(text_or_file_path: Union[str, List[Image.Image]], max_conc
     4. Employing OpenAI to determine semantic boundaries during processing
     5. Grouping bbox results based on OpenAI confidence scores
     
-    All content extraction and boundary detection operations run in parallel with 
-    semaphore control for optimal performance while respecting API rate limits.
+    All content extraction and boundary detection operations run in parallel. OpenAI
+    calls are paced by the process-wide rate limiter (see utils/rate_limiter.py),
+    which is shared with every other document processed concurrently.
 
     Args:
         text_or_file_path: Either text string (fallback to legacy method) or file path 
                           for document processing, or list of PIL Images
-        max_concurrent_calls: Maximum number of concurrent OpenAI API calls. 
+        max_concurrent_calls: Maximum number of pages extracted concurrently. 
                              Defaults to ChunkingConfig.DEFAULT_MAX_CONCURRENT_CALLS
+        yolo_batch_size: Number of pages per YOLO forward pass.
+                        Defaults to ChunkingConfig.DEFAULT_YOLO_BATCH_SIZE
+        ocr_mode: "region" to OCR every text region separately or "page" to OCR each
+                 page once and assign words to regions. Defaults to ChunkingConfig.DEFAULT_OCR_MODE
+        boundary_mode: "pairwise" to ask the LLM about every adjacent pair of elements or
+                      "window" to decide a window of consecutive elements per call.
+                      Defaults to ChunkingConfig.DEFAULT_BOUNDARY_MODE
+        boundary_cascade: Settle clear boundaries with structural rules and lexical
+                         similarity before asking the LLM about the remaining ones.
+                         Defaults to ChunkingConfig.DEFAULT_BOUNDARY_CASCADE
+        context: Request context with the credentials for the document's LLM calls.
+                Defaults to the active context, then the OPENAI_API_KEY environment variable
 
     Returns:
         Dictionary containing:
         - 'chunks': List of semantically grouped chunks with metadata in reading order
         - 'image_dimensions': List of dictionaries with 'width' and 'height' for each page
+        - 'boundary_stats': Number of boundary decisions made by each cascade tier
+          ('structural', 'lexical', 'llm', 'reused', 'fallback')
         
     Raises:
         DocumentProcessingError: When document processing fails
         OpenAIServiceError: When OpenAI service is unavailable
         InvalidConfigurationError: When configuration parameters are invalid
     """
+    options = _resolve_semantic_options(
+        max_concurrent_calls, yolo_batch_size, ocr_mode, boundary_mode, boundary_cascade
+    )
+    logger.info(f"🚀 Using YOLO-based semantic segmentation with PARALLEL OpenAI calls (max {options[0]} concurrent)")
+    
+    with use_request_context(context):
+        try:
+            # For text-only input, use enhanced reading order aware processing
+            if _is_text_input(text_or_file_path):
+                logger.info("Text input detected, applying reading order aware semantic chunking")
+                enhanced_chunks = _enhanced_text_semantic_chunking(text_or_file_path)
+                return {
+                    'chunks': enhanced_chunks,
+                    'image_dimensions': []
+                }
+        
+            source = _semantic_source(text_or_file_path)
+        
+            # Run the async semaphore-controlled version from sync context
+            boundary_stats = dict.fromkeys(ChunkingConfig.BOUNDARY_TIERS, 0)
+            chunks = run_semantic_chunking_with_semaphore(source, *options, boundary_stats)
+        
+            return _semantic_result(chunks, _image_dimensions(source), boundary_stats)
+        
+        except Exception as e:
+            return _handle_semantic_chunking_error(text_or_file_path, e)
+
+
+async def semantic_chunking_async(
+    text_or_file_path: Union[str, List[Image.Image]],
+    max_concurrent_calls: int = None,
+    yolo_batch_size: int = None,
+    ocr_mode: str = None,
+    boundary_mode: str = None,
+    boundary_cascade: bool = None,
+    context: Optional[RequestContext] = None,
+):
+    """
+    Async version of semantic_chunking for callers that already run an event loop.
+
+    semantic_chunking_with_semaphore is awaited on the caller's loop instead of a
+    loop of its own, and blocking work (text chunking, opening images, reading
+    page geometry) runs on worker threads, so other coroutines keep running.
+
+    Args and return value are the same as for semantic_chunking.
+    """
+    options = _resolve_semantic_options(
+        max_concurrent_calls, yolo_batch_size, ocr_mode, boundary_mode, boundary_cascade
+    )
+    logger.info(f"🚀 Using YOLO-based semantic segmentation with PARALLEL OpenAI calls (max {options[0]} concurrent)")
     
+    with use_request_context(context):
+        try:
+            if _is_text_input(text_or_file_path):
+                logger.info("Text input detected, applying reading order aware semantic chunking")
+                enhanced_chunks = await asyncio.to_thread(_enhanced_text_semantic_chunking, text_or_file_path)
+                return {
+                    'chunks': enhanced_chunks,
+                    'image_dimensions': []
+                }
+        
+            source = await asyncio.to_thread(_semantic_source, text_or_file_path)
+        
+            boundary_stats = dict.fromkeys(ChunkingConfig.BOUNDARY_TIERS, 0)
+            chunks = await semantic_chunking_with_semaphore(source, *options, boundary_stats)
+        
+            image_dimensions = await asyncio.to_thread(_image_dimensions, source)
+            return _semantic_result(chunks, image_dimensions, boundary_stats)
+        
+        except Exception as e:
+            return await asyncio.to_thread(_handle_semantic_chunking_error, text_or_file_path, e)
+
+
+def _resolve_semantic_options(
+    max_concurrent_calls: int = None,
+    yolo_batch_size: int = None,
+    ocr_mode: str = None,
+    boundary_mode: str = None,
+    boundary_cascade: bool = None,
+) -> Tuple[int, int, str, str, bool]:
+    """
+    Validate semantic chunking options and fill in the configured defaults.
+
+    Returns:
+        (max_concurrent_calls, yolo_batch_size, ocr_mode, boundary_mode, boundary_cascade)
+
+    Raises:
+        InvalidConfigurationError: When an option is invalid
+    """
     # Validate and set default max_concurrent_calls
     if max_concurrent_calls is None:
         max_concurrent_calls = ChunkingConfig.DEFAULT_MAX_CONCURRENT_CALLS
@@ -739,68 +1158,105 @@ def semantic_chunking(text_or_file_path: Union[str, List[Image.Image]], max_conc
         raise InvalidConfigurationError(
             f"max_concurrent_calls must be a positive integer, got {max_concurrent_calls}"
         )
-    
-    logger.info(f"🚀 Using YOLO-based semantic segmentation with PARALLEL OpenAI calls (max {max_concurrent_calls} concurrent)")
-    
-    try:
-        # For text-only input, use enhanced reading order aware processing
-        if isinstance(text_or_file_path, str) and not text_or_file_path.endswith(('.pdf', '.png', '.jpg', '.jpeg')):
-            logger.info("Text input detected, applying reading order aware semantic chunking")
-            enhanced_chunks = _enhanced_text_semantic_chunking(text_or_file_path)
-            return {
-                'chunks': enhanced_chunks,
-                'image_dimensions': []
-            }
-        
-        # Get image dimensions first if processing images/PDF
-        if isinstance(text_or_file_path, str):
-            images = pdf_to_images(text_or_file_path)
-        else:
-            images = text_or_file_path
-            
-        # Capture image dimensions
-        image_dimensions = []
-        for page_idx, image in enumerate(images):
-            width, height = image.size
-            image_dimensions.append({
-                'page_number': page_idx + 1,
-                'width': width,
-                'height': height
-            })
-        
-        # Run the async semaphore-controlled version from sync context
-        chunks = run_semantic_chunking_with_semaphore(text_or_file_path, max_concurrent_calls)
-        
-        # Return in the expected dictionary format
+
+    if yolo_batch_size is None:
+        yolo_batch_size = ChunkingConfig.DEFAULT_YOLO_BATCH_SIZE
+    elif not isinstance(yolo_batch_size, int) or yolo_batch_size <= 0:
+        raise InvalidConfigurationError(
+            f"yolo_batch_size must be a positive integer, got {yolo_batch_size}"
+        )
+
+    if ocr_mode is None:
+        ocr_mode = ChunkingConfig.DEFAULT_OCR_MODE
+    elif ocr_mode not in ChunkingConfig.OCR_MODES:
+        raise InvalidConfigurationError(
+            f"ocr_mode must be one of {ChunkingConfig.OCR_MODES}, got {ocr_mode}"
+        )
+
+    if boundary_mode is None:
+        boundary_mode = ChunkingConfig.DEFAULT_BOUNDARY_MODE
+    elif boundary_mode not in ChunkingConfig.BOUNDARY_MODES:
+        raise InvalidConfigurationError(
+            f"boundary_mode must be one of {ChunkingConfig.BOUNDARY_MODES}, got {boundary_mode}"
+        )
+
+    if boundary_cascade is None:
+        boundary_cascade = ChunkingConfig.DEFAULT_BOUNDARY_CASCADE
+
+    return max_concurrent_calls, yolo_batch_size, ocr_mode, boundary_mode, boundary_cascade
+
+
+def _is_text_input(text_or_file_path) -> bool:
+    return isinstance(text_or_file_path, str) and not text_or_file_path.endswith(('.pdf', '.png', '.jpg', '.jpeg'))
+
+
+def _semantic_source(text_or_file_path: Union[str, List[Image.Image]]) -> Union[PDFRaster, List[Image.Image]]:
+    """Turn a PDF path, image path or list of images into the source the pipeline consumes."""
+    # PDFs are rendered once, lazily, through a raster handle shared with the
+    # pipeline; page dimensions are read back from it after the run
+    if isinstance(text_or_file_path, str) and text_or_file_path.lower().endswith('.pdf'):
+        return PDFRaster(
+            text_or_file_path, dpi=ChunkingConfig.OCR_DPI, layout_dpi=ChunkingConfig.LAYOUT_DPI
+        )
+    elif isinstance(text_or_file_path, str):
+        return [Image.open(text_or_file_path).convert('RGB')]
+    return text_or_file_path
+
+
+def _image_dimensions(source: Union[PDFRaster, List[Image.Image]]) -> List[Dict[str, int]]:
+    """Page dimensions of a semantic chunking source, read after the run."""
+    if isinstance(source, PDFRaster):
+        return source.page_dimensions()
+    return [
+        {'page_number': page_idx + 1, 'width': image.size[0], 'height': image.size[1]}
+        for page_idx, image in enumerate(source)
+    ]
+
+
+def _semantic_result(chunks, image_dimensions, boundary_stats) -> Dict[str, Any]:
+    # Return in the expected dictionary format
+    return {
+        'chunks': chunks,
+        'image_dimensions': image_dimensions,
+        'boundary_stats': boundary_stats
+    }
+
+
+def _handle_semantic_chunking_error(text_or_file_path, error: Exception) -> Dict[str, Any]:
+    """Fall back to legacy chunking for text input; raise DocumentProcessingError for documents."""
+    logger.error(f"Error in parallel semantic chunking: {str(error)}")
+    # Fallback to text-based processing if it's a string
+    if _is_text_input(text_or_file_path):
+        logger.warning("Falling back to legacy semantic chunking")
+        record_extraction_failure(f"semantic chunking: {str(error)}")
+        legacy_chunks = _legacy_semantic_chunking(text_or_file_path)
         return {
-            'chunks': chunks,
-            'image_dimensions': image_dimensions
+            'chunks': legacy_chunks,
+            'image_dimensions': []
         }
-        
-    except Exception as e:
-        logger.error(f"Error in parallel semantic chunking: {str(e)}")
-        # Fallback to text-based processing if it's a string
-        if isinstance(text_or_file_path, str) and not text_or_file_path.endswith(('.pdf', '.png', '.jpg', '.jpeg')):
-            logger.warning("Falling back to legacy semantic chunking")
-            legacy_chunks = _legacy_semantic_chunking(text_or_file_path)
-            return {
-                'chunks': legacy_chunks,
-                'image_dimensions': []
-            }
-        else:
-            raise DocumentProcessingError(f"Failed to process document: {str(e)}") from e
+    raise DocumentProcessingError(f"Failed to process document: {str(error)}") from error
 
 def run_semantic_chunking_with_semaphore(
-    text_or_file_path: Union[str, List[Image.Image]], 
-    max_concurrent_calls: int = None
+    text_or_file_path: Union[str, List[Image.Image], PDFRaster], 
+    max_concurrent_calls: int = None,
+    yolo_batch_size: int = None,
+    ocr_mode: str = None,
+    boundary_mode: str = None,
+    boundary_cascade: bool = None,
+    boundary_stats: Dict[str, int] = None
 ):
     """
     Wrapper function to run semantic chunking with semaphore control.
     Handles event loop management and provides fallback mechanisms.
     
     Args:
-        text_or_file_path: File path or list of images to process
-        max_concurrent_calls: Maximum number of concurrent OpenAI API calls
+        text_or_file_path: File path, PDFRaster handle or list of images to process
+        max_concurrent_calls: Maximum number of pages extracted concurrently
+        yolo_batch_size: Number of pages per YOLO forward pass
+        ocr_mode: "region" or "page" OCR (see semantic_chunking)
+        boundary_mode: "pairwise" or "window" boundary detection (see semantic_chunking)
+        boundary_cascade: Run the local boundary tiers before the LLM (see semantic_chunking)
+        boundary_stats: Optional dictionary updated with per-tier boundary decision counts
         
     Returns:
         List of semantic chunks with metadata
@@ -820,10 +1276,15 @@ def run_semantic_chunking_with_semaphore(
             logger.warning("Event loop already running, using thread executor for async operations")
             
             # Use thread executor to run the async function
+            # The copied context carries the document's usage tracker into the thread
             with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
                 future = executor.submit(
+                    contextvars.copy_context().run,
                     asyncio.run, 
-                    semantic_chunking_with_semaphore(text_or_file_path, max_concurrent_calls)
+                    _semantic_chunking_on_own_loop(
+                        text_or_file_path, max_concurrent_calls, yolo_batch_size, ocr_mode,
+                        boundary_mode, boundary_cascade, boundary_stats
+                    )
                 )
                 result = future.result()
                 return result
@@ -831,23 +1292,48 @@ def run_semantic_chunking_with_semaphore(
         except RuntimeError:
             # No event loop running, we can create one
             logger.info(f"Creating new event loop for PARALLEL processing with {max_concurrent_calls} concurrent calls")
-            return asyncio.run(semantic_chunking_with_semaphore(text_or_file_path, max_concurrent_calls))
+            return asyncio.run(_semantic_chunking_on_own_loop(
+                text_or_file_path, max_concurrent_calls, yolo_batch_size, ocr_mode, boundary_mode,
+                boundary_cascade, boundary_stats
+            ))
             
     except Exception as e:
         logger.error(f"Error in semaphore-controlled semantic chunking: {e}")
         logger.warning("Falling back to synchronous semantic chunking")
         return semantic_chunking_legacy_fallback(text_or_file_path)
 
+async def _semantic_chunking_on_own_loop(*args):
+    """
+    Run semantic_chunking_with_semaphore on an event loop created for this call.
+
+    The shared async OpenAI clients bound to that loop are closed before the
+    loop goes away, so their connections are not left to the garbage collector.
+    """
+    try:
+        return await semantic_chunking_with_semaphore(*args)
+    finally:
+        await aclose_async_openai_clients()
+
 async def semantic_chunking_with_semaphore(
-    text_or_file_path: Union[str, List[Image.Image]], 
-    max_concurrent_calls: int = None
+    text_or_file_path: Union[str, List[Image.Image], PDFRaster], 
+    max_concurrent_calls: int = None,
+    yolo_batch_size: int = None,
+    ocr_mode: str = None,
+    boundary_mode: str = None,
+    boundary_cascade: bool = None,
+    boundary_stats: Dict[str, int] = None
 ):
     """
     Core async function for semantic chunking with semaphore-controlled concurrency.
     
     Args:
-        text_or_file_path: PDF file path or list of PIL Images
-        max_concurrent_calls: Maximum concurrent OpenAI API calls
+        text_or_file_path: PDF file path, PDFRaster handle or list of PIL Images
+        max_concurrent_calls: Maximum number of pages extracted concurrently
+        yolo_batch_size: Number of pages per YOLO forward pass
+        ocr_mode: "region" or "page" OCR (see semantic_chunking)
+        boundary_mode: "pairwise" or "window" boundary detection (see semantic_chunking)
+        boundary_cascade: Run the local boundary tiers before the LLM (see semantic_chunking)
+        boundary_stats: Optional dictionary updated with per-tier boundary decision counts
         
     Returns:
         List[Dict[str, Any]]: Semantic chunks with metadata
@@ -858,76 +1344,125 @@ async def semantic_chunking_with_semaphore(
     """
     if max_concurrent_calls is None:
         max_concurrent_calls = ChunkingConfig.DEFAULT_MAX_CONCURRENT_CALLS
+    if yolo_batch_size is None:
+        yolo_batch_size = ChunkingConfig.DEFAULT_YOLO_BATCH_SIZE
+    if ocr_mode is None:
+        ocr_mode = ChunkingConfig.DEFAULT_OCR_MODE
         
     start_time = time.time()
     logger.info(f"🔄 Starting SEMAPHORE-CONTROLLED semantic chunking with {max_concurrent_calls} concurrent calls")
     
-    client = None
+    page_tasks = []
+    task_pages = []
     try:
-        # Convert to images if needed
+        # The client's health check is a blocking HTTP request
+        if not await asyncio.to_thread(get_openai_client):
+            raise OpenAIServiceError("OpenAI client unavailable for semantic chunking")
+
+        # Stream pages so that only a bounded number of rendered pages is alive at once
         if isinstance(text_or_file_path, str):
-            images = pdf_to_images(text_or_file_path)
-            logger.info(f"Loaded {len(images)} pages from PDF")
+            text_or_file_path = PDFRaster(
+                text_or_file_path, dpi=ChunkingConfig.OCR_DPI, layout_dpi=ChunkingConfig.LAYOUT_DPI
+            )
+        raster = text_or_file_path if isinstance(text_or_file_path, PDFRaster) else None
+        # Opening the page store the first time creates its SQLite file
+        page_store = await asyncio.to_thread(get_page_store) if raster is not None else None
+        stored_pages = {}
+        if raster is not None:
+            # Page geometry is read from the PDF on first access
+            page_count = len(await run_in_cpu_stage(RENDER_STAGE, raster.page_dimensions))
+            pages_to_render = None
+            if page_store is not None:
+                # Unchanged pages of a revised PDF are served from the page store
+                page_settings = _page_store_settings(raster, ocr_mode)
+                fingerprints = await run_in_cpu_stage(RENDER_STAGE, raster.page_fingerprints)
+                stored_pages = await asyncio.to_thread(_lookup_stored_pages, page_store, fingerprints, page_settings)
+                pages_to_render = [page_idx for page_idx in range(page_count) if page_idx not in stored_pages]
+                logger.info(f"Reusing {len(stored_pages)} unchanged pages, processing {len(pages_to_render)} pages")
+            pages = raster.aiter_pages(
+                window_size=ChunkingConfig.RENDER_WINDOW_PAGES,
+                max_queued_pages=ChunkingConfig.MAX_QUEUED_PAGES,
+                pages=pages_to_render,
+            )
+            logger.info(f"Streaming {page_count} pages from PDF")
         else:
-            images = text_or_file_path
-            logger.info(f"Processing {len(images)} provided images")
+            page_count = len(text_or_file_path)
+            pages = _aiter_images(text_or_file_path)
+            logger.info(f"Processing {page_count} provided images")
 
-        if not images:
+        if page_count == 0:
             logger.warning("No images to process")
             return []
 
-        # Log dimensions for debugging
-        for i, image in enumerate(images, 1):
-            logger.debug(f"Page {i}: {image.width}x{image.height}")
-
-        client = get_openai_client()
-        if not client:
-            raise OpenAIServiceError("OpenAI client unavailable for semantic chunking")
-
-        # Process all pages in parallel with semaphore control
+        # Process all pages in parallel with semaphore control. The semaphore is
+        # acquired before a page is dispatched so rendering stalls while
+        # max_concurrent_calls pages are still being extracted.
         semaphore = asyncio.Semaphore(max_concurrent_calls)
         
-        async def process_single_page_with_semaphore(page_idx: int, image: Image.Image):
-            async with semaphore:
-                try:
-                    logger.info(f"Processing page {page_idx + 1}/{len(images)} with YOLO detection")
-                    
-                    # Run YOLO inference on the image
-                    yolo_results = run_yolo_inference([image])
-                    yolo_result = yolo_results[0] if yolo_results else []
-                    
-                    if not yolo_result:
-                        logger.info(f"Page {page_idx + 1}: No YOLO detections found")
-                        return []
-                    
+        async def process_single_page_with_semaphore(page_idx: int, image: Image.Image, yolo_result):
+            try:
+                failures = []
+                if not yolo_result:
+                    logger.info(f"Page {page_idx + 1}: No YOLO detections found")
+                    bbox_results = []
+                else:
                     logger.info(f"Page {page_idx + 1}: Found {len(yolo_result)} YOLO detections")
                     
-                    # Extract bbox results for semantic grouping
-                    bbox_results = await _extract_bbox_results_for_grouping_with_semaphore(
-                        image, yolo_result, page_idx + 1, max_concurrent_calls
-                    )
-                    
-                    return bbox_results
-                    
-                except Exception as e:
-                    logger.error(f"Error processing page {page_idx + 1}: {str(e)}")
-                    return []
-
-        # Execute all page processing tasks in parallel
-        logger.info(f"⚡ Processing {len(images)} pages in parallel with semaphore control")
-        page_tasks = [
-            process_single_page_with_semaphore(i, image) 
-            for i, image in enumerate(images)
-        ]
+                    # Extract bbox results for semantic grouping; stage timings go to this page
+                    with for_pages(page_idx + 1), track_extraction_failures() as failures:
+                        bbox_results = await _extract_bbox_results_for_grouping_with_semaphore(
+                            image, yolo_result, page_idx + 1, max_concurrent_calls, ocr_mode, raster
+                        )
+                
+                # Degraded pages are not stored so that a later run extracts them again
+                if page_store is not None:
+                    if failures:
+                        logger.info(f"Page {page_idx + 1}: Not stored, {len(failures)} region extraction(s) degraded")
+                    else:
+                        await asyncio.to_thread(
+                            page_store.put_page_results, fingerprints[page_idx], page_settings, bbox_results
+                        )
+                
+                return bbox_results
+                
+            except Exception as e:
+                logger.error(f"Error processing page {page_idx + 1}: {str(e)}")
+                return []
+            finally:
+                semaphore.release()
+
+        async def detect_and_dispatch(batch):
+            # One YOLO forward pass per batch on the detection pool, then each
+            # page's detections go to its own extraction task
+            logger.debug(f"Detecting layout of pages {batch[0][0] + 1}-{batch[-1][0] + 1} in a single pass")
+            with for_pages(*(page_idx + 1 for page_idx, _ in batch)):
+                yolo_results = await run_in_cpu_stage(
+                    DETECTION_STAGE, run_yolo_inference, [image for _, image in batch]
+                )
+            for (page_idx, image), yolo_result in zip(batch, yolo_results):
+                await semaphore.acquire()
+                task_pages.append(page_idx)
+                page_tasks.append(asyncio.ensure_future(
+                    process_single_page_with_semaphore(page_idx, image, yolo_result)
+                ))
+
+        logger.info(f"⚡ Processing {page_count} pages in parallel with semaphore control "
+                    f"(YOLO batch size {yolo_batch_size})")
+        async for batch in batch_pages(pages, yolo_batch_size):
+            await detect_and_dispatch(batch)
         
         page_results = await asyncio.gather(*page_tasks, return_exceptions=True)
         
-        all_bbox_results = []
-        for i, result in enumerate(page_results):
+        results_by_page = dict(stored_pages)
+        for page_idx, result in zip(task_pages, page_results):
             if isinstance(result, Exception):
-                logger.error(f"Page {i + 1} processing failed: {result}")
+                logger.error(f"Page {page_idx + 1} processing failed: {result}")
             else:
-                all_bbox_results.extend(result)
+                results_by_page[page_idx] = result
+        
+        all_bbox_results = []
+        for page_idx in sorted(results_by_page):
+            all_bbox_results.extend(results_by_page[page_idx])
         
         if not all_bbox_results:
             logger.warning(" No content extracted from any pages")
@@ -938,7 +1473,8 @@ async def semantic_chunking_with_semaphore(
         # Perform semantic grouping with semaphore control
         logger.info(f"Starting semaphore-controlled semantic grouping for {len(all_bbox_results)} elements")
         semantic_chunks = await _perform_openai_semantic_grouping_with_semaphore(
-            all_bbox_results, max_concurrent_calls=max_concurrent_calls
+            all_bbox_results, max_concurrent_calls=max_concurrent_calls, boundary_mode=boundary_mode,
+            boundary_cascade=boundary_cascade, boundary_stats=boundary_stats, page_store=page_store
         )
         
         elapsed_time = time.time() - start_time
@@ -952,45 +1488,178 @@ async def semantic_chunking_with_semaphore(
         return semantic_chunking_legacy_fallback(text_or_file_path)
     
     finally:
-        # Proper cleanup to prevent "Event loop is closed" errors
-        if client and hasattr(client, 'close'):
-            try:
-                await client.close()
-            except Exception:
-                pass  # Ignore cleanup errors
+        for task in page_tasks:
+            if not task.done():
+                task.cancel()
+
+
+def _lookup_stored_pages(
+    page_store: PageStore, fingerprints: List[str], settings: Dict[str, Any]
+) -> Dict[int, List[Dict[str, Any]]]:
+    """Return the stored bbox results of every page found in the page store, by 0-based page index."""
+    stored_pages = {}
+    for page_idx, fingerprint in enumerate(fingerprints):
+        stored = page_store.get_page_results(fingerprint, settings, page_idx + 1)
+        if stored is not None:
+            stored_pages[page_idx] = stored
+    return stored_pages
+
+
+def _lookup_boundary_decisions(
+    page_store: PageStore, bbox_results: List[Dict[str, Any]], settings: Dict[str, Any]
+) -> Dict[int, Dict[str, Any]]:
+    """Return the stored boundary decisions between adjacent elements, by gap index."""
+    decisions = {}
+    for i in range(len(bbox_results) - 1):
+        stored = page_store.get_boundary_decision(bbox_results[i], bbox_results[i + 1], settings)
+        if stored is not None:
+            decisions[i] = dict(stored, tier='reused')
+    return decisions
+
+
+def _store_boundary_decisions(
+    page_store: PageStore,
+    bbox_results: List[Dict[str, Any]],
+    settings: Dict[str, Any],
+    decisions: Dict[int, Dict[str, Any]],
+) -> None:
+    """Store the boundary decisions made in this run."""
+    for gap, decision in decisions.items():
+        # Heuristic fallbacks after a failed LLM call are not worth keeping
+        if _decision_tier(decision) not in ('reused', 'fallback'):
+            page_store.put_boundary_decision(
+                bbox_results[gap], bbox_results[gap + 1], settings,
+                {key: value for key, value in decision.items() if key != 'tier'}
+            )
+
+
+def _decision_tier(decision: Dict[str, Any]) -> str:
+    """Boundary tier that made a decision; untagged decisions came from the LLM or its fallback."""
+    if 'tier' in decision:
+        return decision['tier']
+    return 'fallback' if decision.get('fallback') else 'llm'
+
+
+def _page_store_settings(raster: PDFRaster, ocr_mode: str) -> Dict[str, Any]:
+    """Settings that shape a page's bbox results; stored pages are only reused when they match."""
+    return {
+        'layout_dpi': raster.layout_dpi,
+        'ocr_dpi': raster.dpi,
+        'ocr_mode': ocr_mode,
+        'ocr_backend': get_ocr_backend().name,
+        'model': ChunkingConfig.OPENAI_MODEL,
+    }
+
+
+async def _aiter_images(images: List[Image.Image]):
+    """Yield (page index, image) pairs for already-rendered pages."""
+    for page_idx, image in enumerate(images):
+        yield page_idx, image
+
+
+# Element classes whose content comes from OpenAI rather than OCR
+_LLM_EXTRACTED_CLASSES = {'Table', 'Picture', 'Formula'}
+
+# Element classes cropped from the layout render instead of a high-DPI re-render
+_LAYOUT_RESOLUTION_CLASSES = {'Picture'}
+
+
+def _plan_region_renders(boxes: List[List[int]], page_width: int, page_height: int) -> List[List[int]]:
+    """
+    Choose the page areas to re-render at OCR DPI so that every box is covered.
+
+    Boxes closer than ChunkingConfig.REGION_MERGE_GAP are merged into clusters.
+    When the clusters cover most of the page, or there are too many of them,
+    a single render of the whole page is cheaper than several partial renders.
+
+    Args:
+        boxes: Regions [x1, y1, x2, y2] in page pixels
+        page_width: Page width in pixels
+        page_height: Page height in pixels
+
+    Returns:
+        Boxes to render, each containing one or more of the input boxes
+    """
+    gap = ChunkingConfig.REGION_MERGE_GAP * page_height
+    clusters = []
+    for box in boxes:
+        cluster = [max(0, box[0]), max(0, box[1]), min(page_width, box[2]), min(page_height, box[3])]
+        # Absorb every cluster within the gap, repeating until nothing more overlaps
+        merged = True
+        while merged:
+            merged = False
+            for other in clusters:
+                if (other[0] - gap <= cluster[2] and cluster[0] - gap <= other[2]
+                        and other[1] - gap <= cluster[3] and cluster[1] - gap <= other[3]):
+                    clusters.remove(other)
+                    cluster = [min(cluster[0], other[0]), min(cluster[1], other[1]),
+                               max(cluster[2], other[2]), max(cluster[3], other[3])]
+                    merged = True
+                    break
+        clusters.append(cluster)
+
+    covered = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in clusters)
+    if (len(clusters) > ChunkingConfig.MAX_REGION_RENDERS
+            or covered > ChunkingConfig.REGION_RENDER_MAX_COVERAGE * page_width * page_height):
+        return [[0, 0, page_width, page_height]]
+    return sorted(clusters, key=lambda c: (c[1], c[0]))
+
+
+def _containing_box(box: List[int], candidates: List[List[int]]) -> int:
+    """Index of the candidate that contains box (the one overlapping it most)."""
+    def overlap(candidate):
+        width = min(box[2], candidate[2]) - max(box[0], candidate[0])
+        height = min(box[3], candidate[3]) - max(box[1], candidate[1])
+        return max(0, width) * max(0, height)
+    return max(range(len(candidates)), key=lambda idx: overlap(candidates[idx]))
+
 
 async def _extract_bbox_results_for_grouping_with_semaphore(
     image: Image.Image, 
     yolo_result, 
     page_number: int, 
-    max_concurrent_calls: int = 5
+    max_concurrent_calls: int = 5,
+    ocr_mode: str = None,
+    raster: PDFRaster = None
 ) -> List[Dict[str, Any]]:
     """
     Process YOLO detection results and extract bounding box results with content for semantic grouping.
-    Uses semaphore to control concurrent OpenAI API calls.
+    OpenAI calls are paced by the process-wide rate limiter (see utils/rate_limiter.py).
     
     Args:
         image: PIL Image of the page
         yolo_result: YOLO detection results
         page_number: Page number for logging
-        max_concurrent_calls: Maximum number of concurrent OpenAI calls
+        max_concurrent_calls: Unused; kept for compatibility
+        ocr_mode: "region" to OCR each crop separately, "page" to OCR the page once
+        raster: PDF raster handle the page came from. When the page was rendered at a
+               lower layout DPI, boxes are scaled to the raster's DPI and detail regions
+               are re-rendered from the PDF.
         
     Returns:
         List of bbox results with extracted content, sorted in reading order
     """
+    if ocr_mode is None:
+        ocr_mode = ChunkingConfig.DEFAULT_OCR_MODE
+
     if not yolo_result or not hasattr(yolo_result, 'boxes') or len(yolo_result.boxes) == 0:
         logger.warning(f"Page {page_number}: No YOLO detections found")
         return []
     
     image_np = np.array(image)
     img_height, img_width = image_np.shape[:2]
+
+    # Boxes are reported at the raster's DPI even when layout ran on a smaller render
+    scale = raster.layout_scale if raster is not None else 1.0
+    if scale != 1.0:
+        img_width, img_height = raster.page_size(page_number - 1)
     
     logger.info(f"Page {page_number}: Processing {len(yolo_result.boxes)} initial detections")
     
     # Extract detections with bbox coordinates and confidence
     detections = []
     for detection_index, (box, conf, cls) in enumerate(zip(yolo_result.boxes.xyxy, yolo_result.boxes.conf, yolo_result.boxes.cls)):
-        x1, y1, x2, y2 = [int(coord) for coord in box.tolist()]
+        x1, y1, x2, y2 = [int(coord * scale) for coord in box.tolist()]
         confidence = float(conf)
         class_id = int(cls)
         class_name = yolo_result.names[class_id]
@@ -1010,39 +1679,87 @@ async def _extract_bbox_results_for_grouping_with_semaphore(
         })
     
     # Sort detections in reading order
-    detections = improve_reading_order(detections, img_width, img_height)
+    with timed_stage("reading_order"):
+        detections = improve_reading_order(detections, img_width, img_height)
     
-    logger.info(f"Page {page_number}: Starting semaphore-controlled content extraction for {len(detections)} detections (max_concurrent: {max_concurrent_calls})")
+    # OpenAI calls for tables and pictures are paced by the process-wide rate limiter
+    logger.info(f"Page {page_number}: Starting content extraction for {len(detections)} detections")
+
+    # Images that text/table/formula crops are taken from, with their offsets in page
+    # pixels. With a low-DPI layout pass only clusters of those regions are re-rendered.
+    detail_renders = [(image_np, (0, 0))]
+    detail_render_of = {}
+    if scale != 1.0:
+        detail_indices = [i for i, d in enumerate(detections) if d['class'] not in _LAYOUT_RESOLUTION_CLASSES]
+        if detail_indices:
+            render_boxes = _plan_region_renders(
+                [detections[i]['bbox'] for i in detail_indices], img_width, img_height
+            )
+            try:
+                rendered = await asyncio.gather(*[
+                    run_in_cpu_stage(RENDER_STAGE, raster.render_region, page_number - 1, box)
+                    for box in render_boxes
+                ])
+                detail_renders = [(np.array(img), (box[0], box[1])) for img, box in zip(rendered, render_boxes)]
+                for i in detail_indices:
+                    detail_render_of[i] = _containing_box(detections[i]['bbox'], render_boxes)
+            except Exception as e:
+                logger.warning(f"Page {page_number}: Region re-render failed, upscaling layout render: {str(e)}")
+                record_extraction_failure(f"region re-render: {str(e)}")
+                detail_renders = [(np.array(image.resize((img_width, img_height))), (0, 0))]
+
+    def crop_detection(i: int, detection: dict) -> Image.Image:
+        x1, y1, x2, y2 = detection['bbox']
+        if scale != 1.0 and detection['class'] in _LAYOUT_RESOLUTION_CLASSES:
+            x1, y1, x2, y2 = [int(coord / scale) for coord in detection['bbox']]
+            return Image.fromarray(image_np[y1:y2, x1:x2])
+        detail_np, (offset_x, offset_y) = detail_renders[detail_render_of.get(i, 0)]
+        return Image.fromarray(detail_np[y1 - offset_y:y2 - offset_y, x1 - offset_x:x2 - offset_x])
+
+    # In page mode every OCR'd region is read from a single Tesseract pass per rendered image
+    page_ocr_texts = None
+    if ocr_mode == "page":
+        page_ocr_texts = {}
+        ocr_indices = [i for i, d in enumerate(detections) if d['class'] not in _LLM_EXTRACTED_CLASSES]
+        for render_idx, (detail_np, (offset_x, offset_y)) in enumerate(detail_renders):
+            render_indices = [i for i in ocr_indices if detail_render_of.get(i, 0) == render_idx]
+            if not render_indices:
+                continue
+            ocr_regions = [
+                [x1 - offset_x, y1 - offset_y, x2 - offset_x, y2 - offset_y]
+                for x1, y1, x2, y2 in (detections[i]['bbox'] for i in render_indices)
+            ]
+            region_texts = await run_in_cpu_stage(
+                OCR_STAGE, _extract_region_texts_with_page_ocr, Image.fromarray(detail_np), ocr_regions
+            )
+            page_ocr_texts.update((i, region_texts[region_idx]) for region_idx, i in enumerate(render_indices))
     
-    openai_semaphore = asyncio.Semaphore(max_concurrent_calls)
+    async def ocr_region(i: int, cropped_image: Image.Image) -> str:
+        if page_ocr_texts is not None:
+            return page_ocr_texts[i]
+        return await run_in_cpu_stage(OCR_STAGE, _extract_text_with_ocr, cropped_image)
     
     async def extract_content_for_detection_with_semaphore(i: int, detection: dict):
-        x1, y1, x2, y2 = detection['bbox']
         class_name = detection['class']
         confidence = detection['confidence']
         
         # Crop the region
-        cropped_region = image_np[y1:y2, x1:x2]
-        cropped_image = Image.fromarray(cropped_region)
+        cropped_image = crop_detection(i, detection)
         
-        # Extract content based on element type using semaphore for OpenAI calls
+        # Extract content based on element type
         if class_name in ['Text', 'List-item', 'Caption', 'Footnote', 'Title', 'Section-header', 'Page-header']:
-            content = _extract_text_with_ocr(cropped_image)
+            content = await ocr_region(i, cropped_image)
             content_type = 'heading' if class_name in ['Title', 'Section-header', 'Page-header'] else 'text'
         elif class_name == 'Table':
-            async with openai_semaphore:
-                logger.debug(f"Page {page_number}, Detection {i}: Acquiring semaphore for Table extraction")
+            with timed_stage("vision_llm", cpu=False):
                 content = await _extract_table_with_openai_async(cropped_image)
-                logger.debug(f"Page {page_number}, Detection {i}: Released semaphore for Table extraction")
             content_type = 'table'
         elif class_name in ['Picture', 'Formula']:
-            async with openai_semaphore:
-                logger.debug(f"Page {page_number}, Detection {i}: Acquiring semaphore for {class_name} extraction")
+            with timed_stage("vision_llm", cpu=False):
                 content = await _extract_image_with_openai_async(cropped_image, class_name)
-                logger.debug(f"Page {page_number}, Detection {i}: Released semaphore for {class_name} extraction")
             content_type = 'image' if class_name == 'Picture' else 'formula'
         else:
-            content = _extract_text_with_ocr(cropped_image)
+            content = await ocr_region(i, cropped_image)
             content_type = 'text'
         
         return {
@@ -1061,6 +1778,7 @@ async def _extract_bbox_results_for_grouping_with_semaphore(
     for result in extraction_results:
         if isinstance(result, Exception):
             logger.error(f"Page {page_number}: Content extraction failed: {result}")
+            record_extraction_failure(f"extraction: {result}")
             continue
             
         i = result['index']
@@ -1069,6 +1787,9 @@ async def _extract_bbox_results_for_grouping_with_semaphore(
         content_type = result['content_type']
         confidence = result['confidence']
         
+        if content and content.strip() == '[OCR failed]':
+            # OCR runs on the CPU stage pool, so its failures are recorded here
+            record_extraction_failure(f"{detection['class'].lower()}: OCR failed")
         if not content or content.strip() in ['[No text detected]', '[OCR failed]', '']:
             bbox_str = f"[{detection['bbox'][0]},{detection['bbox'][1]},{detection['bbox'][2]},{detection['bbox'][3]}]"
             logger.warning(f"Page {page_number}, ReadingOrder {i}: Skipping {detection['class']} at bbox {bbox_str} - no content extracted")
@@ -1106,6 +1827,7 @@ async def _extract_bbox_results_for_grouping_with_semaphore(
 
 def semantic_chunking_legacy_fallback(text_or_file_path: Union[str, List[Image.Image]]):
     """Legacy fallback that doesn't take max_concurrent_calls parameter"""
+    record_extraction_failure("semantic pipeline: legacy fallback")
     if isinstance(text_or_file_path, str) and not text_or_file_path.endswith(('.pdf', '.png', '.jpg', '.jpeg')):
         legacy_chunks = _legacy_semantic_chunking(text_or_file_path)
         return {
@@ -1121,7 +1843,11 @@ def semantic_chunking_legacy_fallback(text_or_file_path: Union[str, List[Image.I
 async def _perform_openai_semantic_grouping_with_semaphore(
     bbox_results: List[Dict[str, Any]], 
     confidence_threshold: float = DEFAULT_OPENAI_CONFIDENCE_THRESHOLD,
-    max_concurrent_calls: int = 5
+    max_concurrent_calls: int = 5,
+    boundary_mode: str = None,
+    boundary_cascade: bool = None,
+    boundary_stats: Dict[str, int] = None,
+    page_store: PageStore = None
 ) -> List[Dict[str, Any]]:
     """
     SEMAPHORE-CONTROLLED OpenAI semantic boundary detection with parallel processing.
@@ -1129,111 +1855,137 @@ async def _perform_openai_semantic_grouping_with_semaphore(
     Args:
         bbox_results: List of content parts with text and metadata
         confidence_threshold: OpenAI confidence threshold for boundary decisions
-        max_concurrent_calls: Maximum concurrent OpenAI API calls
+        max_concurrent_calls: Unused; OpenAI calls are paced by the process-wide
+                             rate limiter (see utils/rate_limiter.py)
+        boundary_mode: "pairwise" (one call per adjacent pair) or "window" (one call
+                      per window of consecutive elements)
+        boundary_cascade: Settle clear boundaries locally (structural rules, then
+                         lexical similarity) and only send the rest to the LLM
+        boundary_stats: Optional dictionary updated with the number of decisions
+                       made by each tier ('structural', 'lexical', 'llm', 'reused', 'fallback')
+        page_store: Optional store of earlier boundary decisions; gaps between
+                   elements seen before are reused and new decisions are stored
         
     Returns:
         List of semantic chunks with grouped content
     """
-    logger.info(f"Starting semaphore-controlled semantic grouping with max {max_concurrent_calls} concurrent calls")
+    logger.info("Starting semantic grouping")
     
     if not bbox_results:
         logger.warning(" No bbox results provided for semantic grouping")
         return []
+
+    if boundary_mode is None:
+        boundary_mode = ChunkingConfig.DEFAULT_BOUNDARY_MODE
+    if boundary_cascade is None:
+        boundary_cascade = ChunkingConfig.DEFAULT_BOUNDARY_CASCADE
     
-    client = None
     try:
-        boundary_detector = OpenAISemanticBoundaryDetector(confidence_threshold=confidence_threshold)
+        # Getting the client may run its blocking health check
+        boundary_detector = await asyncio.to_thread(
+            OpenAISemanticBoundaryDetector, confidence_threshold=confidence_threshold
+        )
         
-        client = get_openai_client()
+        boundary_tasks = []
+
+        async def detect_boundaries_for_window(start: int):
+            window = bbox_results[start:start + ChunkingConfig.BOUNDARY_WINDOW_SIZE]
+            decisions = await boundary_detector.detect_boundaries_window_async(window)
+            return start, len(window), decisions
         
-        semaphore = asyncio.Semaphore(max_concurrent_calls)
+        async def detect_boundary_for_pair(i: int, current_result: dict, next_result: dict):
+            try:
+                current_text = current_result.get('content', '')
+                next_text = next_result.get('content', '')
+                next_metadata = next_result.get('metadata', {})
+                
+                boundary_result = await boundary_detector.detect_boundary_async(
+                    current_text, next_text, next_metadata
+                )
+                
+                return i, boundary_result
+            except Exception as e:
+                logger.error(f" Boundary detection failed for pair {i}: {str(e)}")
+                record_extraction_failure(f"boundary: {str(e)}")
+                return i, {
+                    'should_split': False, 'confidence': 0.0, 'reasoning': f'Error: {str(e)}', 'fallback': True
+                }
         
-        boundary_tasks = []
+        # Decisions between elements seen in an earlier run are reused, so only
+        # gaps around changed content are decided again
+        boundary_decisions = {}
+        boundary_settings = {
+            'mode': boundary_mode,
+            'cascade': bool(boundary_cascade),
+            'threshold': boundary_detector.confidence_threshold,
+            'model': ChunkingConfig.OPENAI_MODEL,
+        }
+        if page_store is not None:
+            boundary_decisions = await asyncio.to_thread(
+                _lookup_boundary_decisions, page_store, bbox_results, boundary_settings
+            )
         
-        async def detect_boundary_for_pair_with_semaphore(i: int, current_result: dict, next_result: dict):
-            async with semaphore:
-                try:
-                    current_text = current_result.get('content', '')
-                    next_text = next_result.get('content', '')
-                    next_metadata = next_result.get('metadata', {})
-                    
-                    boundary_result = await boundary_detector.detect_boundary_async(
-                        current_text, next_text, next_metadata
-                    )
-                    
-                    return i, boundary_result
-                except Exception as e:
-                    logger.error(f" Boundary detection failed for pair {i}: {str(e)}")
-                    return i, {'should_split': False, 'confidence': 0.0, 'reasoning': f'Error: {str(e)}'}
-        
-        # Create boundary detection tasks for adjacent pairs
-        for i in range(len(bbox_results) - 1):
-            current_result = bbox_results[i]
-            next_result = bbox_results[i + 1]
-            
-            task = detect_boundary_for_pair_with_semaphore(i, current_result, next_result)
-            boundary_tasks.append(task)
+        # Local cascade tiers settle the clear gaps; the rest are left for the LLM
+        if boundary_cascade:
+            with timed_stage("boundary_detection"):
+                for gap, decision in _local_boundary_decisions(bbox_results, boundary_detector).items():
+                    boundary_decisions.setdefault(gap, decision)
+        pending_gaps = [i for i in range(len(bbox_results) - 1) if i not in boundary_decisions]
+        
+        if boundary_mode == "window":
+            window_size = ChunkingConfig.BOUNDARY_WINDOW_SIZE
+            window_starts = [
+                start for start in _plan_boundary_windows(
+                    len(bbox_results), window_size, ChunkingConfig.BOUNDARY_WINDOW_OVERLAP
+                )
+                if any(start <= gap < start + window_size - 1 for gap in pending_gaps)
+            ]
+            logger.info(f"Executing {len(window_starts)} windowed boundary detection tasks for {len(pending_gaps)} gaps")
+            with timed_stage("boundary_detection", cpu=False):
+                window_decisions = await asyncio.gather(
+                    *(detect_boundaries_for_window(start) for start in window_starts)
+                )
+            llm_decisions = _reconcile_window_decisions(window_decisions)
+            boundary_decisions.update({gap: llm_decisions[gap] for gap in pending_gaps if gap in llm_decisions})
+        else:
+            # Create boundary detection tasks for adjacent pairs
+            for i in pending_gaps:
+                current_result = bbox_results[i]
+                next_result = bbox_results[i + 1]
+                
+                task = detect_boundary_for_pair(i, current_result, next_result)
+                boundary_tasks.append(task)
         
-        if boundary_tasks:
-            logger.info(f"Executing {len(boundary_tasks)} boundary detection tasks with semaphore control")
+            if boundary_tasks:
+                logger.info(f"Executing {len(boundary_tasks)} boundary detection tasks")
             
-            # Execute all boundary detection tasks in parallel
-            boundary_results = await asyncio.gather(*boundary_tasks, return_exceptions=True)
+                # Execute all boundary detection tasks in parallel
+                with timed_stage("boundary_detection", cpu=False):
+                    boundary_results = await asyncio.gather(*boundary_tasks, return_exceptions=True)
             
-            # Process boundary results
-            boundary_decisions = {}
-            for result in boundary_results:
-                if isinstance(result, Exception):
-                    logger.error(f"Boundary detection task failed: {result}")
-                    continue
+                # Process boundary results
+                for result in boundary_results:
+                    if isinstance(result, Exception):
+                        logger.error(f"Boundary detection task failed: {result}")
+                        continue
                     
-                pair_index, decision = result
-                boundary_decisions[pair_index] = decision
-        else:
-            boundary_decisions = {}
-        
-        semantic_chunks = []
-        current_group = []
-        group_index = 0
+                    pair_index, decision = result
+                    boundary_decisions[pair_index] = decision
+        
+        tier_counts = dict.fromkeys(ChunkingConfig.BOUNDARY_TIERS, 0)
+        for gap, decision in boundary_decisions.items():
+            tier_counts[_decision_tier(decision)] += 1
+        if page_store is not None:
+            await asyncio.to_thread(
+                _store_boundary_decisions, page_store, bbox_results, boundary_settings, boundary_decisions
+            )
+        logger.info(f"Boundary decisions by tier: {tier_counts}")
+        if boundary_stats is not None:
+            for tier, count in tier_counts.items():
+                boundary_stats[tier] = boundary_stats.get(tier, 0) + count
         
-        for i, bbox_result in enumerate(bbox_results):
-            current_group.append(bbox_result)
-            
-            should_split = False
-            split_confidence = 0.0
-            
-            if i < len(bbox_results) - 1:
-                boundary_decision = boundary_decisions.get(i, {})
-                should_split = boundary_decision.get('should_split', False)
-                split_confidence = boundary_decision.get('confidence', 0.0)
-            else:
-                should_split = True
-                split_confidence = 1.0
-            
-            if should_split:
-                if current_group:
-                    group_dict = {
-                        'content_parts': [result['content'] for result in current_group],
-                        'metadata_parts': [result['metadata'] for result in current_group],
-                        'start_page': current_group[0]['metadata']['page_number'],
-                        'start_reading_order': current_group[0]['metadata']['reading_order_index'],
-                        'boundary_decisions': []
-                    }
-                    chunk = _create_semantic_chunk_from_group(group_dict, group_index, split_confidence)
-                    semantic_chunks.append(chunk)
-                    group_index += 1
-                    current_group = []
-        
-        if current_group:
-            group_dict = {
-                'content_parts': [result['content'] for result in current_group],
-                'metadata_parts': [result['metadata'] for result in current_group],
-                'start_page': current_group[0]['metadata']['page_number'],
-                'start_reading_order': current_group[0]['metadata']['reading_order_index'],
-                'boundary_decisions': []
-            }
-            chunk = _create_semantic_chunk_from_group(group_dict, group_index, 1.0)
-            semantic_chunks.append(chunk)
+        with timed_stage("grouping"):
+            semantic_chunks = _group_by_boundary_decisions(bbox_results, boundary_decisions)
         
         logger.info(f"semantic grouping completed")
         logger.info(f"boundary decisions: {len(boundary_decisions)}")
@@ -1245,15 +1997,57 @@ async def _perform_openai_semantic_grouping_with_semaphore(
         logger.error(f" Error in semaphore-controlled semantic grouping: {str(e)}")
         # Fallback to heuristic grouping
         logger.warning("Falling back to heuristic grouping")
+        record_extraction_failure(f"grouping: {str(e)}")
         return _fallback_heuristic_grouping(bbox_results)
+
+def _group_by_boundary_decisions(
+    bbox_results: List[Dict[str, Any]], boundary_decisions: Dict[int, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Cut the elements into semantic chunks at the gaps whose decision is to split."""
+    semantic_chunks = []
+    current_group = []
+    group_index = 0
+        
+    for i, bbox_result in enumerate(bbox_results):
+        current_group.append(bbox_result)
+            
+        should_split = False
+        split_confidence = 0.0
+            
+        if i < len(bbox_results) - 1:
+            boundary_decision = boundary_decisions.get(i, {})
+            should_split = boundary_decision.get('should_split', False)
+            split_confidence = boundary_decision.get('confidence', 0.0)
+        else:
+            should_split = True
+            split_confidence = 1.0
+            
+        if should_split:
+            if current_group:
+                group_dict = {
+                    'content_parts': [result['content'] for result in current_group],
+                    'metadata_parts': [result['metadata'] for result in current_group],
+                    'start_page': current_group[0]['metadata']['page_number'],
+                    'start_reading_order': current_group[0]['metadata']['reading_order_index'],
+                    'boundary_decisions': []
+                }
+                chunk = _create_semantic_chunk_from_group(group_dict, group_index, split_confidence)
+                semantic_chunks.append(chunk)
+                group_index += 1
+                current_group = []
+        
+    if current_group:
+        group_dict = {
+            'content_parts': [result['content'] for result in current_group],
+            'metadata_parts': [result['metadata'] for result in current_group],
+            'start_page': current_group[0]['metadata']['page_number'],
+            'start_reading_order': current_group[0]['metadata']['reading_order_index'],
+            'boundary_decisions': []
+        }
+        chunk = _create_semantic_chunk_from_group(group_dict, group_index, 1.0)
+        semantic_chunks.append(chunk)
     
-    finally:
-        # Proper cleanup to prevent "Event loop is closed" errors
-        if client and hasattr(client, 'close'):
-            try:
-                await client.close()
-            except Exception:
-                pass  # Ignore cleanup errors
+    return semantic_chunks
 
 def improve_reading_order(detections: List[Dict[str, Any]], image_width: int, image_height: int) -> List[Dict[str, Any]]:
     """
@@ -1532,7 +2326,8 @@ def _enhanced_text_semantic_chunking(text: str) -> List[Dict[str, Any]]:
     current_chunk = {
         'content': [],
         'start_idx': 0,
-        'metadata': []
+        'metadata': [],
+        'element_types': []
     }
 
     for i, segment in enumerate(reading_order_segments):
@@ -1555,8 +2350,8 @@ def _enhanced_text_semantic_chunking(text: str) -> List[Dict[str, Any]]:
                 'reading_order_start': current_chunk['start_idx'],
                 'reading_order_end': i - 1,
                 'element_count': len(current_chunk['content']),
-                'primary_element_type': max(set(m['element_type'] for m in current_chunk['metadata']),
-                                          key=lambda x: sum(1 for meta in current_chunk['metadata'] if meta['element_type'] == x)) if current_chunk['metadata'] else 'text'
+                'primary_element_type': max(set(current_chunk['element_types']),
+                                            key=current_chunk['element_types'].count) if current_chunk['element_types'] else 'text'
             }
 
             chunks.append({
@@ -1568,11 +2363,13 @@ def _enhanced_text_semantic_chunking(text: str) -> List[Dict[str, Any]]:
             current_chunk = {
                 'content': [content],
                 'start_idx': i,
-                'metadata': [metadata]
+                'metadata': [metadata],
+                'element_types': [segment['element_type']]
             }
         else:
             current_chunk['content'].append(content)
             current_chunk['metadata'].append(metadata)
+            current_chunk['element_types'].append(segment['element_type'])
 
     # Add final chunk
     if current_chunk['content']:
@@ -1584,8 +2381,8 @@ def _enhanced_text_semantic_chunking(text: str) -> List[Dict[str, Any]]:
             'reading_order_start': current_chunk['start_idx'],
             'reading_order_end': len(reading_order_segments) - 1,
             'element_count': len(current_chunk['content']),
-            'primary_element_type': max(set(m['element_type'] for m in current_chunk['metadata']),
-                                      key=lambda x: sum(1 for meta in current_chunk['metadata'] if meta['element_type'] == x)) if current_chunk['metadata'] else 'text'
+            'primary_element_type': max(set(current_chunk['element_types']),
+                                        key=current_chunk['element_types'].count) if current_chunk['element_types'] else 'text'
         }
 
         chunks.append({
@@ -0,0 +1,139 @@
+"""
+CPU Stage Executors
+
+Process-wide thread pools for the CPU-bound stages of the semantic pipeline
+(YOLO layout detection, OCR and high-resolution region rendering). Coroutines
+hand blocking work to these pools so the event loop keeps driving in-flight
+OpenAI requests while pages are being detected and OCR'd.
+
+Each stage has its own bounded pool so a burst of OCR work cannot starve
+detection and vice versa. Pools are created lazily and shared by every
+document processed in the process.
+
+Work run on a pool is timed on the worker thread and reported to the stage
+timings of the calling document (see utils/metrics.py).
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from Unsiloed.parse_config import DEFAULT_DETECTION_WORKERS, DEFAULT_OCR_WORKERS, DEFAULT_RENDER_WORKERS
+from Unsiloed.utils.metrics import record_stage_time
+
+logger = logging.getLogger(__name__)
+
+DETECTION_STAGE = "detection"
+OCR_STAGE = "ocr"
+RENDER_STAGE = "render"
+
+
+def _check_workers(stage: str, max_workers: int) -> int:
+    if not isinstance(max_workers, int) or max_workers <= 0:
+        raise ValueError(f"max_workers must be a positive integer, got {max_workers}")
+    # The YOLO model is not safe to drive from several threads at once
+    if stage == DETECTION_STAGE and max_workers > 1:
+        raise ValueError(f"The '{DETECTION_STAGE}' stage supports a single worker, got {max_workers}")
+    return max_workers
+
+
+# Defaults come from UNSILOED_DETECTION_WORKERS, UNSILOED_OCR_WORKERS and
+# UNSILOED_RENDER_WORKERS (see parse_config.py)
+_stage_workers: Dict[str, int] = {
+    DETECTION_STAGE: _check_workers(DETECTION_STAGE, DEFAULT_DETECTION_WORKERS),
+    OCR_STAGE: _check_workers(OCR_STAGE, DEFAULT_OCR_WORKERS),
+    RENDER_STAGE: _check_workers(RENDER_STAGE, DEFAULT_RENDER_WORKERS),
+}
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+# Names the pools' work is reported under in the stage timings
+STAGE_TIMING_NAMES = {
+    DETECTION_STAGE: "yolo",
+    OCR_STAGE: "ocr",
+    RENDER_STAGE: "rasterization",
+}
+_lock = threading.Lock()
+
+
+def configure_cpu_stage(stage: str, max_workers: int) -> None:
+    """
+    Set the number of worker threads for a CPU stage.
+
+    An existing pool for the stage is shut down (after finishing its queued
+    work) and replaced on next use.
+
+    Args:
+        stage: Stage name (e.g. "detection", "ocr")
+        max_workers: Maximum number of worker threads for the stage. The
+            detection stage only supports one, since the YOLO model is driven
+            from a single thread
+
+    Raises:
+        ValueError: If max_workers is not a positive integer, or above 1 for
+            the detection stage
+    """
+    _check_workers(stage, max_workers)
+
+    with _lock:
+        _stage_workers[stage] = max_workers
+        executor = _executors.pop(stage, None)
+
+    if executor is not None:
+        executor.shutdown(wait=False)
+    logger.info(f"CPU stage '{stage}' configured with {max_workers} workers")
+
+
+def get_cpu_executor(stage: str) -> ThreadPoolExecutor:
+    """Return the shared executor for a CPU stage, creating it on first use."""
+    with _lock:
+        executor = _executors.get(stage)
+        if executor is None:
+            max_workers = _stage_workers.get(stage, DEFAULT_OCR_WORKERS)
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"unsiloed-{stage}"
+            )
+            _executors[stage] = executor
+            logger.debug(f"Created '{stage}' executor with {max_workers} workers")
+        return executor
+
+
+async def run_in_cpu_stage(stage: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function on a CPU stage's pool and await its result.
+
+    Args:
+        stage: Stage name selecting the pool
+        func: Blocking callable
+        *args, **kwargs: Arguments for func
+
+    Returns:
+        The return value of func
+    """
+    loop = asyncio.get_running_loop()
+    result, wall_seconds, cpu_seconds = await loop.run_in_executor(
+        get_cpu_executor(stage), _timed_call, functools.partial(func, *args, **kwargs)
+    )
+    record_stage_time(STAGE_TIMING_NAMES.get(stage, stage), wall_seconds, cpu_seconds)
+    return result
+
+
+def _timed_call(func: Callable[[], Any]) -> Tuple[Any, float, float]:
+    # Runs on the worker thread, so thread_time() is the CPU time of this call alone
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    result = func()
+    return result, time.perf_counter() - wall_start, time.thread_time() - cpu_start
+
+
+def shutdown_cpu_executors(wait: bool = True) -> None:
+    """Shut down all CPU stage pools. They are recreated on next use."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -1,43 +1,204 @@
 import os
 import io
+import asyncio
 import base64
 import logging
-import pytesseract
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 from PIL import Image
-from openai import AsyncOpenAI
+from Unsiloed.utils.executors import OCR_STAGE, run_in_cpu_stage
+from Unsiloed.utils.ocr_backends import get_ocr_backend
+from Unsiloed.utils.openai import complete_chat_async, get_async_openai_client
 
 logger = logging.getLogger(__name__)
 
-def _extract_text_with_ocr(image: Image.Image) -> str:
-    """Extract text using Tesseract OCR."""
+# Extraction failures of the current page (see track_extraction_failures)
+_extraction_failures: ContextVar[Optional[List[str]]] = ContextVar("unsiloed_extraction_failures", default=None)
+
+
+@contextmanager
+def track_extraction_failures() -> Iterator[List[str]]:
+    """
+    Collect the extractions that fell back or failed within the block.
+
+    Used to keep degraded content (a failed picture description, OCR text
+    instead of a table, a dropped region, a heuristic fallback after an OpenAI
+    error) out of the page store and the result cache. Failures on CPU stage
+    threads are not seen here; callers record those themselves from the
+    returned content. Failures of a nested block are passed on to the
+    enclosing one when it ends.
+
+    Yields:
+        List that receives a short description of every failure
+    """
+    outer = _extraction_failures.get()
+    failures = []
+    token = _extraction_failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _extraction_failures.reset(token)
+        if outer is not None:
+            outer.extend(failures)
+
+
+def record_extraction_failure(description: str) -> None:
+    """Report a failed or degraded region extraction to the active tracker, if any."""
+    failures = _extraction_failures.get()
+    if failures is not None:
+        failures.append(description)
+
+
+def _extract_text_with_ocr(image: Image.Image, backend: str = None) -> str:
+    """Extract text using the configured OCR backend (Tesseract by default)."""
     try:
-        text = pytesseract.image_to_string(image, lang='eng').strip()
+        text = get_ocr_backend(backend).image_to_string(image).strip()
         return text if text else "[No text detected]"
     except Exception as e:
         logger.error(f"OCR extraction failed: {str(e)}")
         return "[OCR failed]"
 
 
+# Cell size (in pixels) of the uniform grid used to look up regions by word position
+OCR_REGION_GRID_CELL = 128
+
+
+def _extract_words_with_ocr(image: Image.Image, backend: str = None) -> List[Dict[str, Any]]:
+    """
+    Run OCR once over a whole page and return word-level boxes.
+
+    Returns:
+        List of words with 'text', 'bbox' ([x1, y1, x2, y2] in page pixels),
+        'conf' and Tesseract's 'block_num', 'par_num', 'line_num', 'word_num'
+    """
+    return get_ocr_backend(backend).image_to_words(image)
+
+
+def _build_region_grid(regions: Sequence[Sequence[int]], cell: int = OCR_REGION_GRID_CELL) -> Dict[tuple, List[int]]:
+    """Index region boxes by the grid cells they cover."""
+    grid = defaultdict(list)
+    for region_idx, (x1, y1, x2, y2) in enumerate(regions):
+        for gx in range(int(x1) // cell, int(x2) // cell + 1):
+            for gy in range(int(y1) // cell, int(y2) // cell + 1):
+                grid[(gx, gy)].append(region_idx)
+    return grid
+
+
+def _assign_words_to_regions(
+    words: List[Dict[str, Any]],
+    regions: Sequence[Sequence[int]],
+    cell: int = OCR_REGION_GRID_CELL,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Assign each OCR word to the region containing its center.
+
+    Candidate regions are looked up through a uniform grid index, so the cost
+    is proportional to the number of words rather than words x regions. When
+    regions overlap, the smallest containing region wins.
+
+    Args:
+        words: Words from _extract_words_with_ocr
+        regions: Region boxes [x1, y1, x2, y2] in the same pixel space as the words
+        cell: Grid cell size in pixels
+
+    Returns:
+        Mapping of region index to the words assigned to it
+    """
+    grid = _build_region_grid(regions, cell)
+    assigned = defaultdict(list)
+
+    for word in words:
+        wx1, wy1, wx2, wy2 = word['bbox']
+        cx, cy = (wx1 + wx2) / 2, (wy1 + wy2) / 2
+
+        best_idx, best_area = None, None
+        for region_idx in grid.get((int(cx) // cell, int(cy) // cell), []):
+            x1, y1, x2, y2 = regions[region_idx]
+            if x1 <= cx <= x2 and y1 <= cy <= y2:
+                area = (x2 - x1) * (y2 - y1)
+                if best_area is None or area < best_area:
+                    best_idx, best_area = region_idx, area
+
+        if best_idx is not None:
+            assigned[best_idx].append(word)
+
+    return assigned
+
+
+def _words_to_text(words: List[Dict[str, Any]]) -> str:
+    """Rebuild text from words: lines top to bottom, words left to right."""
+    lines = defaultdict(list)
+    for word in words:
+        lines[(word['block_num'], word['par_num'], word['line_num'])].append(word)
+
+    ordered_lines = sorted(
+        lines.values(),
+        key=lambda line: (min(w['bbox'][1] for w in line), min(w['bbox'][0] for w in line)),
+    )
+    return '\n'.join(
+        ' '.join(w['text'] for w in sorted(line, key=lambda w: w['bbox'][0]))
+        for line in ordered_lines
+    )
+
+
+def _extract_region_texts_with_page_ocr(
+    image: Image.Image,
+    regions: Sequence[Sequence[int]],
+    backend: str = None,
+) -> Dict[int, str]:
+    """
+    Extract text for several regions of a page with a single Tesseract call.
+
+    Args:
+        image: Full page image
+        regions: Region boxes [x1, y1, x2, y2] in page pixels
+        backend: OCR backend name, defaults to the configured backend
+
+    Returns:
+        Mapping of region index to its text ("[No text detected]" when empty,
+        "[OCR failed]" for every region if Tesseract fails)
+    """
+    if not regions:
+        return {}
+
+    try:
+        words = _extract_words_with_ocr(image, backend)
+    except Exception as e:
+        logger.error(f"Page-level OCR extraction failed: {str(e)}")
+        return {region_idx: "[OCR failed]" for region_idx in range(len(regions))}
+
+    assigned = _assign_words_to_regions(words, regions)
+    return {
+        region_idx: (_words_to_text(assigned[region_idx]) if assigned.get(region_idx) else "[No text detected]")
+        for region_idx in range(len(regions))
+    }
+
+
+def _encode_image_base64(image: Image.Image) -> str:
+    """PNG-encode an image crop for a vision request."""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
 
 
 async def _extract_table_with_openai_async(image: Image.Image) -> str:
     """Async version of table extraction using OpenAI Vision API."""
     try:
-        # Create async OpenAI client
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
+        # Shared async OpenAI client for this event loop
+        async_client = get_async_openai_client()
+        if async_client is None:
             logger.warning("OpenAI client not available, falling back to OCR for table")
-            return _extract_text_with_ocr(image)
+            record_extraction_failure("table: OpenAI client not available")
+            return await run_in_cpu_stage(OCR_STAGE, _extract_text_with_ocr, image)
         
-        async_client = AsyncOpenAI(api_key=api_key, timeout=60.0, max_retries=2)
+        # Convert image to base64 off the event loop
+        image_base64 = await asyncio.to_thread(_encode_image_base64, image)
         
-        # Convert image to base64
-        buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        response = await async_client.chat.completions.create(
+        content = await complete_chat_async(
+            async_client,
+            purpose="table",
             model="gpt-4o",
             messages=[
                 {
@@ -64,33 +225,32 @@ async def _extract_table_with_openai_async(image: Image.Image) -> str:
             temperature=0.1
         )
         
-        return response.choices[0].message.content.strip()
+        return content.strip()
         
     except Exception as e:
         logger.error(f"Async OpenAI table extraction failed: {str(e)}")
-        return _extract_text_with_ocr(image)
+        record_extraction_failure(f"table: {str(e)}")
+        return await run_in_cpu_stage(OCR_STAGE, _extract_text_with_ocr, image)
 
 
 async def _extract_image_with_openai_async(image: Image.Image, element_type: str) -> str:
     """Async version of image description using OpenAI Vision API."""
     try:
-        # Create async OpenAI client
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
+        # Shared async OpenAI client for this event loop
+        async_client = get_async_openai_client()
+        if async_client is None:
             logger.warning("OpenAI client not available, using placeholder for image")
+            record_extraction_failure(f"{element_type.lower()}: OpenAI client not available")
             return f"[{element_type} - description not available]"
         
-        async_client = AsyncOpenAI(api_key=api_key, timeout=60.0, max_retries=2)
-        
-        # Convert image to base64
-        buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        # Convert image to base64 off the event loop
+        image_base64 = await asyncio.to_thread(_encode_image_base64, image)
         
         prompt = "Describe this image in detail, focusing on its content and context within a document." if element_type == "Picture" else "Analyze this mathematical formula or equation and describe what it represents."
         
-        response = await async_client.chat.completions.create(
+        content = await complete_chat_async(
+            async_client,
+            purpose=element_type.lower(),
             model="gpt-4o",
             messages=[
                 {
@@ -117,8 +277,9 @@ async def _extract_image_with_openai_async(image: Image.Image, element_type: str
             temperature=0.1
         )
         
-        return response.choices[0].message.content.strip()
+        return content.strip()
         
     except Exception as e:
         logger.error(f"Async OpenAI image extraction failed: {str(e)}")
+        record_extraction_failure(f"{element_type.lower()}: {str(e)}")
         return f"[{element_type} - description failed]"
@@ -1,10 +1,391 @@
+import asyncio
+import contextvars
+import hashlib
+import io
+import logging
+import math
+import queue
+import subprocess
+import threading
+import uuid
 from PIL import Image
-from typing import List
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
 import pdf2image
+import PyPDF2
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, PdfObject, StreamObject
+from Unsiloed.parse_config import (
+    DEFAULT_RENDER_DPI,
+    DEFAULT_LAYOUT_DPI,
+    DEFAULT_RENDER_WINDOW_PAGES,
+    DEFAULT_MAX_QUEUED_PAGES,
+)
+from Unsiloed.utils.metrics import timed_stage
 
+logger = logging.getLogger(__name__)
 
-def pdf_to_images(pdf_path: str) -> List[Image.Image]:
+# Marks the end of the page stream in the producer queue
+_END_OF_PAGES = object()
+
+
+def pdf_to_images(pdf_path: str, dpi: int = DEFAULT_RENDER_DPI) -> List[Image.Image]:
     """
     Convert a PDF to a list of images.
     """
-    return pdf2image.convert_from_path(pdf_path)
+    return pdf2image.convert_from_path(pdf_path, dpi=dpi)
+
+
+def get_pdf_page_count(pdf_path: str) -> int:
+    """
+    Return the number of pages in a PDF without rendering it.
+    """
+    with open(pdf_path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def pdf_page_fingerprints(pdf_path: str) -> List[str]:
+    """
+    Return a fingerprint per page that changes whenever the page's appearance can change.
+
+    The fingerprint hashes the page geometry and rotation, the page content
+    stream and everything its resources reach (fonts, images, forms, color
+    spaces), including resources inherited from the page tree, so it is
+    computed without rendering the page. Objects shared by several pages are
+    hashed once. A page whose streams cannot be decoded gets a fingerprint
+    that never matches, so it is always processed again.
+    """
+    fingerprints = []
+    digests = {}
+    with open(pdf_path, "rb") as file:
+        for page_idx, page in enumerate(PyPDF2.PdfReader(file).pages):
+            digest = hashlib.sha256()
+            digest.update(repr((list(page.mediabox), list(page.cropbox), page.get("/Rotate") or 0)).encode("utf-8"))
+            try:
+                contents = page.get_contents()
+                if contents is not None:
+                    digest.update(contents.get_data())
+                digest.update(_pdf_object_digest(_page_resources(page), digests))
+            except Exception as e:
+                logger.debug(f"Page {page_idx + 1}: Cannot fingerprint resources: {str(e)}")
+                fingerprints.append(uuid.uuid4().hex)
+                continue
+            fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def _page_resources(page: PyPDF2.PageObject) -> Optional[PdfObject]:
+    """The page's /Resources entry, or the nearest one inherited from the page tree."""
+    node = page
+    while node is not None:
+        resources = node.raw_get("/Resources") if "/Resources" in node else None
+        if resources is not None:
+            return resources
+        parent = node.raw_get("/Parent") if "/Parent" in node else None
+        node = parent.get_object() if parent is not None else None
+    return None
+
+
+def _pdf_object_digest(obj: Optional[PdfObject], digests: Dict[Tuple[int, int], bytes]) -> bytes:
+    """
+    SHA-256 of a PDF object and everything it references.
+
+    Digests of indirect objects are kept in digests by object number, so shared
+    fonts and images are hashed once per document. Back references to the page
+    tree (/Parent) are not followed.
+    """
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key not in digests:
+            # Placeholder for references back to an object still being hashed
+            digests[key] = b"cycle"
+            digests[key] = _pdf_object_digest(obj.get_object(), digests)
+        return digests[key]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for name in sorted(obj):
+            if name == "/Parent":
+                continue
+            digest.update(name.encode("utf-8"))
+            digest.update(_pdf_object_digest(obj.raw_get(name), digests))
+        if isinstance(obj, StreamObject):
+            digest.update(obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            digest.update(_pdf_object_digest(item, digests))
+    else:
+        digest.update(repr(obj).encode("utf-8"))
+    return digest.digest()
+
+
+def _page_windows(pages: Sequence[int], window_size: int) -> Iterator[Tuple[int, int]]:
+    """Group sorted 0-based page indices into (first, last) runs of at most window_size pages."""
+    start = previous = None
+    for page_idx in pages:
+        if start is not None and page_idx == previous + 1 and page_idx - start < window_size:
+            previous = page_idx
+            continue
+        if start is not None:
+            yield start, previous
+        start = previous = page_idx
+    if start is not None:
+        yield start, previous
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    window_size: int = DEFAULT_RENDER_WINDOW_PAGES,
+    dpi: int = DEFAULT_RENDER_DPI,
+    pages: Optional[Sequence[int]] = None,
+) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    Render a PDF lazily, a few pages at a time.
+
+    Only one window of pages (first_page..last_page) is rendered per
+    pdf2image call, so memory use is bounded by the window size rather
+    than the page count.
+
+    Args:
+        pdf_path: Path to the PDF file
+        window_size: Number of pages rendered per call
+        dpi: Rendering resolution
+        pages: 0-based indices of the pages to render. Defaults to every page.
+
+    Yields:
+        Tuples of (0-based page index, page image)
+    """
+    if not isinstance(window_size, int) or window_size <= 0:
+        raise ValueError(f"window_size must be a positive integer, got {window_size}")
+
+    if pages is None:
+        pages = range(get_pdf_page_count(pdf_path))
+    for first_idx, last_idx in _page_windows(sorted(pages), window_size):
+        with timed_stage("rasterization", pages=range(first_idx + 1, last_idx + 2)):
+            images = pdf2image.convert_from_path(
+                pdf_path, dpi=dpi, first_page=first_idx + 1, last_page=last_idx + 1
+            )
+        for offset, image in enumerate(images):
+            yield first_idx + offset, image
+
+
+async def aiter_pdf_pages(
+    pdf_path: str,
+    window_size: int = DEFAULT_RENDER_WINDOW_PAGES,
+    max_queued_pages: int = DEFAULT_MAX_QUEUED_PAGES,
+    dpi: int = DEFAULT_RENDER_DPI,
+    pages: Optional[Sequence[int]] = None,
+) -> AsyncIterator[Tuple[int, Image.Image]]:
+    """
+    Render a PDF on a background thread and stream its pages.
+
+    The producer thread renders windows of pages with iter_pdf_pages and
+    blocks once max_queued_pages rendered pages are waiting, so the number
+    of page images alive at once is capped by the queue depth.
+
+    Args:
+        pdf_path: Path to the PDF file
+        window_size: Number of pages rendered per pdf2image call
+        max_queued_pages: Maximum number of rendered pages waiting to be consumed
+        dpi: Rendering resolution
+        pages: 0-based indices of the pages to render. Defaults to every page.
+
+    Yields:
+        Tuples of (0-based page index, page image)
+    """
+    if not isinstance(max_queued_pages, int) or max_queued_pages <= 0:
+        raise ValueError(f"max_queued_pages must be a positive integer, got {max_queued_pages}")
+
+    rendered = queue.Queue(maxsize=max_queued_pages)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                rendered.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get():
+        while True:
+            try:
+                return rendered.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _END_OF_PAGES
+
+    def produce():
+        try:
+            for item in iter_pdf_pages(pdf_path, window_size, dpi, pages):
+                if not put(item):
+                    return
+        except Exception as e:
+            logger.error(f"Error rendering PDF {pdf_path}: {str(e)}")
+            put(e)
+        finally:
+            put(_END_OF_PAGES)
+
+    # The producer runs in a copy of the caller's context so its timings reach the document
+    producer = threading.Thread(
+        target=contextvars.copy_context().run, args=(produce,), name="unsiloed-rasterizer", daemon=True
+    )
+    producer.start()
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            item = await loop.run_in_executor(None, get)
+            if item is _END_OF_PAGES:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblock the producer if the consumer stopped early
+        stop.set()
+        while True:
+            try:
+                rendered.get_nowait()
+            except queue.Empty:
+                break
+
+
+def render_pdf_region(
+    pdf_path: str,
+    page_number: int,
+    box: Tuple[int, int, int, int],
+    dpi: int = DEFAULT_RENDER_DPI,
+    timeout: int = 120,
+) -> Image.Image:
+    """
+    Render only a rectangular region of one PDF page.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_number: 1-based page number
+        box: Region [x1, y1, x2, y2] in pixels at the given DPI
+        dpi: Rendering resolution
+        timeout: Seconds to wait for pdftoppm
+
+    Returns:
+        PIL Image of the region
+    """
+    x1, y1, x2, y2 = [int(v) for v in box]
+    command = [
+        "pdftoppm",
+        "-r", str(dpi),
+        "-f", str(page_number),
+        "-l", str(page_number),
+        "-x", str(x1),
+        "-y", str(y1),
+        "-W", str(max(1, x2 - x1)),
+        "-H", str(max(1, y2 - y1)),
+        "-singlefile",
+        pdf_path,
+    ]
+    completed = subprocess.run(command, capture_output=True, timeout=timeout, check=True)
+    return Image.open(io.BytesIO(completed.stdout)).convert("RGB")
+
+
+class PDFRaster:
+    """
+    Per-run rasterization handle for a PDF.
+
+    Created once per semantic chunking run and shared by every stage that
+    needs page images or page geometry, so the document is rendered exactly
+    once. Page geometry is known before rendering (from the PDF CropBoxes)
+    and is replaced by the actual pixel size once a page has been rendered.
+
+    Pages are streamed at layout_dpi for layout detection. When layout_dpi is
+    lower than dpi, callers re-render the regions they need in detail with
+    render_region; all page geometry is expressed at dpi.
+    """
+
+    def __init__(self, pdf_path: str, dpi: int = DEFAULT_RENDER_DPI, layout_dpi: int = None):
+        self.pdf_path = pdf_path
+        self.dpi = dpi
+        self.layout_dpi = layout_dpi or dpi
+        self._page_sizes_pt = None
+        self._rendered_sizes = {}
+
+    @property
+    def layout_scale(self) -> float:
+        """Factor converting layout-image pixels to pixels at dpi."""
+        return self.dpi / self.layout_dpi
+
+    def _load_page_sizes(self) -> List[Tuple[float, float]]:
+        if self._page_sizes_pt is None:
+            sizes = []
+            with open(self.pdf_path, "rb") as file:
+                for page in PyPDF2.PdfReader(file).pages:
+                    # pdftoppm renders the CropBox (which defaults to the MediaBox)
+                    width, height = float(page.cropbox.width), float(page.cropbox.height)
+                    if (page.get("/Rotate") or 0) % 180 == 90:
+                        width, height = height, width
+                    sizes.append((width, height))
+            self._page_sizes_pt = sizes
+        return self._page_sizes_pt
+
+    @property
+    def page_count(self) -> int:
+        return len(self._load_page_sizes())
+
+    def page_size(self, page_idx: int) -> Tuple[int, int]:
+        """
+        Return (width, height) in pixels of a page at the handle's DPI.
+        """
+        if page_idx in self._rendered_sizes:
+            return self._rendered_sizes[page_idx]
+        width_pt, height_pt = self._load_page_sizes()[page_idx]
+        scale = self.dpi / 72.0
+        # Rounded first so float error (792 * (150 / 72) = 1650.0000000000002) doesn't add a pixel
+        return math.ceil(round(width_pt * scale, 6)), math.ceil(round(height_pt * scale, 6))
+
+    def page_dimensions(self) -> List[Dict[str, int]]:
+        """
+        Return the dimensions of every page in the format used by semantic chunking results.
+        """
+        dimensions = []
+        for page_idx in range(self.page_count):
+            width, height = self.page_size(page_idx)
+            dimensions.append({"page_number": page_idx + 1, "width": width, "height": height})
+        return dimensions
+
+    def page_fingerprints(self) -> List[str]:
+        """
+        Return the per-page fingerprints of the PDF (see pdf_page_fingerprints).
+        """
+        return pdf_page_fingerprints(self.pdf_path)
+
+    async def aiter_pages(
+        self,
+        window_size: int = DEFAULT_RENDER_WINDOW_PAGES,
+        max_queued_pages: int = DEFAULT_MAX_QUEUED_PAGES,
+        pages: Optional[Sequence[int]] = None,
+    ) -> AsyncIterator[Tuple[int, Image.Image]]:
+        """
+        Stream pages rendered at layout_dpi (see aiter_pdf_pages).
+
+        Args:
+            window_size: Number of pages rendered per pdf2image call
+            max_queued_pages: Maximum number of rendered pages waiting to be consumed
+            pages: 0-based indices of the pages to render. Defaults to every page.
+        """
+        async for page_idx, image in aiter_pdf_pages(
+            self.pdf_path, window_size, max_queued_pages, self.layout_dpi, pages
+        ):
+            if self.layout_dpi == self.dpi:
+                self._rendered_sizes[page_idx] = image.size
+            yield page_idx, image
+
+    def render_region(self, page_idx: int, box: Tuple[int, int, int, int]) -> Image.Image:
+        """
+        Render a region of a page at dpi.
+
+        Args:
+            page_idx: 0-based page index
+            box: Region [x1, y1, x2, y2] in pixels at dpi
+        """
+        return render_pdf_region(self.pdf_path, page_idx + 1, box, self.dpi)
@@ -0,0 +1,149 @@
+"""
+Incremental Re-processing
+
+Per-page store for the semantic pipeline. Each PDF page is identified by a
+fingerprint of its content (see fileutils.pdf_page_fingerprints); the bbox
+results extracted for a page are stored under that fingerprint together with
+the settings that shaped them. When a revised document is processed again,
+unchanged pages are served from the store and only changed pages are rendered,
+detected, OCR'd and described.
+
+Boundary decisions between two elements are stored as well, keyed by the two
+elements' content, so grouping only asks the LLM again around changed pages.
+
+The store is disabled unless UNSILOED_PAGE_CACHE_PATH is set or
+configure_page_store() is called.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from Unsiloed.parse_config import PAGE_CACHE_PATH, PAGE_CACHE_MAX_BYTES
+from Unsiloed.utils.cache import PersistentCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored bbox result format changes
+PAGE_STORE_VERSION = 1
+
+
+def _element_identity(element: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = element.get('metadata', {})
+    return {
+        'content': element.get('content', ''),
+        'element_type': metadata.get('element_type'),
+        'content_type': metadata.get('content_type'),
+    }
+
+
+class PageStore:
+    """Stores per-page bbox results and pairwise boundary decisions in a PersistentCache."""
+
+    def __init__(self, cache: PersistentCache):
+        self.cache = cache
+
+    def _get_json(self, key: str) -> Any:
+        value = self.cache.get(key)
+        return json.loads(value.decode("utf-8")) if value is not None else None
+
+    def _set_json(self, key: str, value: Any) -> None:
+        self.cache.set(key, json.dumps(value, ensure_ascii=False))
+
+    @staticmethod
+    def _page_key(fingerprint: str, settings: Dict[str, Any]) -> str:
+        return make_cache_key({
+            'kind': 'page', 'version': PAGE_STORE_VERSION, 'fingerprint': fingerprint, 'settings': settings
+        })
+
+    def get_page_results(
+        self, fingerprint: str, settings: Dict[str, Any], page_number: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return stored bbox results for a page, renumbered to its current page number.
+
+        Args:
+            fingerprint: Page fingerprint
+            settings: Settings the results depend on (DPI, OCR mode, ...)
+            page_number: 1-based page number of the page in the current document
+
+        Returns:
+            List of bbox results, or None when the page has to be processed
+        """
+        results = self._get_json(self._page_key(fingerprint, settings))
+        if results is None:
+            return None
+        for result in results:
+            metadata = result['metadata']
+            metadata['page_number'] = page_number
+            metadata['reading_order'] = f"page_{page_number}_element_{metadata['reading_order_index']}"
+        return results
+
+    def put_page_results(
+        self, fingerprint: str, settings: Dict[str, Any], results: List[Dict[str, Any]]
+    ) -> None:
+        """Store the bbox results extracted for a page."""
+        self._set_json(self._page_key(fingerprint, settings), results)
+
+    @staticmethod
+    def _boundary_key(
+        current: Dict[str, Any], next_element: Dict[str, Any], settings: Dict[str, Any]
+    ) -> str:
+        return make_cache_key({
+            'kind': 'boundary',
+            'version': PAGE_STORE_VERSION,
+            'current': _element_identity(current),
+            'next': _element_identity(next_element),
+            'settings': settings,
+        })
+
+    def get_boundary_decision(
+        self, current: Dict[str, Any], next_element: Dict[str, Any], settings: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the stored boundary decision between two elements, or None."""
+        return self._get_json(self._boundary_key(current, next_element, settings))
+
+    def put_boundary_decision(
+        self,
+        current: Dict[str, Any],
+        next_element: Dict[str, Any],
+        settings: Dict[str, Any],
+        decision: Dict[str, Any],
+    ) -> None:
+        """Store the boundary decision between two elements."""
+        self._set_json(self._boundary_key(current, next_element, settings), decision)
+
+
+_page_store: Optional[PageStore] = None
+_page_store_configured = False
+_lock = threading.Lock()
+
+
+def configure_page_store(path: Optional[str] = None, max_bytes: int = PAGE_CACHE_MAX_BYTES) -> Optional[PageStore]:
+    """
+    Enable, reconfigure or disable the per-page store.
+
+    Args:
+        path: SQLite file for the store. None disables incremental re-processing.
+        max_bytes: Size budget before least-recently-used entries are evicted
+
+    Returns:
+        The active store, or None when disabled
+    """
+    global _page_store, _page_store_configured
+    with _lock:
+        if _page_store is not None:
+            _page_store.cache.close()
+        _page_store = PageStore(PersistentCache(path, max_bytes)) if path else None
+        _page_store_configured = True
+    if _page_store is not None:
+        logger.info(f"Incremental page store enabled at {path}")
+    return _page_store
+
+
+def get_page_store() -> Optional[PageStore]:
+    """Return the page store, opening it from UNSILOED_PAGE_CACHE_PATH on first use."""
+    if not _page_store_configured:
+        configure_page_store(PAGE_CACHE_PATH)
+    return _page_store
@@ -0,0 +1,78 @@
+"""
+Lexical Similarity
+
+Cheap bag-of-words similarity between document elements, used to settle clear
+semantic boundaries locally before asking the LLM.
+
+Texts are turned into hashed TF-IDF vectors (the hashing trick, so there is no
+vocabulary to build) and compared with cosine similarity. All vector work is
+done with numpy over the whole document at once.
+"""
+
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+DEFAULT_HASH_FEATURES = 2048
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]{2,}")
+
+# Function words shared by almost any two English passages
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does
+for from had has have he her his how if in into is it its may more most no not of
+on or our out over she should so some such than that the their them then there
+these they this those through to up was we were what when where which while who
+will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens of at least two characters, without stop words."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def hashed_tfidf_vectors(texts: List[str], n_features: int = DEFAULT_HASH_FEATURES) -> np.ndarray:
+    """
+    Build L2-normalized hashed TF-IDF vectors for a list of texts.
+
+    Args:
+        texts: Texts to vectorize
+        n_features: Number of hash buckets (vector dimension)
+
+    Returns:
+        Array of shape (len(texts), n_features); rows for texts without tokens are zero
+    """
+    counts = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        buckets = [zlib.crc32(token.encode("utf-8")) % n_features for token in tokenize(text)]
+        if buckets:
+            np.add.at(counts[row], buckets, 1.0)
+
+    # Sublinear term frequency and smoothed inverse document frequency
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + len(texts)) / (1.0 + document_frequency)) + 1.0
+    vectors = np.log1p(counts) * idf.astype(np.float32)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def adjacent_similarities(texts: List[str], n_features: int = DEFAULT_HASH_FEATURES) -> np.ndarray:
+    """
+    Cosine similarity between each text and the next one.
+
+    Args:
+        texts: Texts in reading order
+        n_features: Number of hash buckets
+
+    Returns:
+        Array of len(texts) - 1 similarities in [0, 1]; entry i compares texts i and i + 1
+    """
+    if len(texts) < 2:
+        return np.zeros(0, dtype=np.float32)
+    vectors = hashed_tfidf_vectors(texts, n_features)
+    return np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
@@ -0,0 +1,284 @@
+"""
+Processing Metrics
+
+Per-document accounting of LLM usage and of time spent per processing stage.
+
+process_document_chunking opens a tracker with track_llm_usage();
+complete_chat / complete_chat_async report every call (tokens from the
+response's usage, latency and purpose) to the tracker of the current context.
+
+Stage timings are collected the same way with track_stage_timings(): code
+wraps a stage in timed_stage(), CPU stage pools report the work they run, and
+each measurement is attributed to the pages it was done for.
+
+Trackers live in context variables, so they follow the document through
+asyncio tasks, and through threads when work is submitted with
+contextvars.copy_context().run.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+# USD per million tokens (input, output), used for the cost estimate
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# Purposes reported by the package's call sites
+LLM_PURPOSES = ("table", "picture", "formula", "boundary", "text_chunking")
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "cached_calls": 0,
+        "failed_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "latency_seconds": 0.0,
+        "estimated_cost_usd": 0.0,
+    }
+
+
+class LLMUsageTracker:
+    """Sums LLM calls, tokens, latency and estimated cost, overall and per purpose."""
+
+    def __init__(self):
+        self._totals = _empty_totals()
+        self._by_purpose: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        purpose: str,
+        model: Optional[str],
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        cached: bool = False,
+        failed: bool = False,
+    ) -> None:
+        """
+        Record one chat completion.
+
+        Args:
+            purpose: What the call was for ('table', 'boundary', ...)
+            model: Model name, used to look up MODEL_PRICES
+            prompt_tokens: Prompt tokens reported by the API
+            completion_tokens: Completion tokens reported by the API
+            latency: Seconds spent waiting for the API (excluding rate limiting)
+            cached: The response came from the LLM response cache
+            failed: The call raised an error
+        """
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+        with self._lock:
+            purpose_totals = self._by_purpose.setdefault(purpose, _empty_totals())
+            for totals in (self._totals, purpose_totals):
+                totals["calls"] += 1
+                totals["cached_calls"] += int(cached)
+                totals["failed_calls"] += int(failed)
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["total_tokens"] += prompt_tokens + completion_tokens
+                totals["latency_seconds"] += latency
+                totals["estimated_cost_usd"] += cost
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable totals with a 'by_purpose' breakdown."""
+        def rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+            return dict(
+                totals,
+                latency_seconds=round(totals["latency_seconds"], 3),
+                estimated_cost_usd=round(totals["estimated_cost_usd"], 6),
+            )
+
+        with self._lock:
+            summary = rounded(self._totals)
+            summary["by_purpose"] = {
+                purpose: rounded(totals) for purpose, totals in sorted(self._by_purpose.items())
+            }
+        return summary
+
+
+_usage_tracker: contextvars.ContextVar[Optional[LLMUsageTracker]] = contextvars.ContextVar(
+    "unsiloed_llm_usage_tracker", default=None
+)
+
+
+@contextmanager
+def track_llm_usage() -> Iterator[LLMUsageTracker]:
+    """Collect the LLM usage of everything run inside the block into a new tracker."""
+    tracker = LLMUsageTracker()
+    token = _usage_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _usage_tracker.reset(token)
+
+
+def record_llm_usage(purpose: str, model: Optional[str], **kwargs) -> None:
+    """Record a chat completion with the current tracker; a no-op outside track_llm_usage()."""
+    tracker = _usage_tracker.get()
+    if tracker is not None:
+        tracker.record(purpose, model, **kwargs)
+
+
+class StageTimings:
+    """
+    Wall-clock and CPU time per processing stage, overall and per page.
+
+    Wall time comes from time.perf_counter() and CPU time from time.thread_time()
+    of the thread that did the work, so CPU spent in subprocesses (pdftoppm,
+    the tesseract CLI) is not included. Stages whose measurements overlap, such as
+    concurrent vision LLM calls, report the sum over all measurements.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._pages: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _add(totals: Dict[str, Any], wall_seconds: float, cpu_seconds: Optional[float]) -> None:
+        totals["calls"] += 1
+        totals["wall_seconds"] += wall_seconds
+        if cpu_seconds is not None:
+            totals["cpu_seconds"] = (totals["cpu_seconds"] or 0.0) + cpu_seconds
+
+    def record(
+        self,
+        stage: str,
+        wall_seconds: float,
+        cpu_seconds: Optional[float] = None,
+        pages: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Record one measurement of a stage.
+
+        Args:
+            stage: Stage name ('download', 'yolo', 'ocr', ...)
+            wall_seconds: Elapsed wall-clock time
+            cpu_seconds: CPU time of the measuring thread, or None when not meaningful
+                        (e.g. time spent awaiting on the event loop)
+            pages: 1-based pages the work was done for; the time is split evenly between them
+        """
+        pages = tuple(pages or ())
+        with self._lock:
+            totals = self._stages.setdefault(stage, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": None})
+            self._add(totals, wall_seconds, cpu_seconds)
+            for page in pages:
+                page_stages = self._pages.setdefault(page, {})
+                page_totals = page_stages.setdefault(stage, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": None})
+                self._add(
+                    page_totals,
+                    wall_seconds / len(pages),
+                    cpu_seconds / len(pages) if cpu_seconds is not None else None,
+                )
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable timings: {'stages': {stage: totals}, 'pages': [{'page_number', 'stages'}]}."""
+        def rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+            cpu_seconds = totals["cpu_seconds"]
+            return {
+                "calls": totals["calls"],
+                "wall_seconds": round(totals["wall_seconds"], 4),
+                "cpu_seconds": round(cpu_seconds, 4) if cpu_seconds is not None else None,
+            }
+
+        with self._lock:
+            return {
+                "stages": {stage: rounded(totals) for stage, totals in self._stages.items()},
+                "pages": [
+                    {
+                        "page_number": page,
+                        "stages": {stage: rounded(totals) for stage, totals in page_stages.items()},
+                    }
+                    for page, page_stages in sorted(self._pages.items())
+                ],
+            }
+
+
+_stage_timings: contextvars.ContextVar[Optional[StageTimings]] = contextvars.ContextVar(
+    "unsiloed_stage_timings", default=None
+)
+_current_pages: contextvars.ContextVar[Tuple[int, ...]] = contextvars.ContextVar(
+    "unsiloed_current_pages", default=()
+)
+
+
+@contextmanager
+def track_stage_timings() -> Iterator[StageTimings]:
+    """
+    Collect stage timings of everything run inside the block.
+
+    When timings are already being collected (e.g. process() timing the download
+    before calling process_document_chunking), the active collector is reused.
+    """
+    timings = _stage_timings.get()
+    if timings is not None:
+        yield timings
+        return
+
+    timings = StageTimings()
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
+
+@contextmanager
+def for_pages(*page_numbers: int) -> Iterator[None]:
+    """Attribute stage timings recorded inside the block to the given 1-based pages."""
+    token = _current_pages.set(tuple(page_numbers))
+    try:
+        yield
+    finally:
+        _current_pages.reset(token)
+
+
+def record_stage_time(
+    stage: str,
+    wall_seconds: float,
+    cpu_seconds: Optional[float] = None,
+    pages: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    Record a stage measurement with the current collector; a no-op outside track_stage_timings().
+
+    Without explicit pages, the measurement goes to the pages set with for_pages().
+    """
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings.record(stage, wall_seconds, cpu_seconds, pages if pages is not None else _current_pages.get())
+
+
+@contextmanager
+def timed_stage(stage: str, pages: Optional[Iterable[int]] = None, cpu: bool = True) -> Iterator[None]:
+    """
+    Time the block as one measurement of a stage.
+
+    Args:
+        stage: Stage name
+        pages: 1-based pages to attribute the time to (defaults to for_pages())
+        cpu: Measure the CPU time of the current thread. Pass False for blocks that
+             await on an event loop, where other coroutines run on the same thread.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time() if cpu else None
+    try:
+        yield
+    finally:
+        record_stage_time(
+            stage,
+            time.perf_counter() - wall_start,
+            time.thread_time() - cpu_start if cpu else None,
+            pages,
+        )
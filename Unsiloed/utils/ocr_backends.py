@@ -0,0 +1,230 @@
+"""
+OCR Backends
+
+Pluggable OCR engines used by the extraction utilities. Every backend exposes
+the same two operations:
+
+- image_to_string: plain text for an image (one region)
+- image_to_words: word-level boxes for an image (a whole page)
+
+Available backends:
+- "pytesseract": shells out to the tesseract binary on every call
+- "tesserocr": keeps a Tesseract API handle alive in-process, one per worker thread
+
+The default backend comes from parse_config.OCR_BACKEND (environment variable
+UNSILOED_OCR_BACKEND) and can be changed at runtime with set_default_ocr_backend.
+Backends are closed at exit (close_ocr_backends).
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Dict, List, Type
+
+import pytesseract
+from PIL import Image
+
+from Unsiloed.parse_config import OCR_BACKEND, OCR_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+
+class OCRBackend:
+    """Base class for OCR engines."""
+
+    name = None
+
+    def __init__(self, lang: str = OCR_LANGUAGE):
+        self.lang = lang
+
+    def image_to_string(self, image: Image.Image) -> str:
+        """Return the text found in the image."""
+        raise NotImplementedError
+
+    def image_to_words(self, image: Image.Image) -> List[Dict[str, Any]]:
+        """
+        Return word-level boxes for the image.
+
+        Each word is a dictionary with 'text', 'bbox' ([x1, y1, x2, y2]), 'conf'
+        and Tesseract-style 'block_num', 'par_num', 'line_num', 'word_num'.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources held by the backend. It stays usable afterwards."""
+
+
+class PytesseractBackend(OCRBackend):
+    """Tesseract through the pytesseract CLI wrapper (one subprocess per call)."""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+    def image_to_words(self, image: Image.Image) -> List[Dict[str, Any]]:
+        data = pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+
+        words = []
+        for i, text in enumerate(data['text']):
+            text = str(text).strip()
+            if not text or float(data['conf'][i]) < 0:
+                continue
+            left, top = int(data['left'][i]), int(data['top'][i])
+            words.append({
+                'text': text,
+                'bbox': [left, top, left + int(data['width'][i]), top + int(data['height'][i])],
+                'conf': float(data['conf'][i]),
+                'block_num': int(data['block_num'][i]),
+                'par_num': int(data['par_num'][i]),
+                'line_num': int(data['line_num'][i]),
+                'word_num': int(data['word_num'][i]),
+            })
+        return words
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    In-process Tesseract through tesserocr.
+
+    Tesseract API handles are not thread-safe, so each worker thread lazily
+    creates its own handle and reuses it for every image it processes. Handles
+    of threads that have exited are ended when the next handle is created.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANGUAGE):
+        super().__init__(lang)
+        try:
+            import tesserocr
+        except ImportError:
+            raise RuntimeError(
+                "Missing dependency 'tesserocr'. Please run: pip install tesserocr"
+            )
+        self._tesserocr = tesserocr
+        self._local = threading.local()
+        # (thread, handle) for every live handle, so they can be ended
+        self._apis = []
+        self._apis_lock = threading.Lock()
+
+    def _get_api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = self._tesserocr.PyTessBaseAPI(lang=self.lang)
+            self._local.api = api
+            with self._apis_lock:
+                finished = [handle for thread, handle in self._apis if not thread.is_alive()]
+                self._apis = [(thread, handle) for thread, handle in self._apis if thread.is_alive()]
+                self._apis.append((threading.current_thread(), api))
+            for handle in finished:
+                handle.End()
+            logger.debug(f"Created tesserocr API handle for thread {threading.current_thread().name}")
+        return api
+
+    def close(self) -> None:
+        """End every API handle; threads create a new one on their next image."""
+        with self._apis_lock:
+            apis, self._apis = self._apis, []
+            self._local = threading.local()
+        for _, api in apis:
+            api.End()
+
+    def image_to_string(self, image: Image.Image) -> str:
+        api = self._get_api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+    def image_to_words(self, image: Image.Image) -> List[Dict[str, Any]]:
+        RIL = self._tesserocr.RIL
+        api = self._get_api()
+        api.SetImage(image)
+        api.Recognize()
+
+        words = []
+        block_num = par_num = line_num = word_num = 0
+        for word in self._tesserocr.iterate_level(api.GetIterator(), RIL.WORD):
+            if word.IsAtBeginningOf(RIL.BLOCK):
+                block_num, par_num, line_num = block_num + 1, 0, 0
+            if word.IsAtBeginningOf(RIL.PARA):
+                par_num, line_num = par_num + 1, 0
+            if word.IsAtBeginningOf(RIL.TEXTLINE):
+                line_num, word_num = line_num + 1, 0
+            word_num += 1
+
+            text = (word.GetUTF8Text(RIL.WORD) or "").strip()
+            box = word.BoundingBox(RIL.WORD)
+            if not text or box is None:
+                continue
+            words.append({
+                'text': text,
+                'bbox': list(box),
+                'conf': float(word.Confidence(RIL.WORD)),
+                'block_num': block_num,
+                'par_num': par_num,
+                'line_num': line_num,
+                'word_num': word_num,
+            })
+        return words
+
+
+_backend_classes: Dict[str, Type[OCRBackend]] = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+_backends: Dict[str, OCRBackend] = {}
+_default_backend = OCR_BACKEND
+_lock = threading.Lock()
+
+
+def register_ocr_backend(name: str, backend_class: Type[OCRBackend]) -> None:
+    """Register an additional OCR backend class under a name."""
+    with _lock:
+        _backend_classes[name] = backend_class
+        _backends.pop(name, None)
+
+
+def set_default_ocr_backend(name: str) -> None:
+    """Select the backend used when callers do not ask for one explicitly."""
+    global _default_backend
+    if name not in _backend_classes:
+        raise ValueError(f"Unknown OCR backend '{name}'. Available: {sorted(_backend_classes)}")
+    _default_backend = name
+
+
+def get_ocr_backend(name: str = None) -> OCRBackend:
+    """
+    Return the shared instance of an OCR backend.
+
+    Args:
+        name: Backend name. Defaults to the configured default backend.
+
+    Returns:
+        OCRBackend instance, created on first use and reused afterwards
+    """
+    name = name or _default_backend
+    with _lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend_class = _backend_classes.get(name)
+            if backend_class is None:
+                raise ValueError(f"Unknown OCR backend '{name}'. Available: {sorted(_backend_classes)}")
+            backend = backend_class()
+            _backends[name] = backend
+            logger.info(f"Using '{name}' OCR backend")
+        return backend
+
+
+def close_ocr_backends() -> None:
+    """Close every backend instance created so far. Registered with atexit."""
+    with _lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        try:
+            backend.close()
+        except Exception as e:
+            logger.warning(f"Error closing OCR backend '{backend.name}': {str(e)}")
+
+
+atexit.register(close_ocr_backends)
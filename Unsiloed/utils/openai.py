@@ -1,9 +1,16 @@
 import os
+import asyncio
+import atexit
 import base64
+import contextvars
 import json
+import random
 import re
-from typing import List, Dict, Any
-from openai import OpenAI
+import threading
+import time
+import weakref
+from typing import List, Dict, Any, Optional
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
 import logging
 import concurrent.futures
 import PyPDF2
@@ -16,6 +23,18 @@ from Unsiloed.utils.web_utils import (
     scrape_website_sync,
     validate_url
 )
+from Unsiloed.utils.cache import PersistentCache, make_cache_key
+from Unsiloed.utils.rate_limiter import estimate_request_tokens, get_rate_limiter
+from Unsiloed.utils.metrics import record_llm_usage
+from Unsiloed.utils.request_context import get_request_api_key
+from Unsiloed.parse_config import (
+    OPENAI_TIMEOUT,
+    OPENAI_MAX_RETRIES,
+    OPENAI_HEALTH_CHECK_TTL,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL,
+)
 
 load_dotenv()
 
@@ -28,42 +47,321 @@ logging.basicConfig(
 
 load_dotenv()
 
-# Instead of initializing at import, create a function to get the client
-client = None
+# Clients are created on first use and shared by every caller in the process so
+# that HTTP connections (and TLS sessions) are pooled instead of re-established
+# for each request.
+_sync_clients: Dict[str, OpenAI] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+_health_checked_at: Dict[str, float] = {}
+_clients_lock = threading.Lock()
+
+
+def _resolve_api_key(api_key: Optional[str] = None) -> Optional[str]:
+    return get_request_api_key(api_key)
 
 
-def get_openai_client():
-    """Get an OpenAI client with proper configuration"""
+def _check_client_health(client: OpenAI, api_key: str) -> bool:
+    """Run the models.list() health check, at most once per OPENAI_HEALTH_CHECK_TTL."""
+    checked_at = _health_checked_at.get(api_key)
+    if checked_at is not None and time.monotonic() - checked_at < OPENAI_HEALTH_CHECK_TTL:
+        return True
+
+    models = client.models.list()
+    if models and hasattr(models, "data") and len(models.data) > 0:
+        logger.debug(
+            f"OpenAI client initialized successfully, available models: {len(models.data)}"
+        )
+        _health_checked_at[api_key] = time.monotonic()
+        return True
+
+    logger.error("OpenAI client initialized but returned no models.")
+    return False
+
+
+def get_openai_client(api_key: Optional[str] = None):
+    """
+    Get the shared OpenAI client for an API key.
+
+    The client is created once per API key and reused, and its health check is
+    cached for OPENAI_HEALTH_CHECK_TTL seconds.
+
+    Args:
+        api_key: OpenAI API key. Defaults to the active request context's key, then
+                 the OPENAI_API_KEY environment variable.
+
+    Returns:
+        OpenAI client, or None if the client could not be initialized
+    """
     try:
-        api_key = os.environ.get("OPENAI_API_KEY")
+        api_key = _resolve_api_key(api_key)
         if not api_key:
-            logger.error("OPENAI_API_KEY environment variable is not set")
-            raise ValueError("OPENAI_API_KEY environment variable is not set")
+            logger.error("No OpenAI API key in the request context or OPENAI_API_KEY")
+            raise ValueError("No OpenAI API key in the request context or OPENAI_API_KEY")
 
-        logger.debug("Attempting to create OpenAI client...")
+        with _clients_lock:
+            client = _sync_clients.get(api_key)
+            if client is None:
+                logger.debug("Creating shared OpenAI client...")
+                client = OpenAI(api_key=api_key, timeout=OPENAI_TIMEOUT, max_retries=0)
+                _sync_clients[api_key] = client
 
-        # Create client with explicit parameters
-        client = OpenAI(api_key=api_key, timeout=60.0, max_retries=3)
-        logger.debug(
-            "OpenAI client created, now testing..."
-        )  # Log after client creation
-
-        # Test the client by listing available models
-        models = client.models.list()
-        if models and hasattr(models, "data") and len(models.data) > 0:
-            logger.debug(
-                f"OpenAI client initialized successfully, available models: {len(models.data)}"
-            )
-            return client
-        else:
-            logger.error("OpenAI client initialized but returned no models.")
-            return None
+        return client if _check_client_health(client, api_key) else None
 
     except Exception as e:
         logger.error(f"Error initializing OpenAI client: {str(e)}")
         return None
 
 
+def get_async_openai_client(api_key: Optional[str] = None) -> Optional[AsyncOpenAI]:
+    """
+    Get the shared AsyncOpenAI client for an API key and the running event loop.
+
+    Async HTTP connections belong to the event loop that opened them, so one
+    client is kept per (event loop, API key). Clients are dropped together with
+    their loop.
+
+    Args:
+        api_key: OpenAI API key. Defaults to the active request context's key, then
+                 the OPENAI_API_KEY environment variable.
+
+    Returns:
+        AsyncOpenAI client, or None if no API key is available
+    """
+    api_key = _resolve_api_key(api_key)
+    if not api_key:
+        return None
+
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(api_key)
+        if client is None:
+            client = AsyncOpenAI(api_key=api_key, timeout=OPENAI_TIMEOUT, max_retries=0)
+            loop_clients[api_key] = client
+            logger.debug("Created shared AsyncOpenAI client for event loop")
+        return client
+
+
+async def aclose_async_openai_clients() -> None:
+    """Close the async clients bound to the running event loop."""
+    with _clients_lock:
+        loop_clients = _async_clients.pop(asyncio.get_running_loop(), {})
+
+    for client in loop_clients.values():
+        try:
+            await client.close()
+        except Exception:
+            pass  # Ignore cleanup errors
+
+
+def close_openai_clients() -> None:
+    """
+    Close every shared OpenAI client and forget cached health checks.
+
+    Registered with atexit. Async clients whose event loop is still usable are
+    closed on that loop; the others are simply dropped.
+    """
+    with _clients_lock:
+        sync_clients = list(_sync_clients.values())
+        _sync_clients.clear()
+        async_clients = list(_async_clients.items())
+        _async_clients.clear()
+        _health_checked_at.clear()
+
+    for client in sync_clients:
+        try:
+            client.close()
+        except Exception:
+            pass  # Ignore cleanup errors
+
+    for loop, loop_clients in async_clients:
+        if loop.is_closed() or loop.is_running():
+            continue
+        for client in loop_clients.values():
+            try:
+                loop.run_until_complete(client.close())
+            except Exception:
+                pass  # Ignore cleanup errors
+
+
+atexit.register(close_openai_clients)
+
+
+_llm_cache: Optional[PersistentCache] = None
+_llm_cache_configured = False
+
+
+def configure_llm_cache(
+    path: Optional[str] = None,
+    max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ttl_seconds: Optional[float] = LLM_CACHE_TTL,
+) -> Optional[PersistentCache]:
+    """
+    Enable, reconfigure or disable the persistent LLM response cache.
+
+    Args:
+        path: SQLite file for the cache. None disables caching.
+        max_bytes: Size budget before least-recently-used responses are evicted
+        ttl_seconds: Maximum age of a cached response. None keeps responses until evicted.
+
+    Returns:
+        The active cache, or None when caching is disabled
+    """
+    global _llm_cache, _llm_cache_configured
+    with _clients_lock:
+        if _llm_cache is not None:
+            _llm_cache.close()
+        _llm_cache = PersistentCache(path, max_bytes, ttl_seconds) if path else None
+        _llm_cache_configured = True
+    if _llm_cache is not None:
+        logger.info(f"LLM response cache enabled at {path}")
+    return _llm_cache
+
+
+def get_llm_cache() -> Optional[PersistentCache]:
+    """Return the LLM response cache, opening it from UNSILOED_LLM_CACHE_PATH on first use."""
+    if not _llm_cache_configured:
+        configure_llm_cache(LLM_CACHE_PATH)
+    return _llm_cache
+
+
+def _chat_cache_key(request: Dict[str, Any]) -> str:
+    # Image crops are part of the messages as base64 data URLs, so their pixels are hashed too
+    return make_cache_key({"endpoint": "chat.completions", "request": request})
+
+
+def _retry_after(error: RateLimitError) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[header]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _retry_delay(attempt: int) -> float:
+    return min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.75, 1.25)
+
+
+def _finish_chat(limiter, ticket, purpose: str, request: Dict[str, Any], response) -> str:
+    """Release the rate limiter slot, record usage and return the response content."""
+    latency = time.monotonic() - ticket.started_at
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    limiter.release(ticket, tokens_used=prompt_tokens + completion_tokens if usage is not None else None)
+    record_llm_usage(
+        purpose, request.get("model"),
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, latency=latency,
+    )
+    return response.choices[0].message.content
+
+
+def complete_chat(client: OpenAI, purpose: str = "other", **request) -> str:
+    """
+    Run a chat completion and return the message content.
+
+    Responses are served from and stored in the LLM response cache when it is enabled.
+    Requests to the API go through the process-wide rate limiter and are retried
+    up to OPENAI_MAX_RETRIES times on rate limits, connection errors and 5xx errors.
+    Token usage and latency are reported to the current document's usage tracker
+    (see utils/metrics.py).
+
+    Args:
+        client: OpenAI client
+        purpose: What the call is for ('table', 'picture', 'formula', 'boundary',
+                'text_chunking'), used to break down usage
+        **request: Arguments for client.chat.completions.create
+
+    Returns:
+        Content of the first choice
+    """
+    cache = get_llm_cache()
+    key = _chat_cache_key(request) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            record_llm_usage(purpose, request.get("model"), cached=True)
+            return cached.decode("utf-8")
+
+    limiter = get_rate_limiter()
+    tokens = estimate_request_tokens(request)
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        ticket = limiter.acquire(tokens)
+        try:
+            response = client.chat.completions.create(**request)
+        except RateLimitError as e:
+            # The limiter pauses all traffic until the rate limit has passed
+            limiter.release(ticket, rate_limited=True, retry_after=_retry_after(e))
+            if attempt == OPENAI_MAX_RETRIES:
+                record_llm_usage(purpose, request.get("model"), failed=True)
+                raise
+            continue
+        except (APIConnectionError, InternalServerError):
+            limiter.release(ticket, failed=True)
+            if attempt == OPENAI_MAX_RETRIES:
+                record_llm_usage(purpose, request.get("model"), failed=True)
+                raise
+            time.sleep(_retry_delay(attempt))
+            continue
+        except BaseException:
+            limiter.release(ticket, failed=True)
+            record_llm_usage(purpose, request.get("model"), failed=True)
+            raise
+        content = _finish_chat(limiter, ticket, purpose, request, response)
+        break
+
+    if cache is not None and content is not None:
+        cache.set(key, content)
+    return content
+
+
+async def complete_chat_async(client: AsyncOpenAI, purpose: str = "other", **request) -> str:
+    """Async version of complete_chat."""
+    # Opening the cache the first time creates its SQLite file
+    cache = _llm_cache if _llm_cache_configured else await asyncio.to_thread(get_llm_cache)
+    key = _chat_cache_key(request) if cache is not None else None
+    if cache is not None:
+        # SQLite reads (which also write accessed_at) run off the event loop
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            record_llm_usage(purpose, request.get("model"), cached=True)
+            return cached.decode("utf-8")
+
+    limiter = get_rate_limiter()
+    tokens = estimate_request_tokens(request)
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        ticket = await limiter.acquire_async(tokens)
+        try:
+            response = await client.chat.completions.create(**request)
+        except RateLimitError as e:
+            limiter.release(ticket, rate_limited=True, retry_after=_retry_after(e))
+            if attempt == OPENAI_MAX_RETRIES:
+                record_llm_usage(purpose, request.get("model"), failed=True)
+                raise
+            continue
+        except (APIConnectionError, InternalServerError):
+            limiter.release(ticket, failed=True)
+            if attempt == OPENAI_MAX_RETRIES:
+                record_llm_usage(purpose, request.get("model"), failed=True)
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        except BaseException:
+            limiter.release(ticket, failed=True)
+            record_llm_usage(purpose, request.get("model"), failed=True)
+            raise
+        content = _finish_chat(limiter, ticket, purpose, request, response)
+        break
+
+    if cache is not None and content is not None:
+        await asyncio.to_thread(cache.set, key, content)
+    return content
+
+
 def encode_image_to_base64(image_path):
     """
     Encode an image to base64.
@@ -154,7 +452,9 @@ def semantic_chunk_with_structured_output(text: str) -> List[Dict[str, Any]]:
         openai_client = get_openai_client()
 
         # Create a prompt for the OpenAI model with JSON mode
-        response = openai_client.chat.completions.create(
+        content = complete_chat(
+            openai_client,
+            purpose="text_chunking",
             model="gpt-4o",
             messages=[
                 {
@@ -189,7 +489,7 @@ def semantic_chunk_with_structured_output(text: str) -> List[Dict[str, Any]]:
         )
 
         # Parse the response
-        result = json.loads(response.choices[0].message.content)
+        result = json.loads(content)
 
         # Convert the response to our standard chunk format
         chunks = []
@@ -291,7 +591,9 @@ def process_long_text_semantically(text: str) -> List[Dict[str, Any]]:
                 openai_client = get_openai_client()
 
                 # Process this chunk with JSON mode
-                response = openai_client.chat.completions.create(
+                content = complete_chat(
+                    openai_client,
+                    purpose="text_chunking",
                     model="gpt-4o",
                     messages=[
                         {
@@ -326,7 +628,7 @@ def process_long_text_semantically(text: str) -> List[Dict[str, Any]]:
                 )
 
                 # Parse the response
-                result = json.loads(response.choices[0].message.content)
+                result = json.loads(content)
 
                 # Convert the response to our standard chunk format
                 sub_chunks = []
@@ -364,7 +666,11 @@ def process_long_text_semantically(text: str) -> List[Dict[str, Any]]:
                 return []
 
         # Submit all tasks and gather results
-        futures = [executor.submit(process_chunk, chunk) for chunk in text_chunks]
+        # Workers run in a copy of the caller's context so usage is tracked per document
+        futures = [
+            executor.submit(contextvars.copy_context().run, process_chunk, chunk)
+            for chunk in text_chunks
+        ]
         for future in concurrent.futures.as_completed(futures):
             all_semantic_chunks.extend(future.result())
 
@@ -0,0 +1,406 @@
+"""
+OpenAI Rate Limiter
+
+Process-wide governor for OpenAI traffic. Every chat completion made by the
+package goes through complete_chat / complete_chat_async, which acquire a slot
+here first, so pages, boundary detection and concurrently processed documents
+share one budget regardless of the thread or event loop they run on:
+
+- Requests per minute and tokens per minute are enforced with token buckets.
+  Tokens are estimated from the request up front and corrected from the
+  response's usage once it arrives.
+- The number of requests in flight is adapted with AIMD: it grows by about one
+  request per round of successful responses, is halved on a 429 (which also
+  pauses all traffic for the Retry-After period) and is cut back when latency
+  rises well above the observed baseline.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from Unsiloed.parse_config import (
+    OPENAI_REQUESTS_PER_MINUTE,
+    OPENAI_TOKENS_PER_MINUTE,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_INITIAL_CONCURRENCY,
+    OPENAI_LATENCY_TOLERANCE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Buckets hold this many seconds' worth of their per-minute budget, so a full
+# minute of requests cannot be fired at once
+BURST_SECONDS = 10.0
+
+# Token cost of an image input (gpt-4o, 'auto' detail) and the completion length
+# assumed when a request sets no max_tokens
+IMAGE_TOKENS = 765
+DEFAULT_COMPLETION_TOKENS = 256
+
+# Pause after a 429 that carries no Retry-After header
+DEFAULT_RATE_LIMIT_PAUSE = 1.0
+
+# Multiplicative decrease applied on a 429 and on a latency rise
+RATE_LIMIT_DECREASE = 0.5
+LATENCY_DECREASE = 0.8
+
+# Waiters re-check the limiter at least this often, in case a wake-up was lost
+_WAITER_TIMEOUT = 1.0
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Estimate the tokens a chat completion request counts against the TPM budget.
+
+    Text is counted at four characters per token, images at IMAGE_TOKENS, plus
+    the requested completion length.
+    """
+    chars = 0
+    images = 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    images += 1
+                else:
+                    chars += len(part.get("text", ""))
+    completion = request.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // 4 + images * IMAGE_TOKENS + completion
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = max(1.0, per_minute * BURST_SECONDS / 60.0)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        # Requests larger than the bucket go through once it is full, leaving it in debt
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimitTicket:
+    """Slot held by one request between acquire and release."""
+
+    __slots__ = ("tokens", "started_at")
+
+    def __init__(self, tokens: int, started_at: float):
+        self.tokens = tokens
+        self.started_at = started_at
+
+
+class RateLimiter:
+    """
+    RPM/TPM budgets and an adaptive concurrency limit shared by all threads and event loops.
+
+    State is guarded by a threading lock. Callers blocked on the concurrency limit
+    wait on an event (threads) or a future of their own loop (coroutines) and are
+    woken when a slot frees up; callers blocked on a budget sleep until it refills.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = OPENAI_REQUESTS_PER_MINUTE,
+        tokens_per_minute: Optional[int] = OPENAI_TOKENS_PER_MINUTE,
+        max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+        initial_concurrency: int = OPENAI_INITIAL_CONCURRENCY,
+        min_concurrency: int = 1,
+        latency_tolerance: float = OPENAI_LATENCY_TOLERANCE,
+    ):
+        """
+        Create a limiter.
+
+        Args:
+            requests_per_minute: Request budget. None for no budget.
+            tokens_per_minute: Token budget (prompt + completion). None for no budget.
+            max_concurrency: Upper bound of the adaptive concurrency limit
+            initial_concurrency: Concurrency limit to start from
+            min_concurrency: Lower bound of the adaptive concurrency limit
+            latency_tolerance: Back off when the average latency exceeds the
+                              baseline latency by this factor
+        """
+        for name, value in (("requests_per_minute", requests_per_minute), ("tokens_per_minute", tokens_per_minute)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive or None, got {value}")
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError(
+                f"Concurrency bounds must satisfy 1 <= min_concurrency <= max_concurrency, "
+                f"got {min_concurrency} and {max_concurrency}"
+            )
+        if latency_tolerance <= 1.0:
+            raise ValueError(f"latency_tolerance must be greater than 1, got {latency_tolerance}")
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_tolerance = latency_tolerance
+
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency_avg: Optional[float] = None
+        self._latency_baseline: Optional[float] = None
+        self._waiters: Deque[Callable[[], bool]] = deque()
+        self._lock = threading.Lock()
+
+        self._completed = 0
+        self._rate_limited = 0
+        self._failed = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def _try_acquire(self, tokens: int, now: float) -> Optional[float]:
+        """Take a slot: 0.0 on success, seconds to wait for a budget, or None when no slot is free."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= int(self._limit):
+            return None
+
+        wait = 0.0
+        if self._requests is not None:
+            wait = self._requests.wait_time(1, now)
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        if wait > 0.0:
+            return wait
+
+        if self._requests is not None:
+            self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+        self._in_flight += 1
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> RateLimitTicket:
+        """Block the calling thread until a request with the given token estimate may be sent."""
+        while True:
+            waker = None
+            with self._lock:
+                now = time.monotonic()
+                wait = self._try_acquire(tokens, now)
+                if wait == 0.0:
+                    return RateLimitTicket(tokens, now)
+                if wait is None:
+                    event = threading.Event()
+                    waker = _event_waker(event)
+                    self._waiters.append(waker)
+
+            if waker is not None:
+                try:
+                    event.wait(_WAITER_TIMEOUT)
+                finally:
+                    self._remove_waiter(waker)
+            else:
+                time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> RateLimitTicket:
+        """Wait, without blocking the event loop, until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        while True:
+            waker = None
+            with self._lock:
+                now = time.monotonic()
+                wait = self._try_acquire(tokens, now)
+                if wait == 0.0:
+                    return RateLimitTicket(tokens, now)
+                if wait is None:
+                    future = loop.create_future()
+                    waker = _future_waker(loop, future)
+                    self._waiters.append(waker)
+
+            if waker is not None:
+                try:
+                    await asyncio.wait_for(future, _WAITER_TIMEOUT)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    # A waiter that timed out or was cancelled must not be handed the next free slot
+                    self._remove_waiter(waker)
+            else:
+                await asyncio.sleep(wait)
+
+    def _remove_waiter(self, waker: Callable[[], bool]) -> None:
+        with self._lock:
+            try:
+                self._waiters.remove(waker)
+            except ValueError:
+                pass  # Already woken
+
+    def release(
+        self,
+        ticket: RateLimitTicket,
+        tokens_used: Optional[int] = None,
+        rate_limited: bool = False,
+        retry_after: Optional[float] = None,
+        failed: bool = False,
+    ) -> None:
+        """
+        Return a slot and feed the outcome of the request back into the limiter.
+
+        Args:
+            ticket: Ticket returned by acquire / acquire_async
+            tokens_used: Actual tokens reported by the API, used to correct the estimate
+            rate_limited: The request was rejected with a 429
+            retry_after: Seconds the API asked to wait before retrying
+            failed: The request failed for another reason (no latency sample is taken)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._in_flight -= 1
+
+            if self._tokens is not None and tokens_used is not None:
+                self._tokens.give_back(ticket.tokens - tokens_used)
+
+            if rate_limited:
+                self._rate_limited += 1
+                pause = retry_after if retry_after is not None else DEFAULT_RATE_LIMIT_PAUSE
+                self._paused_until = max(self._paused_until, now + pause)
+                self._decrease(now, RATE_LIMIT_DECREASE)
+                logger.warning(
+                    f"OpenAI rate limit hit; pausing {pause:.1f}s, concurrency limit now {int(self._limit)}"
+                )
+            elif failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._observe_latency(now - ticket.started_at, now)
+
+            self._wake_waiters()
+
+    def _observe_latency(self, latency: float, now: float) -> None:
+        if self._latency_avg is None:
+            self._latency_avg = self._latency_baseline = latency
+        else:
+            self._latency_avg = 0.8 * self._latency_avg + 0.2 * latency
+            # The baseline follows drops immediately and rises only slowly
+            self._latency_baseline = min(
+                self._latency_avg, self._latency_baseline + 0.01 * (self._latency_avg - self._latency_baseline)
+            )
+
+        if self._latency_avg > self._latency_baseline * self.latency_tolerance:
+            self._decrease(now, LATENCY_DECREASE)
+        else:
+            self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+
+    def _decrease(self, now: float, factor: float) -> None:
+        # Responses to requests sent before the last decrease say nothing new
+        if now - self._last_decrease < (self._latency_avg or DEFAULT_RATE_LIMIT_PAUSE):
+            return
+        self._limit = max(float(self.min_concurrency), self._limit * factor)
+        self._last_decrease = now
+
+    def _wake_waiters(self) -> None:
+        # Wakers report False for waiters that are gone, so free slots go to live ones
+        free_slots = max(0, int(self._limit) - self._in_flight)
+        while free_slots and self._waiters:
+            if self._waiters.popleft()():
+                free_slots -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current state of the limiter."""
+        with self._lock:
+            return {
+                "concurrency_limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "completed": self._completed,
+                "rate_limited": self._rate_limited,
+                "failed": self._failed,
+                "latency_avg": self._latency_avg,
+                "latency_baseline": self._latency_baseline,
+            }
+
+
+def _event_waker(event: threading.Event) -> Callable[[], bool]:
+    def wake() -> bool:
+        if event.is_set():
+            return False
+        event.set()
+        return True
+
+    return wake
+
+
+def _future_waker(loop: asyncio.AbstractEventLoop, future: asyncio.Future) -> Callable[[], bool]:
+    def resolve() -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def wake() -> bool:
+        if future.done():
+            return False  # Timed out or cancelled
+        try:
+            loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            return False  # The waiter's loop is closed
+        return True
+
+    return wake
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def configure_rate_limiter(
+    requests_per_minute: Optional[int] = OPENAI_REQUESTS_PER_MINUTE,
+    tokens_per_minute: Optional[int] = OPENAI_TOKENS_PER_MINUTE,
+    max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+    initial_concurrency: int = OPENAI_INITIAL_CONCURRENCY,
+    latency_tolerance: float = OPENAI_LATENCY_TOLERANCE,
+) -> RateLimiter:
+    """
+    Replace the process-wide rate limiter.
+
+    Requests already in flight finish against the previous limiter.
+
+    Returns:
+        The new limiter
+    """
+    global _rate_limiter
+    limiter = RateLimiter(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_concurrency=max_concurrency,
+        initial_concurrency=initial_concurrency,
+        latency_tolerance=latency_tolerance,
+    )
+    with _rate_limiter_lock:
+        _rate_limiter = limiter
+    return limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, created from the UNSILOED_OPENAI_* settings on first use."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
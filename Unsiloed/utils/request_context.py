@@ -0,0 +1,83 @@
+"""
+Request Context
+
+Per-request settings, currently the caller's OpenAI credentials, carried with
+a document instead of through os.environ.
+
+process() builds a RequestContext from its options and passes it to
+process_document_chunking / semantic_chunking, which activate it with
+use_request_context(). Code that needs an OpenAI client then resolves the API
+key with get_request_api_key(): an explicit key first, then the active
+context, then the OPENAI_API_KEY environment variable.
+
+The active context lives in a context variable, like the metrics trackers, so
+it follows the document through asyncio tasks and through threads started
+with contextvars.copy_context().run. Concurrent documents with different keys
+in one process never see each other's credentials.
+"""
+
+import contextvars
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class RequestContext:
+    """Credentials and other per-request settings of one document."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Args:
+            api_key: OpenAI API key for the request's LLM calls. None falls back
+                     to the OPENAI_API_KEY environment variable.
+        """
+        self.api_key = api_key
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> "RequestContext":
+        """Build the context from process() options ('credentials': {'apiKey': ...})."""
+        credentials = options.get("credentials") or {}
+        return cls(api_key=credentials.get("apiKey"))
+
+    def __repr__(self) -> str:
+        # Never print the key itself
+        return f"RequestContext(api_key={'<set>' if self.api_key else None})"
+
+
+_request_context: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar(
+    "unsiloed_request_context", default=None
+)
+
+
+@contextmanager
+def use_request_context(context: Optional[RequestContext]) -> Iterator[Optional[RequestContext]]:
+    """
+    Make context the active request context inside the block.
+
+    None leaves the currently active context (if any) in place, so functions
+    that accept an optional context can always wrap their body with it.
+    """
+    if context is None:
+        yield _request_context.get()
+        return
+
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """The active request context, or None outside use_request_context()."""
+    return _request_context.get()
+
+
+def get_request_api_key(api_key: Optional[str] = None) -> Optional[str]:
+    """Resolve the OpenAI API key: explicit key, active request context, then OPENAI_API_KEY."""
+    if api_key:
+        return api_key
+    context = _request_context.get()
+    if context is not None and context.api_key:
+        return context.api_key
+    return os.environ.get("OPENAI_API_KEY")
@@ -4,6 +4,7 @@ Web and Markdown Processing Utilities
 This module provides utilities for processing HTML pages, websites, and markdown files:
 - HTML content extraction and cleaning
 - Website scraping with proper headers and error handling
+- Pooled, keep-alive HTTP sessions shared by scraping and downloads
 - Markdown parsing and text extraction
 - URL validation and normalization
 
@@ -20,16 +21,33 @@ Version: 1.0.0
 
 import asyncio
 import aiohttp
+import atexit
+import codecs
+import os
 import requests
 import markdown
 import html2text
 import validators
 import logging
 import re
-from typing import Dict, Any, Optional, List
+import tempfile
+import threading
+import weakref
+import zipfile
+from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup, Comment
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+from Unsiloed.parse_config import (
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    MAX_DOWNLOAD_BYTES,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +71,10 @@ class HTMLProcessingError(WebProcessingError):
     """Exception raised when HTML processing fails."""
     pass
 
+class DownloadTooLargeError(WebProcessingError):
+    """Exception raised when a download exceeds the maximum size."""
+    pass
+
 
 def validate_url(url: str) -> str:
     """
@@ -221,13 +243,130 @@ def extract_text_from_html_content(html_content: str, preserve_structure: bool =
         raise HTMLProcessingError(f"Failed to process HTML content: {str(e)}")
 
 
-def scrape_website_sync(url: str, timeout: int = 30) -> Dict[str, Any]:
+# Browser-like headers sent with scraping requests
+_BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Pooled HTTP sessions: one requests session per process, one aiohttp session per event loop
+_sync_session = None
+_sync_session_lock = threading.Lock()
+_async_sessions = weakref.WeakKeyDictionary()
+_async_sessions_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide requests session, creating it on first use.
+    
+    Connections are kept alive between calls, up to
+    HTTP_MAX_CONNECTIONS_PER_HOST per host. The session is closed at exit.
+    
+    Returns:
+        Shared requests session
+    """
+    global _sync_session
+    with _sync_session_lock:
+        if _sync_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=max(1, HTTP_MAX_CONNECTIONS // HTTP_MAX_CONNECTIONS_PER_HOST),
+                pool_maxsize=HTTP_MAX_CONNECTIONS_PER_HOST,
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sync_session = session
+        return _sync_session
+
+
+def close_http_session() -> None:
+    """Close the process-wide requests session; the next get_http_session() opens a new one."""
+    global _sync_session
+    with _sync_session_lock:
+        session, _sync_session = _sync_session, None
+    if session is not None:
+        session.close()
+
+
+atexit.register(close_http_session)
+
+
+def get_async_http_session() -> aiohttp.ClientSession:
     """
-    Scrape content from a website synchronously.
+    Get the HTTP session of the running event loop, creating it on first use.
+    
+    Connections are kept alive between calls on the same loop, up to
+    HTTP_MAX_CONNECTIONS in total and HTTP_MAX_CONNECTIONS_PER_HOST per host.
+    Close the session with aclose_async_http_sessions() before the loop is closed.
+    
+    Returns:
+        aiohttp session bound to the running loop
+    """
+    loop = asyncio.get_running_loop()
+    with _async_sessions_lock:
+        session = _async_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT, sock_connect=HTTP_CONNECT_TIMEOUT),
+            )
+            _async_sessions[loop] = session
+        return session
+
+
+async def aclose_async_http_sessions() -> None:
+    """Close the HTTP session of the running event loop, if any."""
+    with _async_sessions_lock:
+        session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _parse_scraped_page(html_content: str) -> Dict[str, Any]:
+    """
+    Extract the title, description and text of a scraped page.
+    
+    Args:
+        html_content: Raw HTML of the page
+        
+    Returns:
+        Dictionary with 'title', 'description', 'content' and 'content_length'
+    """
+    soup = BeautifulSoup(html_content, 'lxml')
+    
+    # Extract metadata
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else "No title"
+    
+    meta_description = soup.find('meta', attrs={'name': 'description'})
+    description = meta_description.get('content', '').strip() if meta_description else ""
+    
+    text_content = extract_text_from_html_content(html_content)
+    
+    return {
+        'title': title_text,
+        'description': description,
+        'content': text_content,
+        'content_length': len(text_content),
+    }
+
+
+def scrape_website_sync(url: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Scrape content from a website synchronously, on the pooled requests session.
     
     Args:
         url: URL to scrape
-        timeout: Request timeout in seconds
+        timeout: Read timeout in seconds. Defaults to parse_config.HTTP_TIMEOUT
         
     Returns:
         Dictionary containing scraped content and metadata
@@ -239,40 +378,20 @@ def scrape_website_sync(url: str, timeout: int = 30) -> Dict[str, Any]:
         # Validate URL
         url = validate_url(url)
         
-        # Set up headers to mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
         # Make request
-        response = requests.get(url, headers=headers, timeout=timeout)
+        timeout = HTTP_TIMEOUT if timeout is None else timeout
+        response = get_http_session().get(url, headers=_BROWSER_HEADERS, timeout=(HTTP_CONNECT_TIMEOUT, timeout))
         response.raise_for_status()
         
-        # Extract content
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # Extract metadata
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else "No title"
-        
-        meta_description = soup.find('meta', attrs={'name': 'description'})
-        description = meta_description.get('content', '').strip() if meta_description else ""
-        
-        text_content = extract_text_from_html_content(response.text)
+        # Extract content and metadata
+        page = _parse_scraped_page(response.text)
         
-        return {
-            'url': url,
-            'title': title_text,
-            'description': description,
-            'content': text_content,
-            'status_code': response.status_code,
-            'content_type': response.headers.get('content-type', ''),
-            'content_length': len(text_content),
-        }
+        return dict(
+            page,
+            url=url,
+            status_code=response.status_code,
+            content_type=response.headers.get('content-type', ''),
+        )
         
     except requests.RequestException as e:
         logger.error(f"Request error scraping {url}: {str(e)}")
@@ -282,13 +401,13 @@ def scrape_website_sync(url: str, timeout: int = 30) -> Dict[str, Any]:
         raise WebScrapingError(f"Failed to scrape website: {str(e)}")
 
 
-async def scrape_website_async(url: str, timeout: int = 30) -> Dict[str, Any]:
+async def scrape_website_async(url: str, timeout: Optional[float] = None) -> Dict[str, Any]:
     """
-    Scrape content from a website asynchronously.
+    Scrape content from a website asynchronously, on the event loop's pooled session.
     
     Args:
         url: URL to scrape
-        timeout: Request timeout in seconds
+        timeout: Total timeout in seconds. Defaults to parse_config.HTTP_TIMEOUT
         
     Returns:
         Dictionary containing scraped content and metadata
@@ -300,42 +419,23 @@ async def scrape_website_async(url: str, timeout: int = 30) -> Dict[str, Any]:
         # Validate URL
         url = validate_url(url)
         
-        # Set up headers to mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
         # Make async request
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                html_content = await response.text()
-                
-                # Extract content
-                soup = BeautifulSoup(html_content, 'lxml')
-                
-                # Extract metadata
-                title = soup.find('title')
-                title_text = title.get_text().strip() if title else "No title"
-                
-                meta_description = soup.find('meta', attrs={'name': 'description'})
-                description = meta_description.get('content', '').strip() if meta_description else ""
-                
-                text_content = extract_text_from_html_content(html_content)
-                
-                return {
-                    'url': url,
-                    'title': title_text,
-                    'description': description,
-                    'content': text_content,
-                    'status_code': response.status,
-                    'content_type': response.headers.get('content-type', ''),
-                    'content_length': len(text_content),
-                }
+        timeout = HTTP_TIMEOUT if timeout is None else timeout
+        request_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=HTTP_CONNECT_TIMEOUT)
+        session = get_async_http_session()
+        async with session.get(url, headers=_BROWSER_HEADERS, timeout=request_timeout) as response:
+            response.raise_for_status()
+            html_content = await response.text()
+        
+        # Parse on a worker thread so large pages don't block the event loop
+        page = await asyncio.to_thread(_parse_scraped_page, html_content)
+        
+        return dict(
+            page,
+            url=url,
+            status_code=response.status,
+            content_type=response.headers.get('content-type', ''),
+        )
                 
     except aiohttp.ClientError as e:
         logger.error(f"Client error scraping {url}: {str(e)}")
@@ -404,7 +504,7 @@ def get_content_type_from_url(url: str) -> str:
             return 'text'
         
         try:
-            response = requests.head(url, timeout=10)
+            response = get_http_session().head(url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT))
             content_type = response.headers.get('content-type', '').lower()
             
             if 'text/html' in content_type:
@@ -421,4 +521,188 @@ def get_content_type_from_url(url: str) -> str:
             
     except Exception as e:
         logger.error(f"Error determining content type for {url}: {str(e)}")
-        return 'html'
\ No newline at end of file
+        return 'html'
+
+# Document downloads for process()
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+# Bytes read before the type of a download is decided
+_SNIFF_BYTES = 2048
+
+_CONTENT_TYPES = {
+    'application/pdf': 'pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',
+    'text/markdown': 'markdown',
+    'text/x-markdown': 'markdown',
+}
+
+_EXTENSIONS = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.pptx': 'pptx',
+    '.html': 'html',
+    '.htm': 'html',
+    '.md': 'markdown',
+    '.markdown': 'markdown',
+}
+
+_SUFFIXES = {'pdf': '.pdf', 'docx': '.docx', 'pptx': '.pptx', 'html': '.html', 'markdown': '.md', 'url': '.html'}
+
+
+def detect_document_type(url: str, head: bytes, content_type: str = '') -> str:
+    """
+    Determine the document type of a download from its first bytes and headers.
+    
+    Magic bytes win over the Content-Type header, which wins over the URL
+    extension. A ZIP container without a DOCX/PPTX hint is reported as 'zip'
+    and resolved from its contents once downloaded.
+    
+    Args:
+        url: URL of the download
+        head: First bytes of the response body
+        content_type: Content-Type header of the response
+        
+    Returns:
+        'pdf', 'docx', 'pptx', 'html', 'markdown', 'zip', or 'url' for a web page
+    """
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    
+    mime_type = content_type.split(';', 1)[0].strip().lower()
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    file_type = _CONTENT_TYPES.get(mime_type) or _EXTENSIONS.get(extension)
+    
+    if head.startswith(b'PK\x03\x04'):
+        return file_type if file_type in ('docx', 'pptx') else 'zip'
+    if file_type == 'pdf' and mime_type in ('text/html', 'application/xhtml+xml'):
+        # An HTML page (e.g. a login or error page) served for a .pdf link
+        return 'url'
+    return file_type or 'url'
+
+
+def _office_type_from_zip(path: str) -> str:
+    """Tell DOCX from PPTX by the parts of a downloaded ZIP container."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+    except zipfile.BadZipFile:
+        names = []
+    if any(name.startswith('word/') for name in names):
+        return 'docx'
+    if any(name.startswith('ppt/') for name in names):
+        return 'pptx'
+    raise ValueError("Unsupported file type. Supported formats: PDF, DOCX, PPTX, HTML, Markdown.")
+
+
+# Downloaded types re-encoded from the response charset to UTF-8
+_TEXT_TYPES = ('url', 'html', 'markdown')
+
+
+def _utf8_encoder(charset: Optional[str]):
+    """Return encode(data, final=False) that re-encodes a streamed body from charset to UTF-8."""
+    try:
+        decoder = codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def encode(data, final: bool = False) -> bytes:
+        return decoder.decode(bytes(data), final).encode('utf-8')
+
+    return encode
+
+
+def _discard_file(target) -> None:
+    target.close()
+    try:
+        os.unlink(target.name)
+    except FileNotFoundError:
+        pass
+
+
+async def download_document(
+    url: str,
+    max_bytes: Optional[int] = None,
+    directory: Optional[str] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Download a document with a single streamed GET request.
+    
+    The type is decided from the first bytes and the Content-Type of the
+    response, so no separate HEAD request is made. The body is written to a
+    temporary file in DOWNLOAD_CHUNK_BYTES chunks and never held in memory.
+    Web pages are saved the same way, decoded to UTF-8 HTML, so they are
+    scraped from the file instead of being fetched a second time; HTML and
+    Markdown documents are re-encoded to UTF-8 too.
+    
+    Args:
+        url: Validated URL
+        max_bytes: Largest accepted body in bytes (0 disables the limit).
+            Defaults to parse_config.MAX_DOWNLOAD_BYTES
+        directory: Directory for the temporary file (default: system temp directory)
+        
+    Returns:
+        (file_type, path): the document type ('url' for a web page) and the
+        temporary file, which the caller removes
+        
+    Raises:
+        DownloadTooLargeError: If the document is larger than max_bytes
+        aiohttp.ClientError: If the request fails
+    """
+    max_bytes = MAX_DOWNLOAD_BYTES if max_bytes is None else max_bytes
+    
+    # Large documents may take longer than HTTP_TIMEOUT; only a stalled read fails
+    request_timeout = aiohttp.ClientTimeout(total=None, sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_TIMEOUT)
+    session = get_async_http_session()
+    async with session.get(url, headers=_BROWSER_HEADERS, timeout=request_timeout) as response:
+        response.raise_for_status()
+        if max_bytes and response.content_length is not None and response.content_length > max_bytes:
+            raise DownloadTooLargeError(
+                f"Download of {url} is {response.content_length} bytes, more than the limit of {max_bytes}"
+            )
+        
+        head = b''
+        while len(head) < _SNIFF_BYTES:
+            chunk = await response.content.read(_SNIFF_BYTES - len(head))
+            if not chunk:
+                break
+            head += chunk
+        
+        file_type = detect_document_type(str(response.url), head, response.headers.get('content-type', ''))
+        
+        # Web pages and text documents are stored as UTF-8 so the HTML and
+        # Markdown readers can read them back
+        encode = _utf8_encoder(response.charset) if file_type in _TEXT_TYPES else bytes
+        
+        # File operations run on worker threads so a slow disk does not stall the event loop
+        target = await asyncio.to_thread(
+            tempfile.NamedTemporaryFile,
+            delete=False, suffix=_SUFFIXES.get(file_type, '.zip'), prefix='unsiloed-download-', dir=directory
+        )
+        try:
+            size = len(head)
+            buffer = bytearray(head)
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    break
+                buffer += chunk
+                # Network reads are often smaller than a chunk; write in DOWNLOAD_CHUNK_BYTES blocks
+                if len(buffer) >= DOWNLOAD_CHUNK_BYTES:
+                    await asyncio.to_thread(target.write, encode(buffer))
+                    buffer.clear()
+            if max_bytes and size > max_bytes:
+                raise DownloadTooLargeError(f"Download of {url} exceeds the limit of {max_bytes} bytes")
+            await asyncio.to_thread(target.write, encode(buffer))
+            if encode is not bytes:
+                await asyncio.to_thread(target.write, encode(b'', final=True))
+            await asyncio.to_thread(target.close)
+            
+            if file_type == 'zip':
+                file_type = await asyncio.to_thread(_office_type_from_zip, target.name)
+                path = os.path.splitext(target.name)[0] + _SUFFIXES[file_type]
+                await asyncio.to_thread(os.replace, target.name, path)
+                return file_type, path
+            return file_type, target.name
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(_discard_file, target))
+            raise
@@ -1,13 +1,17 @@
 from ultralytics import YOLO
-from Unsiloed.parse_config import MODEL_PATH, MODEL_DIR, _model
+from Unsiloed.parse_config import MODEL_PATH, MODEL_DIR, DEFAULT_YOLO_BATCH_SIZE, _model
 import logging
 import os
 import shutil
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, AsyncIterator, Tuple
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Documents processed concurrently must not load the model more than once
+_model_lock = threading.Lock()
+
 
 def download_model():
     """Download YOLO model from HuggingFace if not present."""
@@ -52,17 +56,19 @@ def get_model() -> YOLO:
     """Returns a singleton YOLO model instance with auto-download if needed."""
     global _model
     if _model is None:
-        try:
-            # Auto-download model if it doesn't exist
-            if not os.path.exists(MODEL_PATH):
-                logger.warning(f"YOLO model not found at {MODEL_PATH}")
-                download_model()
-            
-            _model = YOLO(MODEL_PATH)
-            logger.info("✅ YOLO model loaded successfully.")
-        except Exception as e:
-            logger.error(f"Error loading YOLO model from {MODEL_PATH}: {e}")
-            raise RuntimeError("YOLO model could not be loaded.") from e
+        with _model_lock:
+            if _model is None:
+                try:
+                    # Auto-download model if it doesn't exist
+                    if not os.path.exists(MODEL_PATH):
+                        logger.warning(f"YOLO model not found at {MODEL_PATH}")
+                        download_model()
+                    
+                    _model = YOLO(MODEL_PATH)
+                    logger.info("✅ YOLO model loaded successfully.")
+                except Exception as e:
+                    logger.error(f"Error loading YOLO model from {MODEL_PATH}: {e}")
+                    raise RuntimeError("YOLO model could not be loaded.") from e
     return _model
 
 
@@ -73,3 +79,31 @@ def run_yolo_inference(image_list: List[Image.Image]) -> List[Dict[str, Any]]:
     model = get_model()
     yolo_results = model(image_list)
     return yolo_results
+
+
+async def batch_pages(
+    pages: AsyncIterator[Tuple[int, Image.Image]],
+    batch_size: int = DEFAULT_YOLO_BATCH_SIZE,
+) -> AsyncIterator[List[Tuple[int, Image.Image]]]:
+    """
+    Group a stream of pages into batches for YOLO inference, one forward pass per batch.
+
+    Args:
+        pages: (page index, image) pairs in document order, as they are rendered
+        batch_size: Number of pages per forward pass
+
+    Yields:
+        Lists of up to batch_size (page index, image) pairs; a batch is yielded
+        as soon as it is full, and the last one may be shorter
+    """
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+
+    batch = []
+    async for page_idx, image in pages:
+        batch.append((page_idx, image))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the semantic chunking pipeline with stubbed YOLO, OCR and LLM.
+
+Runs semantic_chunking_with_semaphore (layout detection, extraction, boundary
+detection and grouping) on synthetic pages without the YOLO model, tesseract or
+an OpenAI key:
+
+- YOLO: run_yolo_inference is replaced by a stub returning synthetic boxes
+  (a title, text blocks, a table and a picture per page)
+- OCR: a "benchmark" OCR backend returning fixed text is registered and selected
+- LLM: a local OpenAI-compatible server (OPENAI_BASE_URL) answers table, picture
+  and boundary requests, with configurable latency and injected 429s
+
+Stub latencies are drawn from seeded distributions, so runs are repeatable:
+    0.05                 fixed 50 ms
+    uniform:0.02,0.2     uniform between 20 and 200 ms
+    lognormal:0.5,0.6    lognormal with a 500 ms median and sigma 0.6
+    exp:0.3              exponential with a 300 ms mean
+
+For every combination of --pages and --concurrency (max_concurrent_calls) it
+reports pages/sec, the time until the first page is extracted, the time to the
+first chunk (chunks are returned together once grouping is done, so this is the
+document latency) and the lag of the event loop running the pipeline. The JSON
+output also holds the stage timings of every run, as process() reports them.
+
+Usage:
+    python benchmarks/semantic_pipeline.py
+    python benchmarks/semantic_pipeline.py --pages 8 32 --concurrency 1 4 16 --llm-latency lognormal:0.8,0.5
+    python benchmarks/semantic_pipeline.py --rate-limit-rate 0.1 --server-max-concurrency 8 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from aiohttp import web
+from PIL import Image
+
+import Unsiloed.utils.chunking as chunking
+from Unsiloed.utils.chunking import ChunkingConfig
+from Unsiloed.utils.metrics import track_llm_usage, track_stage_timings
+from Unsiloed.utils.ocr_backends import OCRBackend, register_ocr_backend, set_default_ocr_backend
+from Unsiloed.utils.openai import close_openai_clients, configure_llm_cache
+from Unsiloed.utils.rate_limiter import configure_rate_limiter
+
+STUB_OCR_TEXT = (
+    "The quarterly report summarises revenue, operating costs and the outlook for "
+    "the next period across all business units."
+)
+
+# Synthetic layout of a page as (class name, box as fractions of the page size)
+PAGE_LAYOUT = [
+    ("Title", (0.10, 0.05, 0.90, 0.09)),
+    ("Text", (0.10, 0.11, 0.90, 0.22)),
+    ("Text", (0.10, 0.24, 0.90, 0.35)),
+    ("Table", (0.10, 0.37, 0.90, 0.55)),
+    ("Section-header", (0.10, 0.57, 0.60, 0.60)),
+    ("Text", (0.10, 0.62, 0.90, 0.72)),
+    ("Picture", (0.10, 0.74, 0.55, 0.92)),
+    ("Caption", (0.57, 0.80, 0.90, 0.86)),
+]
+CLASS_NAMES = {index: name for index, name in enumerate(sorted({name for name, _ in PAGE_LAYOUT}))}
+CLASS_IDS = {name: index for index, name in CLASS_NAMES.items()}
+
+
+class Latency:
+    """A latency distribution parsed from 'fixed:S', 'uniform:A,B', 'lognormal:MEDIAN,SIGMA' or 'exp:MEAN'."""
+
+    def __init__(self, spec, seed=0):
+        self.spec = spec
+        kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        try:
+            values = [float(value) for value in params.split(",")]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid latency: {spec}")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "exp": 1}
+        if kind not in expected or len(values) != expected[kind] or min(values) < 0:
+            raise argparse.ArgumentTypeError(f"Invalid latency: {spec}")
+        self.kind, self.values = kind, values
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.kind == "fixed":
+                return self.values[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(*self.values)
+            if self.kind == "lognormal":
+                median, sigma = self.values
+                return self._rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+            return self._rng.expovariate(1 / self.values[0]) if self.values[0] > 0 else 0.0
+
+    def __repr__(self):
+        return self.spec
+
+
+class _Boxes:
+    """The parts of ultralytics' Boxes read by the extraction step."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = xyxy, conf, cls
+
+    def __len__(self):
+        return len(self.xyxy)
+
+
+class _YOLOResult:
+    names = CLASS_NAMES
+
+    def __init__(self, width, height):
+        self.boxes = _Boxes(
+            np.array([[x1 * width, y1 * height, x2 * width, y2 * height]
+                      for _, (x1, y1, x2, y2) in PAGE_LAYOUT], dtype=np.float32),
+            np.full(len(PAGE_LAYOUT), 0.9, dtype=np.float32),
+            np.array([CLASS_IDS[name] for name, _ in PAGE_LAYOUT]),
+        )
+
+    def __len__(self):
+        return len(self.boxes)
+
+
+def make_yolo_stub(latency):
+    """A run_yolo_inference replacement: one latency sample per batch, synthetic boxes per page."""
+    def run_yolo_inference(image_list):
+        time.sleep(latency.sample())
+        return [_YOLOResult(*image.size) for image in image_list]
+    return run_yolo_inference
+
+
+def make_ocr_backend(latency):
+    """An OCR backend class returning fixed text after a latency sample."""
+    class BenchmarkOCRBackend(OCRBackend):
+        name = "benchmark"
+
+        def image_to_string(self, image):
+            time.sleep(latency.sample())
+            return STUB_OCR_TEXT
+
+        def image_to_words(self, image):
+            # A grid of words covering the page, so every region gets some text
+            time.sleep(latency.sample())
+            words = []
+            width, height = image.size
+            for line_num, y in enumerate(range(10, height - 30, 40), start=1):
+                for word_num, x in enumerate(range(10, width - 100, 120), start=1):
+                    words.append({
+                        'text': STUB_OCR_TEXT.split()[(line_num + word_num) % len(STUB_OCR_TEXT.split())],
+                        'bbox': [x, y, x + 100, y + 30],
+                        'conf': 95.0,
+                        'block_num': 1,
+                        'par_num': 1,
+                        'line_num': line_num,
+                        'word_num': word_num,
+                    })
+            return words
+
+    return BenchmarkOCRBackend
+
+
+class StubOpenAIServer:
+    """
+    OpenAI-compatible stand-in serving /v1/models and /v1/chat/completions.
+
+    Runs its own event loop on a background thread so that serving requests does
+    not add to the lag of the pipeline's loop.
+    """
+
+    def __init__(self, latency, rate_limit_rate=0.0, retry_after=0.5, max_concurrency=None, seed=0):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_concurrency = max_concurrency
+        self._rng = random.Random(seed)
+        self._in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.base_url = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def start(self):
+        started = threading.Event()
+
+        async def serve():
+            app = web.Application()
+            app.router.add_get("/v1/models", self._models)
+            app.router.add_post("/v1/chat/completions", self._chat_completions)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+            host, port = self._runner.addresses[0][:2]
+            self.base_url = f"http://{host}:{port}/v1"
+            started.set()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="stub-openai-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def reset_counters(self):
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def _models(self, request):
+        return web.json_response({"object": "list", "data": [
+            {"id": ChunkingConfig.OPENAI_MODEL, "object": "model", "created": 0, "owned_by": "benchmark"}
+        ]})
+
+    async def _chat_completions(self, request):
+        body = await request.json()
+        self.requests += 1
+        overloaded = self.max_concurrency is not None and self._in_flight >= self.max_concurrency
+        if overloaded or self._rng.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after-ms": str(int(self.retry_after * 1000))},
+            )
+
+        self._in_flight += 1
+        try:
+            await asyncio.sleep(self.latency.sample())
+        finally:
+            self._in_flight -= 1
+
+        content = self._answer(body)
+        prompt_tokens = len(json.dumps(body["messages"])) // 4
+        completion_tokens = len(content) // 4
+        return web.json_response({
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ChunkingConfig.OPENAI_MODEL),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _answer(self, body):
+        if body.get("response_format", {}).get("type") != "json_object":
+            return "Stub description of the region: three columns, four rows of quarterly figures."
+
+        user_prompt = body["messages"][-1]["content"]
+        gaps = re.search(r"boundaries for the (\d+) gaps", user_prompt)
+        if gaps:
+            return json.dumps({"boundaries": [
+                {"index": gap, "should_split": gap % 4 == 3, "confidence": 0.9,
+                 "reasoning": "stub", "boundary_type": "minor" if gap % 4 == 3 else "none"}
+                for gap in range(int(gaps.group(1)))
+            ]})
+        should_split = self._rng.random() < 0.25
+        return json.dumps({"should_split": should_split, "confidence": 0.9, "reasoning": "stub",
+                           "boundary_type": "minor" if should_split else "none"})
+
+
+async def _monitor_loop_lag(samples, interval):
+    """Record how late the event loop wakes up from sleeps of `interval` seconds."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_pipeline(images, max_concurrent_calls, args, lag_interval=0.005):
+    """Run the semantic pipeline on its own loop, timing the first extracted page and the loop lag."""
+    lag_samples = []
+    first_page = []
+    start = time.perf_counter()
+    extract_page = chunking._extract_bbox_results_for_grouping_with_semaphore
+
+    async def timed_extract_page(*extract_args, **extract_kwargs):
+        result = await extract_page(*extract_args, **extract_kwargs)
+        if not first_page:
+            first_page.append(time.perf_counter() - start)
+        return result
+
+    chunking._extract_bbox_results_for_grouping_with_semaphore = timed_extract_page
+    monitor = asyncio.ensure_future(_monitor_loop_lag(lag_samples, lag_interval))
+    try:
+        chunks = await chunking._semantic_chunking_on_own_loop(
+            images, max_concurrent_calls, args.yolo_batch_size, args.ocr_mode, args.boundary_mode,
+            args.boundary_cascade, None
+        )
+    finally:
+        monitor.cancel()
+        chunking._extract_bbox_results_for_grouping_with_semaphore = extract_page
+    elapsed = time.perf_counter() - start
+    return chunks, elapsed, (first_page[0] if first_page else None), lag_samples
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _format_seconds(seconds):
+    return f"{seconds:.2f}s" if seconds is not None else "-"
+
+
+def run_configuration(page_count, max_concurrent_calls, server, args):
+    images = [Image.new("RGB", (args.page_width, args.page_height), "white") for _ in range(page_count)]
+    # Every run starts from a fresh rate limiter, so AIMD state does not carry over
+    limiter = configure_rate_limiter()
+    server.reset_counters()
+
+    with track_llm_usage() as usage, track_stage_timings() as timings:
+        chunks, elapsed, first_page, lag = asyncio.run(run_pipeline(images, max_concurrent_calls, args))
+
+    llm_usage = usage.summary()
+    return {
+        "pages": page_count,
+        "max_concurrent_calls": max_concurrent_calls,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(page_count / elapsed, 3),
+        "first_page_seconds": round(first_page, 4) if first_page is not None else None,
+        "first_chunk_seconds": round(elapsed, 4) if chunks else None,
+        "chunks": len(chunks),
+        "loop_lag_p50_ms": round(_percentile(lag, 0.5) * 1000, 2),
+        "loop_lag_p99_ms": round(_percentile(lag, 0.99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lag, default=0.0) * 1000, 2),
+        "llm_calls": llm_usage["calls"],
+        "llm_failed_calls": llm_usage["failed_calls"],
+        "server_requests": server.requests,
+        "server_429s": server.rate_limited,
+        "final_concurrency_limit": limiter.concurrency_limit,
+        "timings": dict(timings.summary(), total_wall_seconds=round(elapsed, 4)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 16], help="Page counts to sweep")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 15],
+                        help="max_concurrent_calls values to sweep")
+    parser.add_argument("--yolo-latency", type=Latency, default=Latency("0.05"), help="Latency per YOLO batch")
+    parser.add_argument("--ocr-latency", type=Latency, default=Latency("0.01"), help="Latency per OCR call")
+    parser.add_argument("--llm-latency", type=Latency, default=Latency("lognormal:0.3,0.5"),
+                        help="Latency per chat completion")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of chat completions answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After of injected 429s in seconds")
+    parser.add_argument("--server-max-concurrency", type=int,
+                        help="Answer 429 while this many completions are in flight")
+    parser.add_argument("--yolo-batch-size", type=int, default=ChunkingConfig.DEFAULT_YOLO_BATCH_SIZE)
+    parser.add_argument("--ocr-mode", choices=ChunkingConfig.OCR_MODES, default=ChunkingConfig.DEFAULT_OCR_MODE)
+    parser.add_argument("--boundary-mode", choices=ChunkingConfig.BOUNDARY_MODES,
+                        default=ChunkingConfig.DEFAULT_BOUNDARY_MODE)
+    parser.add_argument("--boundary-cascade", action="store_true", help="Settle clear boundaries locally first")
+    parser.add_argument("--page-width", type=int, default=1275, help="Synthetic page width in pixels")
+    parser.add_argument("--page-height", type=int, default=1650, help="Synthetic page height in pixels")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # The pipeline logs every element at INFO level
+    logging.disable(logging.INFO)
+
+    server = StubOpenAIServer(
+        args.llm_latency, args.rate_limit_rate, args.retry_after, args.server_max_concurrency
+    ).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    configure_llm_cache(None)
+
+    chunking.run_yolo_inference = make_yolo_stub(args.yolo_latency)
+    register_ocr_backend("benchmark", make_ocr_backend(args.ocr_latency))
+    set_default_ocr_backend("benchmark")
+
+    print(f"Stub latencies: YOLO {args.yolo_latency}/batch, OCR {args.ocr_latency}/call, "
+          f"LLM {args.llm_latency}/call; 429 rate {args.rate_limit_rate:.0%}")
+    print(f"{'pages':>5} {'conc':>5} {'seconds':>8} {'pages/s':>8} {'1st page':>9} {'1st chunk':>9} "
+          f"{'lag p99':>8} {'lag max':>8} {'LLM':>5} {'429s':>5} {'chunks':>6}")
+
+    results = []
+    try:
+        for page_count in args.pages:
+            for max_concurrent_calls in args.concurrency:
+                result = run_configuration(page_count, max_concurrent_calls, server, args)
+                results.append(result)
+                print(f"{page_count:>5} {max_concurrent_calls:>5} {result['seconds']:>8.2f} "
+                      f"{result['pages_per_sec']:>8.2f} "
+                      f"{_format_seconds(result['first_page_seconds']):>9} "
+                      f"{_format_seconds(result['first_chunk_seconds']):>9} "
+                      f"{result['loop_lag_p99_ms']:>6.1f}ms {result['loop_lag_max_ms']:>6.1f}ms "
+                      f"{result['llm_calls']:>5} {result['server_429s']:>5} {result['chunks']:>6}")
+    finally:
+        close_openai_clients()
+        server.stop()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "settings": {
+                    "yolo_latency": args.yolo_latency.spec,
+                    "ocr_latency": args.ocr_latency.spec,
+                    "llm_latency": args.llm_latency.spec,
+                    "rate_limit_rate": args.rate_limit_rate,
+                    "retry_after": args.retry_after,
+                    "server_max_concurrency": args.server_max_concurrency,
+                    "yolo_batch_size": args.yolo_batch_size,
+                    "ocr_mode": args.ocr_mode,
+                    "boundary_mode": args.boundary_mode,
+                    "boundary_cascade": args.boundary_cascade,
+                    "page_size": [args.page_width, args.page_height],
+                },
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
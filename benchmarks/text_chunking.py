@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks for the text chunking strategies.
+
+Runs fixed_size_chunking, paragraph_chunking, heading_chunking,
+_analyze_markdown_reading_order, _analyze_json_structure and
+_enhanced_text_semantic_chunking on generated plain text, Markdown and JSON
+inputs of increasing size, and reports throughput (MB/s of input) and peak
+Python memory (tracemalloc). No API key, model or network access is needed.
+
+Throughput is the best of at least --repeat timed runs without tracing (small
+inputs are repeated more); peak memory is measured in one extra run under
+tracemalloc, which is slower.
+
+Results can be written as a JSON baseline and compared against one, so
+performance regressions show up as a diff before release. Peak memory is
+deterministic for a given input; throughput is only comparable with a baseline
+recorded on the same machine.
+
+Usage:
+    python benchmarks/text_chunking.py
+    python benchmarks/text_chunking.py --sizes 10KB 1MB 100MB 500MB --json results.json
+    python benchmarks/text_chunking.py --compare benchmarks/baselines/text_chunking.json
+    python benchmarks/text_chunking.py --only fixed_size_chunking paragraph_chunking
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Unsiloed.utils.chunking import (
+    fixed_size_chunking,
+    paragraph_chunking,
+    heading_chunking,
+    _analyze_markdown_reading_order,
+    _analyze_json_structure,
+    _enhanced_text_semantic_chunking,
+)
+
+DEFAULT_SIZES = ["10KB", "100KB", "1MB", "10MB"]
+MIN_TIMED_SECONDS = 0.5
+MAX_RUNS = 200
+
+WORDS = (
+    "document layout parser chunk semantic boundary table figure caption section "
+    "analysis model page reading order text paragraph heading summary result data "
+    "value structure method approach system performance memory throughput latency "
+    "the of and to in for with on as by from at that this which is are was were be"
+).split()
+
+_SIZE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?$", re.IGNORECASE)
+_SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(value):
+    """Parse '10KB', '1.5MB', '500MB' or a plain byte count."""
+    match = _SIZE_PATTERN.match(value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[(match.group(2) or "B").upper()])
+
+
+def format_size(size_bytes):
+    for unit in ("GB", "MB", "KB"):
+        if size_bytes >= _SIZE_UNITS[unit]:
+            return f"{size_bytes / _SIZE_UNITS[unit]:g}{unit}"
+    return f"{size_bytes}B"
+
+
+def _paragraph_pool(rng, count=256):
+    """Distinct paragraphs that generated documents are assembled from."""
+    pool = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        pool.append(" ".join(sentences))
+    return pool
+
+
+def generate_text(size_bytes, seed=0):
+    """Plain text paragraphs separated by blank lines, with occasional numbered headings."""
+    rng = random.Random(seed)
+    pool = _paragraph_pool(rng)
+    parts = []
+    total = 0
+    section = 0
+    while total < size_bytes:
+        if rng.random() < 0.1:
+            section += 1
+            part = f"{section}. Section Overview"
+        else:
+            part = pool[rng.randrange(len(pool))]
+        parts.append(part)
+        total += len(part) + 2
+    return "\n\n".join(parts)[:size_bytes]
+
+
+def generate_markdown(size_bytes, seed=0):
+    """Markdown with nested headings, paragraphs, lists and fenced code blocks."""
+    rng = random.Random(seed)
+    pool = _paragraph_pool(rng)
+    parts = []
+    total = 0
+    section = 0
+    while total < size_bytes:
+        section += 1
+        block = [f"{'#' * rng.randint(1, 3)} Section {section}", ""]
+        for _ in range(rng.randint(1, 4)):
+            block += [pool[rng.randrange(len(pool))], ""]
+        if rng.random() < 0.5:
+            block += [f"- {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(rng.randint(2, 6))] + [""]
+        if rng.random() < 0.2:
+            block += ["```python", f"value = compute({section})", "```", ""]
+        part = "\n".join(block)
+        parts.append(part)
+        total += len(part) + 1
+    return "\n".join(parts)[:size_bytes]
+
+
+def generate_json(size_bytes, seed=0):
+    """A JSON document of records with nested objects and arrays."""
+    rng = random.Random(seed)
+    records = []
+    total = 2
+    while total < size_bytes:
+        record = {
+            "id": len(records),
+            "title": " ".join(rng.choice(WORDS) for _ in range(5)),
+            "score": round(rng.random(), 4),
+            "tags": [rng.choice(WORDS) for _ in range(rng.randint(1, 4))],
+            "author": {"name": rng.choice(WORDS).title(), "active": rng.random() < 0.5},
+            "body": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 30))),
+        }
+        records.append(record)
+        total += len(json.dumps(record)) + 2
+    return json.dumps({"records": records})
+
+
+# name -> (input kind, default maximum size, function(input) -> result).
+# Benchmarks are skipped above their maximum size unless --no-size-limits is given.
+BENCHMARKS = {
+    "fixed_size_chunking": ("text", parse_size("500MB"), lambda text: fixed_size_chunking(text, 1000, 100)),
+    "paragraph_chunking": ("text", parse_size("500MB"), lambda text: paragraph_chunking(text, "text")),
+    "heading_chunking[text]": ("text", parse_size("500MB"), lambda text: heading_chunking(text, "text")),
+    "heading_chunking[markdown]": (
+        "markdown", parse_size("500MB"), lambda text: heading_chunking(text, "markdown")
+    ),
+    "_analyze_markdown_reading_order": ("markdown", parse_size("500MB"), _analyze_markdown_reading_order),
+    # Holds the parsed tree and every segment at once (~50x the input size)
+    "_analyze_json_structure": (
+        "json", parse_size("50MB"), lambda parsed: _analyze_json_structure(parsed[0], parsed[1])
+    ),
+    "_enhanced_text_semantic_chunking": ("text", parse_size("500MB"), _enhanced_text_semantic_chunking),
+}
+
+GENERATORS = {
+    "text": generate_text,
+    "markdown": generate_markdown,
+    "json": generate_json,
+}
+
+
+def make_input(kind, size_bytes):
+    """Generate an input and return (benchmark argument, input size in bytes)."""
+    text = GENERATORS[kind](size_bytes)
+    if kind == "json":
+        # Parsing is not part of _analyze_json_structure and is done up front
+        return (json.loads(text), text), len(text)
+    return text, len(text)
+
+
+def time_run(func, arg):
+    start = time.perf_counter()
+    result = func(arg)
+    return time.perf_counter() - start, len(result)
+
+
+def peak_memory_run(func, arg):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def run_benchmarks(names, sizes, repeat, measure_memory, size_limits=True):
+    results = []
+    for name in names:
+        kind, max_size, func = BENCHMARKS[name]
+        for size in sizes:
+            if size_limits and size > max_size:
+                print(f"{name:<34} {format_size(size):>7}  skipped (above {format_size(max_size)})")
+                continue
+
+            arg, input_bytes = make_input(kind, size)
+            # Small inputs are repeated until MIN_TIMED_SECONDS have been spent, so the
+            # best run is stable; large inputs take long enough that one run is
+            runs = repeat if size <= parse_size("10MB") else 1
+            gc.collect()
+            timings = []
+            while len(timings) < runs or (
+                sum(seconds for seconds, _ in timings) < MIN_TIMED_SECONDS and len(timings) < MAX_RUNS
+            ):
+                timings.append(time_run(func, arg))
+            seconds = min(seconds for seconds, _ in timings)
+            chunks = timings[0][1]
+            peak = peak_memory_run(func, arg) if measure_memory else None
+            del arg
+
+            result = {
+                "benchmark": name,
+                "input": kind,
+                "size": format_size(size),
+                "input_bytes": input_bytes,
+                "seconds": round(seconds, 6),
+                "mb_per_sec": round(input_bytes / (1024 ** 2) / seconds, 3) if seconds > 0 else None,
+                "peak_memory_mb": round(peak / (1024 ** 2), 3) if peak is not None else None,
+                "outputs": chunks,
+            }
+            results.append(result)
+            memory = f"{result['peak_memory_mb']:>10.2f}" if peak is not None else f"{'-':>10}"
+            print(f"{name:<34} {result['size']:>7} {seconds:>10.4f} {result['mb_per_sec']:>10.2f} "
+                  f"{memory} {chunks:>9}")
+    return results
+
+
+def compare(results, baseline_path, tolerance, memory_tolerance):
+    """Print throughput and memory changes against a baseline; return the number of regressions."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+
+    regressions = 0
+    print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%} throughput, "
+          f"{memory_tolerance:.0%} memory)")
+    print(f"{'benchmark':<34} {'size':>7} {'MB/s':>10} {'change':>8} {'peak MB':>10} {'change':>8}")
+    for result in results:
+        old = previous.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        throughput_change = result["mb_per_sec"] / old["mb_per_sec"] - 1 if old.get("mb_per_sec") else 0.0
+        memory_change = (
+            result["peak_memory_mb"] / old["peak_memory_mb"] - 1
+            if result["peak_memory_mb"] is not None and old.get("peak_memory_mb") else 0.0
+        )
+        regressed = throughput_change < -tolerance or memory_change > memory_tolerance
+        regressions += int(regressed)
+        memory = f"{result['peak_memory_mb']:>10.2f}" if result["peak_memory_mb"] is not None else f"{'-':>10}"
+        print(f"{result['benchmark']:<34} {result['size']:>7} {result['mb_per_sec']:>10.2f} "
+              f"{throughput_change:>+8.1%} {memory} {memory_change:>+8.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help="Input sizes, e.g. 10KB 1MB 500MB (default: %(default)s bytes)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Minimum timed runs per input up to 10MB (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory run")
+    parser.add_argument("--no-size-limits", action="store_true",
+                        help="Run benchmarks above their default maximum input size")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="Compare results with this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative throughput drop reported as a regression")
+    parser.add_argument("--memory-tolerance", type=float, default=0.05,
+                        help="Relative peak memory growth reported as a regression")
+    args = parser.parse_args()
+
+    # The chunkers log every call at INFO level
+    logging.disable(logging.INFO)
+
+    names = args.only or list(BENCHMARKS)
+    print(f"{'benchmark':<34} {'size':>7} {'seconds':>10} {'MB/s':>10} {'peak MB':>10} {'outputs':>9}")
+    results = run_benchmarks(names, args.sizes, args.repeat, not args.no_memory, not args.no_size_limits)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "processor": platform.processor() or platform.machine(),
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print(f"\n{regressions} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
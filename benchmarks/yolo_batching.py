@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched vs per-page YOLO layout detection.
+
+Compares pages/sec when every page gets its own forward pass (the previous
+behaviour of the semantic pipeline) against the pipeline's batching, where
+batch_pages groups the page stream and each batch is one forward pass, with
+one or more batch sizes. Runs on CPU by default.
+
+Usage:
+    python benchmarks/yolo_batching.py --pages 32 --batch-sizes 4 8 16
+    python benchmarks/yolo_batching.py --pdf document.pdf --batch-sizes 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from Unsiloed.utils.yolo_model_utils import batch_pages, get_model, run_yolo_inference
+
+
+def make_synthetic_pages(page_count, width=1700, height=2200):
+    """Create letter-sized (200 DPI) pages with a title, text blocks and a table-like grid."""
+    pages = []
+    for page_idx in range(page_count):
+        page = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(page)
+        draw.text((150, 120), f"Synthetic document page {page_idx + 1}", fill="black")
+        y = 250
+        for block in range(6):
+            for line in range(8):
+                draw.text((150, y), "Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 2, fill="black")
+                y += 24
+            y += 40
+            if block == 2:
+                for row in range(6):
+                    for col in range(4):
+                        x0, y0 = 150 + col * 350, y + row * 40
+                        draw.rectangle([x0, y0, x0 + 350, y0 + 40], outline="black")
+                        draw.text((x0 + 10, y0 + 10), f"cell {row}.{col}", fill="black")
+                y += 280
+        pages.append(page)
+    return pages
+
+
+def bench_per_page(pages):
+    """Time one forward pass per page."""
+    start = time.perf_counter()
+    for page in pages:
+        run_yolo_inference([page])
+    return time.perf_counter() - start
+
+
+async def _aiter_pages(pages):
+    for page_idx, page in enumerate(pages):
+        yield page_idx, page
+
+
+async def _detect_in_batches(pages, batch_size):
+    async for batch in batch_pages(_aiter_pages(pages), batch_size):
+        run_yolo_inference([page for _, page in batch])
+
+
+def bench_batched(pages, batch_size):
+    """Time batch_pages batching, as in the semantic pipeline, with the given batch size."""
+    start = time.perf_counter()
+    asyncio.run(_detect_in_batches(pages, batch_size))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=32, help="Number of synthetic pages")
+    parser.add_argument("--pdf", help="Benchmark on the pages of this PDF instead of synthetic pages")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=1, help="Repetitions per configuration (best is kept)")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.pdf:
+        from Unsiloed.utils.fileutils import pdf_to_images
+        pages = pdf_to_images(args.pdf)
+    else:
+        pages = make_synthetic_pages(args.pages)
+
+    model = get_model()
+    model.to("cpu")
+
+    # Warm up so model fusing and first-call allocations are not measured
+    run_yolo_inference(pages[:1])
+
+    results = []
+    per_page_time = min(bench_per_page(pages) for _ in range(args.repeat))
+    results.append({"mode": "per-page", "batch_size": 1, "seconds": per_page_time,
+                    "pages_per_sec": len(pages) / per_page_time})
+
+    for batch_size in args.batch_sizes:
+        batched_time = min(bench_batched(pages, batch_size) for _ in range(args.repeat))
+        results.append({"mode": "batched", "batch_size": batch_size, "seconds": batched_time,
+                        "pages_per_sec": len(pages) / batched_time})
+
+    print(f"YOLO layout detection on CPU, {len(pages)} pages")
+    print(f"{'mode':<10} {'batch':>5} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    for result in results:
+        speedup = per_page_time / result["seconds"]
+        print(f"{result['mode']:<10} {result['batch_size']:>5} {result['seconds']:>9.2f} "
+              f"{result['pages_per_sec']:>9.2f} {speedup:>7.2f}x")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"pages": len(pages), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for the non-blocking process() path.
+
+This script checks that process() leaves the event loop free while a document
+is being chunked, that process_document_chunking_async returns the same chunks
+as process_document_chunking, and that documents given by URL are downloaded
+with aiohttp. No API key is needed.
+"""
+
+import sys
+import os
+import time
+import socket
+import asyncio
+import tempfile
+
+from aiohttp import web
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed
+from Unsiloed.services.chunking import process_document_chunking, process_document_chunking_async
+from Unsiloed.utils.web_utils import aclose_async_http_sessions
+
+
+def _markdown(sections):
+    return "".join(
+        f"## Section {i}\n\nParagraph {i} " + "lorem ipsum dolor sit amet " * 20 + "\n\n"
+        for i in range(sections)
+    )
+
+
+def test_process_does_not_block_event_loop():
+    """Test that a ticker coroutine keeps running while process() chunks a large document."""
+    print("Testing event loop responsiveness...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_markdown(1500))
+
+        async def run():
+            gaps = []
+            finished = asyncio.Event()
+
+            async def ticker():
+                last = time.perf_counter()
+                while not finished.is_set():
+                    await asyncio.sleep(0.005)
+                    now = time.perf_counter()
+                    gaps.append(now - last)
+                    last = now
+
+            ticker_task = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            result = await Unsiloed.process({"filePath": path, "strategy": "heading"})
+            elapsed = time.perf_counter() - start
+            finished.set()
+            await ticker_task
+            return result, elapsed, gaps
+
+        result, elapsed, gaps = asyncio.run(run())
+
+    print(f"Processed in {elapsed:.2f}s, {len(gaps)} ticks, longest gap {max(gaps):.3f}s")
+    assert result["total_chunks"] == 1500
+    # A blocked loop would show a single gap as long as the whole document
+    assert len(gaps) >= 10
+    assert max(gaps) < elapsed / 2
+
+
+def test_async_matches_sync():
+    """Test that the async service path returns the same result as the sync one."""
+    print("\nTesting process_document_chunking_async...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_markdown(20))
+
+        for strategy in ("fixed", "paragraph", "heading", "page"):
+            sync_result = process_document_chunking(path, "markdown", strategy, 500, 50)
+            async_result = asyncio.run(process_document_chunking_async(path, "markdown", strategy, 500, 50))
+            print(f"{strategy}: {sync_result['total_chunks']} chunks")
+            assert async_result["chunks"] == sync_result["chunks"]
+            assert async_result["total_chunks"] == sync_result["total_chunks"]
+            assert set(async_result["timings"]["stages"]) == {"text_extraction", "chunking", "reading_order"}
+            # Stage work done on worker threads still reports its CPU time
+            assert async_result["timings"]["stages"]["chunking"]["cpu_seconds"] is not None
+            assert async_result["llm_usage"]["calls"] == 0
+
+
+def test_process_downloads_url():
+    """Test that a document URL is downloaded and chunked."""
+    print("\nTesting URL download...")
+
+    body = _markdown(5).encode("utf-8")
+
+    async def serve_document(request):
+        return web.Response(body=body, content_type="text/markdown")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/doc.md", serve_document)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            return await Unsiloed.process({"filePath": f"http://127.0.0.1:{port}/doc.md", "strategy": "heading"})
+        finally:
+            await aclose_async_http_sessions()
+            await runner.cleanup()
+
+    result = asyncio.run(run())
+    print(f"Chunks: {result['total_chunks']}, stages: {sorted(result['timings']['stages'])}")
+    assert result["file_type"] == "markdown"
+    assert result["total_chunks"] == 5
+    assert result["timings"]["stages"]["download"]["cpu_seconds"] is None
+
+
+def main():
+    """Run all tests."""
+    print("Testing Async Processing")
+    print("=" * 50)
+
+    try:
+        test_process_does_not_block_event_loop()
+        test_async_matches_sync()
+        test_process_downloads_url()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
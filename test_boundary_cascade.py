@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for the tiered semantic boundary cascade.
+
+This script checks that structural rules and lexical similarity settle the
+clear boundaries locally and that only ambiguous gaps reach the LLM. The
+OpenAI client is replaced by a local stub, so no API key is needed.
+"""
+
+import sys
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed.utils.chunking as chunking
+from Unsiloed.utils.chunking import _perform_openai_semantic_grouping_with_semaphore
+from Unsiloed.utils.lexical import adjacent_similarities
+
+CATS_1 = ("Domestic cats are small carnivorous mammals. Cats hunt mice and birds, "
+          "sleep most of the day and groom their fur. Many cats live indoors with families.")
+CATS_2 = ("Indoor cats sleep most of the day, groom their fur and hunt toy mice. "
+          "Families with cats should give domestic cats space to hunt and play.")
+BONDS = ("Government bond yields rose after the central bank raised interest rates, "
+         "pushing mortgage costs higher and weighing on equity valuations this quarter.")
+
+
+class _StubCompletions:
+    """Records the next-element text of every pairwise prompt and never splits; fails for failing_text."""
+
+    def __init__(self, failing_text=None):
+        self.asked = []
+        self.failing_text = failing_text
+
+    async def create(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        next_text = prompt.split("NEXT TEXT ELEMENT:\n", 1)[1].split("\n", 1)[0]
+        self.asked.append(next_text)
+        if next_text == self.failing_text:
+            raise RuntimeError("bad response")
+        message = SimpleNamespace(content=json.dumps({"should_split": False, "confidence": 0.9}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _element(i, text, element_type='Text'):
+    return {
+        'content': text,
+        'metadata': {
+            'page_number': 1,
+            'reading_order_index': i,
+            'element_type': element_type,
+            'content_type': 'heading' if element_type == 'Title' else 'text',
+            'confidence': 0.9,
+            'bbox': [0, i * 10, 100, i * 10 + 8],
+            'reading_order': f"page_1_element_{i}",
+        },
+    }
+
+
+def test_adjacent_similarities():
+    """Test that related texts score higher than unrelated ones."""
+    print("Testing lexical similarity...")
+
+    similarities = adjacent_similarities([CATS_1, CATS_2, BONDS, ""])
+    print(f"Similarities: {[round(float(x), 3) for x in similarities]}")
+
+    assert len(similarities) == 3
+    assert similarities[0] > 0.35
+    assert similarities[1] < 0.02
+    assert similarities[2] == 0.0
+
+
+def test_cascade_sends_only_ambiguous_gaps_to_llm():
+    """Test tier counts and that settled gaps never reach the LLM."""
+    print("\nTesting boundary cascade...")
+
+    elements = [
+        _element(0, "About cats", 'Title'),
+        _element(1, CATS_1),
+        _element(2, CATS_2),
+        _element(3, BONDS),
+        _element(4, "See table"),
+        _element(5, "Markets", 'Title'),
+    ]
+    completions = _StubCompletions()
+    stub_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    original = (chunking.get_openai_client, chunking.get_async_openai_client)
+    chunking.get_openai_client = lambda: stub_client
+    chunking.get_async_openai_client = lambda: stub_client
+    try:
+        stats = {}
+        chunks = asyncio.run(_perform_openai_semantic_grouping_with_semaphore(
+            elements, boundary_cascade=True, boundary_stats=stats
+        ))
+    finally:
+        chunking.get_openai_client, chunking.get_async_openai_client = original
+
+    print(f"Tier counts: {stats}, LLM asked about: {completions.asked}")
+    # Gap 4 (before a Title) is structural; gaps 1 and 2 are lexical; gap 0
+    # ("About cats" is too short to compare) and gap 3 ("See table") go to the LLM
+    assert stats == {'structural': 1, 'lexical': 2, 'llm': 2, 'reused': 0, 'fallback': 0}
+    assert completions.asked == [CATS_1, "See table"]
+    assert [c['text'] for c in chunks] == [
+        f"About cats {CATS_1} {CATS_2}",
+        f"{BONDS} See table",
+        "Markets",
+    ]
+
+
+def test_failed_llm_decisions_count_as_fallback():
+    """Test that heuristic decisions after a failed LLM call are not counted as LLM decisions."""
+    print("\nTesting fallback tier counts...")
+
+    elements = [_element(0, "About cats", 'Title'), _element(1, CATS_1), _element(2, "See table")]
+    completions = _StubCompletions(failing_text="See table")
+    stub_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    original = (chunking.get_openai_client, chunking.get_async_openai_client)
+    chunking.get_openai_client = lambda: stub_client
+    chunking.get_async_openai_client = lambda: stub_client
+    try:
+        stats = {}
+        asyncio.run(_perform_openai_semantic_grouping_with_semaphore(
+            elements, boundary_cascade=True, boundary_stats=stats
+        ))
+    finally:
+        chunking.get_openai_client, chunking.get_async_openai_client = original
+
+    print(f"Tier counts: {stats}")
+    assert stats['llm'] == 1 and stats['fallback'] == 1
+
+
+def main():
+    """Run all tests."""
+    print("Testing Boundary Cascade")
+    print("=" * 50)
+
+    try:
+        test_adjacent_similarities()
+        test_cascade_sends_only_ambiguous_gaps_to_llm()
+        test_failed_llm_decisions_count_as_fallback()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for windowed semantic boundary detection.
+
+This script checks window planning, reconciliation of overlapping windows and
+that window mode needs far fewer LLM calls than pairwise mode. The OpenAI
+client is replaced by a local stub, so no API key is needed.
+"""
+
+import sys
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed.utils.chunking as chunking
+from Unsiloed.utils.chunking import (
+    ChunkingConfig,
+    _plan_boundary_windows,
+    _reconcile_window_decisions,
+    _perform_openai_semantic_grouping_with_semaphore,
+)
+
+
+class _StubCompletions:
+    """Answers boundary prompts: a split before every element whose text starts with 'Topic'."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, messages, **kwargs):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        if "boundaries" in messages[0]["content"]:
+            blocks = prompt.split("\n\n")[1:]
+            texts = [block.split("\n", 1)[1] for block in blocks]
+            content = {"boundaries": [
+                {"index": i, "should_split": texts[i + 1].startswith("Topic"), "confidence": 0.9}
+                for i in range(len(texts) - 1)
+            ]}
+        else:
+            next_text = prompt.split("NEXT TEXT ELEMENT:\n", 1)[1].split("\n", 1)[0]
+            content = {"should_split": next_text.startswith("Topic"), "confidence": 0.9}
+        message = SimpleNamespace(content=json.dumps(content))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _elements(count, topic_every=7):
+    return [
+        {
+            'content': f"Topic {i}" if i % topic_every == 0 else f"Body text {i}",
+            'metadata': {
+                'page_number': 1,
+                'reading_order_index': i,
+                'element_type': 'Text',
+                'content_type': 'text',
+                'confidence': 0.9,
+                'bbox': [0, i * 10, 100, i * 10 + 8],
+                'reading_order': f"page_1_element_{i}",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def _run_grouping(elements, boundary_mode):
+    completions = _StubCompletions()
+    stub_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    chunking.get_openai_client = lambda: stub_client
+    chunking.get_async_openai_client = lambda: stub_client
+    chunks = asyncio.run(_perform_openai_semantic_grouping_with_semaphore(
+        elements, max_concurrent_calls=4, boundary_mode=boundary_mode
+    ))
+    return chunks, completions.calls
+
+
+def test_windows_cover_every_gap():
+    """Test that planned windows cover every gap and overlap as configured."""
+    print("Testing window planning...")
+
+    for count in (2, 5, 12, 13, 40, 101):
+        starts = _plan_boundary_windows(count, window_size=12, overlap=4)
+        covered = set()
+        for start in starts:
+            covered.update(range(start, min(start + 12, count) - 1))
+        assert covered == set(range(count - 1)), f"gaps not covered for {count} elements"
+        print(f"{count} elements -> {len(starts)} windows")
+
+    assert _plan_boundary_windows(1, 12, 4) == []
+    assert _plan_boundary_windows(40, 12, 4)[:3] == [0, 8, 16]
+
+
+def test_reconcile_prefers_window_interior():
+    """Test that a gap decided by two windows keeps the decision made away from the edge."""
+    print("\nTesting window reconciliation...")
+
+    edge = {'should_split': True, 'confidence': 0.6}
+    interior = {'should_split': False, 'confidence': 0.8}
+    # Gap 7 is the last gap of window [0, 8) and the third gap of window [5, 13)
+    merged = _reconcile_window_decisions([
+        (0, 8, {6: {'should_split': False}, 5: {'should_split': False}}),
+        (5, 8, {2: interior}),
+    ])
+    merged_edge = _reconcile_window_decisions([(0, 9, {7: edge}), (5, 8, {2: interior})])
+
+    assert merged[7] is interior
+    assert merged_edge[7] is interior
+    assert set(merged) == {5, 6, 7}
+
+
+def test_window_mode_matches_pairwise_with_fewer_calls():
+    """Test that window mode finds the same groups as pairwise mode with far fewer calls."""
+    print("\nTesting window vs pairwise boundary detection...")
+
+    original = (chunking.get_openai_client, chunking.get_async_openai_client)
+    try:
+        elements = _elements(100)
+        pairwise_chunks, pairwise_calls = _run_grouping(elements, "pairwise")
+        window_chunks, window_calls = _run_grouping(elements, "window")
+    finally:
+        chunking.get_openai_client, chunking.get_async_openai_client = original
+
+    print(f"Pairwise: {pairwise_calls} calls, window: {window_calls} calls")
+    assert pairwise_calls == 99
+    assert window_calls == len(_plan_boundary_windows(
+        100, ChunkingConfig.BOUNDARY_WINDOW_SIZE, ChunkingConfig.BOUNDARY_WINDOW_OVERLAP
+    ))
+    assert window_calls * 5 < pairwise_calls
+    assert [c['text'] for c in window_chunks] == [c['text'] for c in pairwise_chunks]
+    assert len(window_chunks) == 15
+
+
+def main():
+    """Run all tests."""
+    print("Testing Windowed Boundary Detection")
+    print("=" * 50)
+
+    try:
+        test_windows_cover_every_gap()
+        test_reconcile_prefers_window_interior()
+        test_window_mode_matches_pairwise_with_fewer_calls()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
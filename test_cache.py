@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent cache.
+
+This script checks storage, LRU eviction by size, TTL expiry and hit/miss
+counters of PersistentCache, that cached chat completions do not reach the
+API a second time (and that the async path reads the cache off the event
+loop), and that cached document results report the call that
+served them rather than the run that stored them.
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.utils.cache import PersistentCache, make_cache_key
+from Unsiloed.utils.openai import complete_chat, complete_chat_async, configure_llm_cache
+from Unsiloed.services.result_cache import get_result_cache, lookup_result, result_cache_key
+from Unsiloed.utils.chunking import ChunkingConfig
+from Unsiloed.utils.extractionutils import record_extraction_failure
+import Unsiloed
+
+
+def test_get_set_and_counters():
+    """Test round trips and hit/miss counters."""
+    print("Testing cache round trip...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PersistentCache(os.path.join(tmp, "cache.sqlite"), max_bytes=1024)
+        key = make_cache_key({"model": "gpt-4o", "text": "hello"})
+
+        assert cache.get(key) is None
+        cache.set(key, "world")
+        assert cache.get(key) == b"world"
+        assert key == make_cache_key({"text": "hello", "model": "gpt-4o"})
+
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["entries"] == 1 and stats["bytes"] == 5
+        cache.close()
+
+
+def test_lru_eviction_by_size():
+    """Test that the least recently used entries are evicted once the budget is exceeded."""
+    print("\nTesting LRU eviction...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PersistentCache(os.path.join(tmp, "cache.sqlite"), max_bytes=300)
+        for name in ("a", "b", "c"):
+            cache.set(name, b"x" * 100)
+            time.sleep(0.01)
+
+        cache.get("a")  # "b" is now the least recently used entry
+        time.sleep(0.01)
+        cache.set("d", b"x" * 100)
+
+        assert cache.get("b") is None
+        assert all(cache.get(name) is not None for name in ("a", "c", "d"))
+        assert cache.stats()["bytes"] == 300
+        cache.close()
+
+
+def test_ttl_expiry():
+    """Test that expired entries count as misses."""
+    print("\nTesting TTL expiry...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PersistentCache(os.path.join(tmp, "cache.sqlite"), max_bytes=1024, ttl_seconds=0.05)
+        cache.set("key", b"value")
+        assert cache.get("key") == b"value"
+        time.sleep(0.1)
+        assert cache.get("key") is None
+        assert cache.stats()["entries"] == 0
+        cache.close()
+
+
+def test_cached_chat_completion():
+    """Test that a repeated chat request is answered from the cache."""
+    print("\nTesting cached chat completions...")
+
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        message = SimpleNamespace(content=f"answer {len(calls)}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    request = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.1}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = configure_llm_cache(os.path.join(tmp, "llm.sqlite"))
+        try:
+            first = complete_chat(client, **request)
+            second = complete_chat(client, **request)
+            other = complete_chat(client, **dict(request, temperature=0.5))
+            stats = cache.stats()
+        finally:
+            configure_llm_cache(None)
+
+    print(f"Responses: {first!r}, {second!r}, {other!r}; stats: {stats}")
+    assert first == second == "answer 1"
+    assert other == "answer 2"
+    assert len(calls) == 2
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_async_chat_cache_runs_off_the_loop():
+    """Test that complete_chat_async reads and writes the SQLite cache on worker threads."""
+    print("\nTesting async cached chat completions...")
+
+    async def create(**request):
+        message = SimpleNamespace(content="answer")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    request = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+    cache_threads = []
+
+    async def run():
+        loop_thread = threading.current_thread()
+        first = await complete_chat_async(client, **request)
+        second = await complete_chat_async(client, **request)
+        return loop_thread, first, second
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = configure_llm_cache(os.path.join(tmp, "llm.sqlite"))
+        original_get, original_set = cache.get, cache.set
+
+        def get(key):
+            cache_threads.append(threading.current_thread())
+            return original_get(key)
+
+        def set_(key, value):
+            cache_threads.append(threading.current_thread())
+            return original_set(key, value)
+
+        try:
+            with mock.patch.object(cache, "get", get), mock.patch.object(cache, "set", set_):
+                loop_thread, first, second = asyncio.run(run())
+            stats = cache.stats()
+        finally:
+            configure_llm_cache(None)
+
+    print(f"Cache calls on {[thread.name for thread in cache_threads]}")
+    assert first == second == "answer"
+    assert stats["hits"] == 1
+    # get, set, get
+    assert len(cache_threads) == 3 and loop_thread not in cache_threads
+
+
+def test_async_chat_cache_opens_off_the_loop():
+    """Test that the first complete_chat_async call opens the configured cache on a worker thread."""
+    print("\nTesting that the LLM cache is opened off the loop...")
+
+    async def create(**request):
+        message = SimpleNamespace(content="answer")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    open_threads = []
+
+    def open_cache(*args):
+        open_threads.append(threading.current_thread())
+        return PersistentCache(*args)
+
+    async def run():
+        await complete_chat_async(client, model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        return threading.current_thread()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            with mock.patch.multiple(
+                "Unsiloed.utils.openai",
+                _llm_cache_configured=False,
+                LLM_CACHE_PATH=os.path.join(tmp, "llm.sqlite"),
+                PersistentCache=open_cache,
+            ):
+                loop_thread = asyncio.run(run())
+        finally:
+            configure_llm_cache(None)
+
+    print(f"Cache opened on {[thread.name for thread in open_threads]}")
+    assert len(open_threads) == 1 and open_threads[0] is not loop_thread
+
+
+def test_result_cache_hit_reports_this_call():
+    """Test that a cache hit reports no LLM usage, its own timings and cache_hit."""
+    print("\nTesting result cache hits...")
+
+    runs = []
+
+    async def fake_chunking(file_path, file_type, strategy, chunk_size, overlap, context=None):
+        runs.append(file_path)
+        return {
+            "file_type": file_type,
+            "strategy": strategy,
+            "total_chunks": 1,
+            "chunks": [{"text": "Hello", "metadata": {}}],
+            "llm_usage": {"calls": 3, "total_tokens": 1200, "by_purpose": {}},
+            "timings": {"stages": {"chunking": {"calls": 1, "wall_seconds": 2.5, "cpu_seconds": 2.4}},
+                        "pages": [], "total_wall_seconds": 2.5},
+        }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Hello\n")
+        options = {"filePath": path, "strategy": "paragraph", "cache": {"dir": tmp}}
+
+        with mock.patch.object(Unsiloed, "process_document_chunking_async", fake_chunking):
+            first = Unsiloed.process_sync(options)
+            second = Unsiloed.process_sync(options)
+
+        stored = lookup_result(
+            get_result_cache(options["cache"]), result_cache_key(path, "markdown", "paragraph", 1000, 100)
+        )
+
+    print(f"Cache hit: usage {second['llm_usage']['calls']} calls, timings {second['timings']['stages']}")
+    assert len(runs) == 1
+    assert first["cache_hit"] is False and second["cache_hit"] is True
+    assert second["chunks"] == first["chunks"]
+    assert first["llm_usage"]["calls"] == 3
+    assert second["llm_usage"]["calls"] == 0 and second["llm_usage"]["total_tokens"] == 0
+    assert set(second["timings"]["stages"]) == {"result_cache"}
+    assert second["timings"]["total_wall_seconds"] < 2.5
+    # Only the result itself is stored, not the usage and timings of the run that produced it
+    assert stored["chunks"] == first["chunks"]
+    assert not {"llm_usage", "timings", "cache_hit"} & set(stored)
+
+
+def test_degraded_result_is_not_cached():
+    """Test that a run that fell back or lost content is not stored in the result cache."""
+    print("\nTesting that degraded results are not cached...")
+
+    runs = []
+
+    async def degraded_chunking(file_path, file_type, strategy, chunk_size, overlap, context=None):
+        runs.append(file_path)
+        record_extraction_failure("picture: rate limited")
+        return {"file_type": file_type, "strategy": strategy, "total_chunks": 0, "chunks": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Hello\n")
+        options = {"filePath": path, "strategy": "paragraph", "cache": {"dir": tmp}}
+
+        with mock.patch.object(Unsiloed, "process_document_chunking_async", degraded_chunking):
+            first = Unsiloed.process_sync(options)
+            second = Unsiloed.process_sync(options)
+
+    print(f"Runs: {len(runs)}")
+    assert len(runs) == 2
+    assert first["cache_hit"] is False and second["cache_hit"] is False
+
+
+def test_result_cache_key_covers_pipeline_settings():
+    """Test that changing a pipeline setting changes the result cache key."""
+    print("\nTesting result cache key settings...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Hello\n")
+        default_key = result_cache_key(path, "pdf", "semantic", 1000, 100)
+        keys = set()
+        for name, value in (("DEFAULT_OCR_MODE", "page"), ("DEFAULT_BOUNDARY_MODE", "window"),
+                            ("DEFAULT_BOUNDARY_CASCADE", True), ("OCR_DPI", 150),
+                            ("LAYOUT_DPI", 72), ("OPENAI_MODEL", "gpt-4o-mini")):
+            with mock.patch.object(ChunkingConfig, name, value):
+                keys.add(result_cache_key(path, "pdf", "semantic", 1000, 100))
+
+    print(f"Distinct keys: {len(keys)}")
+    assert default_key not in keys
+    assert len(keys) == 6
+
+
+def main():
+    """Run all tests."""
+    print("Testing Persistent Cache")
+    print("=" * 50)
+
+    try:
+        test_get_set_and_counters()
+        test_lru_eviction_by_size()
+        test_ttl_expiry()
+        test_cached_chat_completion()
+        test_async_chat_cache_runs_off_the_loop()
+        test_async_chat_cache_opens_off_the_loop()
+        test_result_cache_hit_reports_this_call()
+        test_degraded_result_is_not_cached()
+        test_result_cache_key_covers_pipeline_settings()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for the Unsiloed command line interface.
+
+This script checks that files, directories and glob patterns are expanded
+into documents, that every document is written to the JSONL output, and that
+a second run skips the documents already present. No API key is needed.
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.cli import expand_inputs, load_completed, main
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return os.path.abspath(path)
+
+
+def _read_lines(path):
+    """Read the JSONL output, ignoring a line cut short by an interrupted run."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+    return entries
+
+
+def test_expand_inputs():
+    """Test expansion of files, directories, globs and unmatched inputs."""
+    print("Testing input expansion...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        a = _write(os.path.join(tmp, "docs", "a.md"), "# A\n")
+        b = _write(os.path.join(tmp, "docs", "nested", "b.html"), "<p>B</p>")
+        _write(os.path.join(tmp, "docs", "nested", "notes.txt"), "ignored")
+        c = _write(os.path.join(tmp, "other", "c.md"), "# C\n")
+        odd = _write(os.path.join(tmp, "other", "d.xyz"), "explicit")
+
+        documents, unmatched = expand_inputs([
+            os.path.join(tmp, "docs"),
+            os.path.join(tmp, "other", "*.md"),
+            a,  # duplicate
+            odd,
+            os.path.join(tmp, "missing.pdf"),
+        ])
+
+    print(f"Documents: {[os.path.relpath(d, tmp) for d in documents]}")
+    assert documents == [a, b, c, odd]
+    assert unmatched == [os.path.join(tmp, "missing.pdf")]
+
+
+def test_resumable_output():
+    """Test that a second run skips finished documents and --retry-failed retries errors."""
+    print("\nTesting resumable JSONL output...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = os.path.join(tmp, "docs")
+        paths = [
+            _write(os.path.join(docs, f"doc{i}.md"), f"# Document {i}\n\nFirst paragraph.\n\nSecond paragraph.\n")
+            for i in range(3)
+        ]
+        # Named explicitly, so it is kept; process() rejects the file type
+        broken = _write(os.path.join(docs, "notes.xyz"), "unsupported")
+        output = os.path.join(tmp, "out.jsonl")
+        argv = [paths[0], paths[1], paths[2], broken, "-o", output, "-s", "paragraph",
+                "--worker-mode", "thread", "-w", "2", "-q"]
+
+        # Simulate a run interrupted in the middle of writing a line
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"filePath": paths[0], "result": {"total_chunks": 3}, "error": None, "errorType": None}))
+            f.write("\n{\"filePath\": \"")
+
+        exit_code = main(argv)
+        entries = _read_lines(output)
+        print(f"First run: exit {exit_code}, {len(entries)} lines")
+        assert exit_code == 1  # notes.xyz failed
+        by_path = {entry["filePath"]: entry for entry in entries}
+        assert set(by_path) == set(paths) | {broken}
+        # doc0 was already present and is not processed again
+        assert sum(entry["filePath"] == paths[0] for entry in entries) == 1
+        assert by_path[paths[1]]["result"]["strategy"] == "paragraph"
+        assert by_path[broken]["error"] is not None
+
+        # Nothing left to do, errors included
+        assert main(argv) == 0
+        assert len(_read_lines(output)) == len(entries)
+        assert load_completed(output, retry_failed=True) == set(paths)
+
+        # Failed documents are retried on request
+        assert main(argv + ["--retry-failed"]) == 1
+        assert len(_read_lines(output)) == len(entries) + 1
+
+
+def test_semantic_requires_key():
+    """Test that semantic chunking without a key is rejected up front."""
+    print("\nTesting argument validation...")
+
+    original_env_key = os.environ.pop("OPENAI_API_KEY", None)
+    try:
+        main(["doc.pdf", "-o", "out.jsonl"])
+    except SystemExit as e:
+        print(f"Exit code: {e.code}")
+        assert e.code == 2
+    else:
+        raise AssertionError("Expected argparse to reject semantic chunking without a key")
+    finally:
+        if original_env_key is not None:
+            os.environ["OPENAI_API_KEY"] = original_env_key
+
+
+def main_tests():
+    """Run all tests."""
+    print("Testing CLI")
+    print("=" * 50)
+
+    try:
+        test_expand_inputs()
+        test_resumable_output()
+        test_semantic_requires_key()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Test script for URL document downloads and pooled HTTP sessions.
+
+This script checks that documents given by URL are typed from their first
+bytes and Content-Type with a single GET request, that web pages are saved
+and scraped from that same response, that downloads larger than the size
+limit are rejected without leaving a partial file, that process() no longer
+sends HEAD requests, and that scraping reuses kept-alive connections.
+No API key is needed.
+"""
+
+import sys
+import os
+import io
+import socket
+import asyncio
+import zipfile
+import tempfile
+
+from aiohttp import web
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed
+from Unsiloed.utils.web_utils import (
+    DownloadTooLargeError,
+    aclose_async_http_sessions,
+    close_http_session,
+    detect_document_type,
+    download_document,
+    get_http_session,
+    scrape_website_async,
+    scrape_website_sync,
+)
+
+PDF_BODY = b"%PDF-1.4\n" + b"0" * 10000 + b"\n%%EOF\n"
+MARKDOWN_BODY = b"# Title\n\nFirst paragraph.\n\n## Section\n\nSecond paragraph.\n"
+
+
+def _pptx_like_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("ppt/presentation.xml", "<presentation/>")
+    return buffer.getvalue()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _chunked(request, body=PDF_BODY):
+    """Send body without a Content-Length header."""
+    response = web.StreamResponse(headers={"Content-Type": "application/octet-stream"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    for start in range(0, len(body), 4096):
+        await response.write(body[start:start + 4096])
+    await response.write_eof()
+    return response
+
+
+def _serve(content_type, body=None, text=None):
+    async def handler(request):
+        return web.Response(body=body, text=text, content_type=content_type)
+    return handler
+
+
+async def _latin1_page(request):
+    return web.Response(
+        body="<html><body><p>Café</p></body></html>".encode("latin-1"), content_type="text/html", charset="latin-1"
+    )
+
+
+async def _latin1_markdown(request):
+    return web.Response(body="# Café\n\nThé.\n".encode("latin-1"), content_type="text/markdown", charset="latin-1")
+
+
+def _run_with_server(scenario):
+    """
+    Run scenario(base_url, requests, peers) against a local server that records
+    each request and the client port of its connection.
+    """
+    port = _free_port()
+    requests = []
+    peers = []
+    zip_body = _pptx_like_zip()
+
+    @web.middleware
+    async def record(request, handler):
+        requests.append((request.method, request.path))
+        peers.append(request.transport.get_extra_info("peername")[1])
+        return await handler(request)
+
+    routes = {
+        "/download": _serve("application/octet-stream", PDF_BODY),
+        "/notes.md": _serve("text/plain", MARKDOWN_BODY),
+        "/doc.md": _serve("text/markdown", MARKDOWN_BODY),
+        "/page": _serve("text/html", text="<html><body><p>Hello</p></body></html>"),
+        "/latin1": _latin1_page,
+        "/latin1.md": _latin1_markdown,
+        "/slides": _serve("application/zip", zip_body),
+        "/large.pdf": _serve("application/pdf", PDF_BODY),
+        "/stream.pdf": _chunked,
+    }
+
+    async def run():
+        app = web.Application(middlewares=[record])
+        for path, handler in routes.items():
+            app.router.add_get(path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            return await scenario(f"http://127.0.0.1:{port}", requests, peers)
+        finally:
+            await aclose_async_http_sessions()
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_detect_document_type():
+    """Test type detection from magic bytes, Content-Type and URL extension."""
+    print("Testing document type detection...")
+
+    cases = [
+        (("https://example.com/get?id=1", PDF_BODY[:2048], "application/octet-stream"), "pdf"),
+        (("https://example.com/file", b"# Notes", "text/markdown; charset=utf-8"), "markdown"),
+        (("https://example.com/notes.md", b"# Notes", "text/plain"), "markdown"),
+        (("https://example.com/report.docx", b"PK\x03\x04rest", "application/octet-stream"), "docx"),
+        (("https://example.com/archive", b"PK\x03\x04rest", "application/zip"), "zip"),
+        (("https://example.com/page.html", b"<html>", "text/html"), "html"),
+        (("https://example.com/article", b"<html>", "text/html"), "url"),
+        (("https://example.com/paper.pdf", b"<html>", "text/html"), "url"),
+    ]
+    for args, expected in cases:
+        detected = detect_document_type(*args)
+        print(f"{args[0]} ({args[2]}): {detected}")
+        assert detected == expected
+
+
+def test_downloads_use_single_get():
+    """Test that each download is one GET and that files are typed without an extension."""
+    print("\nTesting downloads...")
+
+    async def scenario(base, requests, peers):
+        results = {}
+        for path in ("/download", "/notes.md", "/page", "/latin1", "/latin1.md", "/slides"):
+            file_type, downloaded = await download_document(base + path)
+            with open(downloaded, "rb") as f:
+                body = f.read()
+            os.unlink(downloaded)
+            results[path] = (file_type, downloaded, len(body), body)
+        return results, list(requests)
+
+    results, requests = _run_with_server(scenario)
+    print(f"Results: {results}")
+    print(f"Requests: {requests}")
+    assert results["/download"][0] == "pdf" and results["/download"][1].endswith(".pdf")
+    assert results["/download"][2] == len(PDF_BODY)
+    assert results["/notes.md"][0] == "markdown" and results["/notes.md"][2] == len(MARKDOWN_BODY)
+    # Web pages are saved from the same response, as UTF-8 HTML
+    assert results["/page"][0] == "url" and results["/page"][1].endswith(".html")
+    assert results["/page"][3] == b"<html><body><p>Hello</p></body></html>"
+    assert results["/latin1"][3] == "<html><body><p>Café</p></body></html>".encode("utf-8")
+    # Text documents are re-encoded to UTF-8 as well
+    assert results["/latin1.md"][0] == "markdown" and results["/latin1.md"][3] == "# Café\n\nThé.\n".encode("utf-8")
+    assert results["/slides"][0] == "pptx" and results["/slides"][1].endswith(".pptx")
+    assert requests == [
+        ("GET", path) for path in ("/download", "/notes.md", "/page", "/latin1", "/latin1.md", "/slides")
+    ]
+
+
+def test_size_limit():
+    """Test that oversized downloads are rejected with and without Content-Length."""
+    print("\nTesting the download size limit...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        async def scenario(base, requests, peers):
+            errors = []
+            for path in ("/large.pdf", "/stream.pdf"):
+                try:
+                    await download_document(base + path, max_bytes=5000, directory=directory)
+                except DownloadTooLargeError as e:
+                    errors.append(str(e))
+            # With the limit disabled the same document is accepted
+            file_type, downloaded = await download_document(base + "/stream.pdf", max_bytes=0, directory=directory)
+            os.unlink(downloaded)
+            return errors, file_type
+
+        errors, file_type = _run_with_server(scenario)
+        print(f"Errors: {errors}")
+        assert len(errors) == 2
+        assert file_type == "pdf"
+        # Partial downloads are removed
+        assert os.listdir(directory) == []
+
+
+def test_process_skips_head_request():
+    """Test that process() fetches a document URL with exactly one GET and no HEAD."""
+    print("\nTesting process() requests...")
+
+    async def scenario(base, requests, peers):
+        result = await Unsiloed.process({"filePath": base + "/doc.md", "strategy": "paragraph"})
+        return result, list(requests)
+
+    result, requests = _run_with_server(scenario)
+    print(f"Chunks: {result['total_chunks']}, requests: {requests}")
+    assert result["file_type"] == "markdown"
+    assert result["total_chunks"] > 0
+    assert requests == [("GET", "/doc.md")]
+
+
+def test_scraping_reuses_connections():
+    """Test that repeated scraping of a host goes over one kept-alive connection."""
+    print("\nTesting pooled scraping sessions...")
+
+    async def scenario(base, requests, peers):
+        # The sync scraper runs on a worker thread so the server keeps serving
+        sync_pages = [await asyncio.to_thread(scrape_website_sync, base + "/page") for _ in range(3)]
+        sync_peers = list(peers)
+        async_pages = [await scrape_website_async(base + "/page") for _ in range(3)]
+        return sync_pages, sync_peers, async_pages, peers[len(sync_peers):]
+
+    session = get_http_session()
+    try:
+        sync_pages, sync_peers, async_pages, async_peers = _run_with_server(scenario)
+        assert get_http_session() is session
+    finally:
+        close_http_session()
+    assert get_http_session() is not session
+    close_http_session()
+
+    print(f"Sync connections: {sync_peers}, async connections: {async_peers}")
+    assert all(page["content"].strip() == "Hello" for page in sync_pages + async_pages)
+    assert len(set(sync_peers)) == 1
+    assert len(set(async_peers)) == 1
+
+
+def test_process_web_page_uses_single_get():
+    """Test that process() scrapes a web page from the response that typed it."""
+    print("\nTesting process() on a web page...")
+
+    async def scenario(base, requests, peers):
+        result = await Unsiloed.process({"filePath": base + "/page", "strategy": "paragraph"})
+        return result, list(requests), list(peers)
+
+    result, requests, peers = _run_with_server(scenario)
+    print(f"Requests: {requests}")
+    assert result["file_type"] == "url"
+    assert "Hello" in result["chunks"][0]["text"]
+    assert requests == [("GET", "/page")]
+
+
+def main():
+    """Run all tests."""
+    print("Testing URL Downloads")
+    print("=" * 50)
+
+    try:
+        test_detect_document_type()
+        test_downloads_use_single_get()
+        test_size_limit()
+        test_process_skips_head_request()
+        test_scraping_reuses_connections()
+        test_process_web_page_uses_single_get()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test script for the CPU stage executors.
+
+This script checks that each CPU stage runs on its own bounded, shared pool,
+that a saturated stage does not hold up the others, and that pools are
+replaced when reconfigured or shut down.
+"""
+
+import sys
+import os
+import time
+import subprocess
+import asyncio
+import threading
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.parse_config import DEFAULT_OCR_WORKERS
+from Unsiloed.utils.executors import (
+    DETECTION_STAGE,
+    OCR_STAGE,
+    configure_cpu_stage,
+    get_cpu_executor,
+    run_in_cpu_stage,
+    shutdown_cpu_executors,
+)
+
+
+def test_pools_are_shared_per_stage():
+    """Test that a stage always gets the same pool and stages get different pools."""
+    print("Testing shared stage pools...")
+
+    ocr = get_cpu_executor(OCR_STAGE)
+    assert get_cpu_executor(OCR_STAGE) is ocr
+    assert get_cpu_executor(DETECTION_STAGE) is not ocr
+
+    thread_name = asyncio.run(run_in_cpu_stage(OCR_STAGE, lambda: threading.current_thread().name))
+    print(f"OCR work ran on {thread_name}")
+    assert thread_name.startswith("unsiloed-ocr")
+
+
+def test_stage_concurrency_is_bounded():
+    """Test that a stage never runs more tasks at once than its workers."""
+    print("\nTesting bounded stage concurrency...")
+
+    configure_cpu_stage(OCR_STAGE, 2)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    async def run():
+        await asyncio.gather(*[run_in_cpu_stage(OCR_STAGE, work) for _ in range(8)])
+
+    try:
+        asyncio.run(run())
+    finally:
+        configure_cpu_stage(OCR_STAGE, DEFAULT_OCR_WORKERS)
+
+    print(f"Peak concurrent OCR tasks: {peak}")
+    assert peak == 2
+
+
+def test_saturated_stage_does_not_block_others():
+    """Test that detection work runs while every OCR worker is busy."""
+    print("\nTesting stage isolation...")
+
+    configure_cpu_stage(OCR_STAGE, 1)
+    release = threading.Event()
+
+    async def run():
+        blocked = asyncio.ensure_future(run_in_cpu_stage(OCR_STAGE, release.wait, 5))
+        queued = asyncio.ensure_future(run_in_cpu_stage(OCR_STAGE, lambda: "ocr"))
+        detection = await asyncio.wait_for(run_in_cpu_stage(DETECTION_STAGE, lambda: "detection"), 2)
+        ocr_was_waiting = not queued.done()
+        release.set()
+        await asyncio.gather(blocked, queued)
+        return detection, ocr_was_waiting
+
+    try:
+        detection, ocr_was_waiting = asyncio.run(run())
+    finally:
+        release.set()
+        configure_cpu_stage(OCR_STAGE, DEFAULT_OCR_WORKERS)
+
+    print(f"Detection finished while OCR was saturated: {detection}")
+    assert detection == "detection"
+    assert ocr_was_waiting
+
+
+def test_pools_are_replaced():
+    """Test that reconfiguring or shutting down a stage gives it a new pool."""
+    print("\nTesting pool replacement...")
+
+    before = get_cpu_executor(OCR_STAGE)
+    configure_cpu_stage(OCR_STAGE, 3)
+    reconfigured = get_cpu_executor(OCR_STAGE)
+    assert reconfigured is not before
+    assert reconfigured._max_workers == 3
+
+    shutdown_cpu_executors()
+    assert get_cpu_executor(OCR_STAGE) is not reconfigured
+    configure_cpu_stage(OCR_STAGE, DEFAULT_OCR_WORKERS)
+
+    try:
+        configure_cpu_stage(OCR_STAGE, 0)
+    except ValueError as e:
+        print(f"Rejected: {e}")
+    else:
+        raise AssertionError("Expected ValueError for zero workers")
+
+    try:
+        configure_cpu_stage(DETECTION_STAGE, 2)
+    except ValueError as e:
+        print(f"Rejected: {e}")
+    else:
+        raise AssertionError("Expected ValueError for several detection workers")
+
+
+def test_worker_counts_from_environment():
+    """Test that stage worker counts are read from the environment and checked on import."""
+    print("\nTesting worker counts from the environment...")
+
+    code = (
+        "from Unsiloed.utils.executors import OCR_STAGE, RENDER_STAGE, get_cpu_executor;"
+        "print(get_cpu_executor(OCR_STAGE)._max_workers, get_cpu_executor(RENDER_STAGE)._max_workers)"
+    )
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, UNSILOED_OCR_WORKERS="3", UNSILOED_RENDER_WORKERS="2")
+    configured = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True)
+    env = dict(os.environ, UNSILOED_DETECTION_WORKERS="2")
+    rejected = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True)
+
+    print(f"Configured: {configured.stdout.strip()}")
+    assert configured.returncode == 0 and configured.stdout.split() == ["3", "2"]
+    assert rejected.returncode != 0 and "single worker" in rejected.stderr
+
+
+def main():
+    """Run all tests."""
+    print("Testing CPU Stage Executors")
+    print("=" * 50)
+
+    try:
+        test_pools_are_shared_per_stage()
+        test_stage_concurrency_is_bounded()
+        test_saturated_stage_does_not_block_others()
+        test_pools_are_replaced()
+        test_worker_counts_from_environment()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the pluggable OCR backends.
+
+This script checks backend registration and selection, and that the
+tesserocr backend keeps one Tesseract handle per worker thread and ends the
+handles it no longer needs. tesserocr is replaced by a fake module, so
+neither it nor Tesseract needs to be installed.
+"""
+
+import sys
+import os
+import types
+import threading
+from unittest import mock
+
+from PIL import Image
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.parse_config import OCR_BACKEND
+from Unsiloed.utils.ocr_backends import (
+    OCRBackend,
+    TesserocrBackend,
+    close_ocr_backends,
+    get_ocr_backend,
+    register_ocr_backend,
+    set_default_ocr_backend,
+)
+
+
+class _FakeTessBaseAPI:
+    """Records which thread created it and whether it was ended."""
+
+    created = []
+
+    def __init__(self, lang):
+        self.thread = threading.current_thread().name
+        self.ended = False
+        _FakeTessBaseAPI.created.append(self)
+
+    def SetImage(self, image):
+        assert not self.ended, "handle used after End()"
+
+    def GetUTF8Text(self):
+        return f"text from {self.thread}"
+
+    def End(self):
+        self.ended = True
+
+
+def _fake_tesserocr():
+    _FakeTessBaseAPI.created = []
+    module = types.ModuleType("tesserocr")
+    module.PyTessBaseAPI = _FakeTessBaseAPI
+    return mock.patch.dict(sys.modules, {"tesserocr": module})
+
+
+def _ocr_on_new_thread(backend, image):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(backend.image_to_string(image)))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+def test_backend_selection():
+    """Test shared backend instances, registration and rejection of unknown names."""
+    print("Testing backend selection...")
+
+    class UpperBackend(OCRBackend):
+        name = "upper"
+        closed = 0
+
+        def image_to_string(self, image):
+            return "TEXT"
+
+        def close(self):
+            UpperBackend.closed += 1
+
+    register_ocr_backend("upper", UpperBackend)
+    set_default_ocr_backend("upper")
+    try:
+        backend = get_ocr_backend()
+        assert isinstance(backend, UpperBackend)
+        assert get_ocr_backend("upper") is backend
+
+        close_ocr_backends()
+        assert UpperBackend.closed == 1
+        # Closed instances are dropped and recreated on next use
+        assert get_ocr_backend() is not backend
+    finally:
+        set_default_ocr_backend(OCR_BACKEND)
+        close_ocr_backends()
+
+    try:
+        set_default_ocr_backend("missing")
+    except ValueError as e:
+        print(f"Rejected: {e}")
+    else:
+        raise AssertionError("Expected ValueError for an unknown backend")
+
+
+def test_tesserocr_handle_per_thread():
+    """Test that a thread reuses its handle and other threads get their own."""
+    print("\nTesting tesserocr handles per thread...")
+
+    image = Image.new("RGB", (20, 10), "white")
+    with _fake_tesserocr():
+        backend = TesserocrBackend()
+        first = backend.image_to_string(image)
+        again = backend.image_to_string(image)
+        other = _ocr_on_new_thread(backend, image)
+        handles = list(_FakeTessBaseAPI.created)
+        backend.close()
+
+    print(f"Results: {[first, again, other]}")
+    assert first == again == f"text from {threading.current_thread().name}"
+    assert other != first
+    assert len(handles) == 2
+    assert all(handle.ended for handle in handles)
+
+
+def test_tesserocr_handles_of_finished_threads_are_ended():
+    """Test that handles of exited threads are ended and close() lets threads start over."""
+    print("\nTesting tesserocr handle cleanup...")
+
+    image = Image.new("RGB", (20, 10), "white")
+    with _fake_tesserocr():
+        backend = TesserocrBackend()
+        _ocr_on_new_thread(backend, image)
+        finished_thread_handle = _FakeTessBaseAPI.created[0]
+        assert not finished_thread_handle.ended
+
+        # The next handle created ends the one left behind by the exited thread
+        backend.image_to_string(image)
+        assert finished_thread_handle.ended
+        current_handle = _FakeTessBaseAPI.created[1]
+        assert not current_handle.ended
+
+        backend.close()
+        assert current_handle.ended
+        # After close() the thread gets a fresh handle instead of the ended one
+        backend.image_to_string(image)
+        assert len(_FakeTessBaseAPI.created) == 3
+        backend.close()
+
+    print(f"Handles created: {len(_FakeTessBaseAPI.created)}, all ended")
+
+
+def main():
+    """Run all tests."""
+    print("Testing OCR Backends")
+    print("=" * 50)
+
+    try:
+        test_backend_selection()
+        test_tesserocr_handle_per_thread()
+        test_tesserocr_handles_of_finished_threads_are_ended()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared OpenAI client registry.
+
+This script checks that clients are shared per API key (and per event loop
+for async clients), that the models.list() health check is only repeated
+after OPENAI_HEALTH_CHECK_TTL, and that closing the registry closes every
+client. The OpenAI classes are replaced by fakes, so no API key or network
+access is needed.
+"""
+
+import sys
+import os
+import asyncio
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed.utils.openai as openai_utils
+from Unsiloed.utils.openai import (
+    aclose_async_openai_clients,
+    close_openai_clients,
+    get_async_openai_client,
+    get_openai_client,
+)
+
+
+class _FakeOpenAI:
+    """Stands in for openai.OpenAI: counts health checks and closes."""
+
+    instances = []
+    healthy = True
+
+    def __init__(self, api_key, timeout, max_retries):
+        self.api_key = api_key
+        self.health_checks = 0
+        self.closed = False
+        self.models = mock.Mock()
+        self.models.list.side_effect = self._list_models
+        _FakeOpenAI.instances.append(self)
+
+    def _list_models(self):
+        self.health_checks += 1
+        return mock.Mock(data=["gpt-4o"] if _FakeOpenAI.healthy else [])
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeAsyncOpenAI:
+    """Stands in for openai.AsyncOpenAI."""
+
+    def __init__(self, api_key, timeout, max_retries):
+        self.api_key = api_key
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def _fake_clients():
+    _FakeOpenAI.instances = []
+    _FakeOpenAI.healthy = True
+    return mock.patch.multiple(openai_utils, OpenAI=_FakeOpenAI, AsyncOpenAI=_FakeAsyncOpenAI)
+
+
+def test_sync_clients_shared_per_key():
+    """Test that a key always gets the same client and different keys get different clients."""
+    print("Testing sync client sharing...")
+
+    close_openai_clients()
+    with _fake_clients():
+        first = get_openai_client("sk-test-a")
+        again = get_openai_client("sk-test-a")
+        other = get_openai_client("sk-test-b")
+        close_openai_clients()
+
+    print(f"Clients created: {len(_FakeOpenAI.instances)}")
+    assert first is again
+    assert other is not first and other.api_key == "sk-test-b"
+    assert len(_FakeOpenAI.instances) == 2
+    assert first.closed and other.closed
+
+
+def test_health_check_ttl():
+    """Test that the health check is skipped within the TTL and repeated after it."""
+    print("\nTesting health check TTL...")
+
+    close_openai_clients()
+    now = [1000.0]
+    with _fake_clients(), mock.patch.object(openai_utils.time, "monotonic", lambda: now[0]):
+        client = get_openai_client("sk-test-ttl")
+        now[0] += openai_utils.OPENAI_HEALTH_CHECK_TTL / 2
+        get_openai_client("sk-test-ttl")
+        checks_within_ttl = client.health_checks
+
+        now[0] += openai_utils.OPENAI_HEALTH_CHECK_TTL
+        get_openai_client("sk-test-ttl")
+        checks_after_ttl = client.health_checks
+
+        # A failed check is not cached and makes the call return None
+        now[0] += openai_utils.OPENAI_HEALTH_CHECK_TTL * 2
+        _FakeOpenAI.healthy = False
+        unhealthy = get_openai_client("sk-test-ttl")
+        _FakeOpenAI.healthy = True
+        recovered = get_openai_client("sk-test-ttl")
+        close_openai_clients()
+
+    print(f"Checks: {checks_within_ttl} within the TTL, {checks_after_ttl} after it")
+    assert checks_within_ttl == 1
+    assert checks_after_ttl == 2
+    assert unhealthy is None
+    assert recovered is client and client.health_checks == 4
+
+
+def test_async_clients_per_loop():
+    """Test that async clients are shared within a loop and not across loops."""
+    print("\nTesting async clients per event loop...")
+
+    close_openai_clients()
+
+    async def get_clients():
+        first = get_async_openai_client("sk-test-async")
+        again = get_async_openai_client("sk-test-async")
+        other_key = get_async_openai_client("sk-test-async-b")
+        await aclose_async_openai_clients()
+        # Closed clients are dropped; the loop gets a new one on the next call
+        replacement = get_async_openai_client("sk-test-async")
+        await aclose_async_openai_clients()
+        return first, again, other_key, replacement
+
+    with _fake_clients():
+        first, again, other_key, replacement = asyncio.run(get_clients())
+        next_loop_client = asyncio.run(get_clients())[0]
+
+    assert first is again
+    assert other_key is not first
+    assert first.closed and other_key.closed
+    assert replacement is not first
+    assert next_loop_client is not first
+    print("Async clients are shared per (loop, key) and closed with the loop")
+
+
+def main():
+    """Run all tests."""
+    print("Testing OpenAI Client Registry")
+    print("=" * 50)
+
+    try:
+        test_sync_clients_shared_per_key()
+        test_health_check_ttl()
+        test_async_clients_per_loop()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
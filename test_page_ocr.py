@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for page-level OCR word-to-region assignment.
+
+This script checks that words from a single page-wide Tesseract pass are
+assigned to the right layout regions and rebuilt in reading order.
+"""
+
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.utils.extractionutils import _assign_words_to_regions, _words_to_text
+
+
+def _word(text, bbox, block=1, par=1, line=1, word=1):
+    return {
+        'text': text,
+        'bbox': bbox,
+        'conf': 95.0,
+        'block_num': block,
+        'par_num': par,
+        'line_num': line,
+        'word_num': word,
+    }
+
+
+def test_words_assigned_to_containing_region():
+    """Test that words land in the region containing their center."""
+    print("Testing word-to-region assignment...")
+
+    regions = [
+        [0, 0, 500, 100],      # title
+        [0, 150, 500, 600],    # body text
+        [600, 150, 1000, 600], # second column
+    ]
+    words = [
+        _word("Title", [10, 10, 120, 60]),
+        _word("left", [20, 200, 80, 230], block=2),
+        _word("right", [650, 200, 720, 230], block=3),
+        _word("margin", [520, 700, 580, 720], block=4),  # outside every region
+    ]
+
+    assigned = _assign_words_to_regions(words, regions, cell=64)
+
+    assert [w['text'] for w in assigned[0]] == ["Title"]
+    assert [w['text'] for w in assigned[1]] == ["left"]
+    assert [w['text'] for w in assigned[2]] == ["right"]
+    assert sum(len(v) for v in assigned.values()) == 3
+    print(f"Assigned words to {len(assigned)} regions")
+
+
+def test_smallest_overlapping_region_wins():
+    """Test that nested regions prefer the most specific box."""
+    print("\nTesting nested region assignment...")
+
+    regions = [
+        [0, 0, 1000, 1000],   # large region
+        [100, 100, 300, 200], # caption nested inside it
+    ]
+    words = [_word("Figure", [120, 120, 200, 150]), _word("outside", [500, 500, 600, 530])]
+
+    assigned = _assign_words_to_regions(words, regions)
+
+    assert [w['text'] for w in assigned[1]] == ["Figure"]
+    assert [w['text'] for w in assigned[0]] == ["outside"]
+
+
+def test_words_rebuilt_in_reading_order():
+    """Test that region text is rebuilt line by line, left to right."""
+    print("\nTesting text reconstruction...")
+
+    words = [
+        _word("world", [120, 10, 200, 30], line=1, word=2),
+        _word("again", [60, 50, 120, 70], line=2, word=2),
+        _word("Hello", [10, 10, 100, 30], line=1, word=1),
+        _word("Hello", [10, 50, 50, 70], line=2, word=1),
+    ]
+
+    text = _words_to_text(words)
+    print(f"Rebuilt text: {text!r}")
+    assert text == "Hello world\nHello again"
+
+
+def main():
+    """Run all tests."""
+    print("Testing Page-Level OCR Region Assignment")
+    print("=" * 50)
+
+    try:
+        test_words_assigned_to_containing_region()
+        test_smallest_overlapping_region_wins()
+        test_words_rebuilt_in_reading_order()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
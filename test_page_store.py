@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental page store.
+
+This script checks that page fingerprints follow the resources a page
+inherits, that pages extracted cleanly are stored and served on the next run,
+and that pages whose extraction degraded (a failed picture
+description, failed OCR) are not stored so a later run extracts them again.
+Rendering, YOLO, OCR and the OpenAI clients are replaced by stubs.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+from PyPDF2 import PageObject, PdfWriter
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.parse_config import OCR_BACKEND
+from Unsiloed.utils.chunking import semantic_chunking_with_semaphore
+from Unsiloed.utils.extractionutils import record_extraction_failure, track_extraction_failures
+from Unsiloed.utils.fileutils import PDFRaster, pdf_page_fingerprints
+from Unsiloed.utils.incremental import configure_page_store
+from Unsiloed.utils.ocr_backends import OCRBackend, register_ocr_backend, set_default_ocr_backend
+
+# Page sizes in points; at 72 DPI the rendered pixel size is the same
+_CLEAN_PAGE = (400, 300)
+_PICTURE_PAGE = (300, 400)
+_UNREADABLE_PAGE = (350, 350)
+
+
+class _StubOCRBackend(OCRBackend):
+    """Reads every region as its size, and fails on the region of the unreadable page."""
+
+    name = "stub-store"
+
+    def image_to_string(self, image):
+        if image.size == (200, 70):
+            raise RuntimeError("tesseract crashed")
+        return f"text {image.size[0]}x{image.size[1]}"
+
+
+class _YOLOResult:
+    names = {0: 'Text', 1: 'Picture'}
+
+    def __init__(self, boxes, classes):
+        class Boxes:
+            xyxy = np.array(boxes, dtype=np.float32)
+            conf = np.full(len(boxes), 0.9, dtype=np.float32)
+            cls = np.array(classes)
+
+            def __len__(self):
+                return len(self.xyxy)
+        self.boxes = Boxes()
+
+    def __len__(self):
+        return len(self.boxes)
+
+
+def _run_yolo_inference(images):
+    results = []
+    for image in images:
+        if image.size == _PICTURE_PAGE:
+            results.append(_YOLOResult([[10, 10, 200, 60], [10, 100, 250, 300]], [0, 1]))
+        elif image.size == _UNREADABLE_PAGE:
+            results.append(_YOLOResult([[10, 10, 200, 60], [20, 100, 220, 170]], [0, 0]))
+        else:
+            results.append(_YOLOResult([[10, 10, 200, 60]], [0]))
+    return results
+
+
+def _convert_from_path(pdf_path, dpi, first_page, last_page):
+    sizes = [_CLEAN_PAGE, _PICTURE_PAGE, _UNREADABLE_PAGE]
+    return [Image.new("RGB", sizes[page - 1], "white") for page in range(first_page, last_page + 1)]
+
+
+async def _no_grouping(bbox_results, **kwargs):
+    return [{'page': r['metadata']['page_number'], 'content': r['content']} for r in bbox_results]
+
+
+def _run_pipeline(path, rendered_pages):
+    def convert_from_path(pdf_path, dpi, first_page, last_page):
+        rendered_pages.extend(range(first_page, last_page + 1))
+        return _convert_from_path(pdf_path, dpi, first_page, last_page)
+
+    # Without an async client the picture of the second page cannot be described
+    with mock.patch.multiple(
+        "Unsiloed.utils.chunking",
+        get_openai_client=lambda: object(),
+        run_yolo_inference=_run_yolo_inference,
+        _perform_openai_semantic_grouping_with_semaphore=_no_grouping,
+    ), mock.patch("Unsiloed.utils.extractionutils.get_async_openai_client", lambda: None), \
+            mock.patch("Unsiloed.utils.fileutils.pdf2image.convert_from_path", convert_from_path):
+        return asyncio.run(semantic_chunking_with_semaphore(PDFRaster(path, dpi=72)))
+
+
+def _write_raw_pdf(path, font="Helvetica", page_texts=("Page one", "Page two")):
+    """Write a PDF whose pages inherit one /Resources dictionary (with a shared font) from the page tree."""
+    page_count = len(page_texts)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(page_count))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {page_count} /MediaBox [0 0 200 200] "
+        "/Resources << /Font << /F1 3 0 R >> >> >>",
+        f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} >>",
+    ]
+    for i, text in enumerate(page_texts):
+        content = f"BT /F1 12 Tf 20 100 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_fingerprints_cover_inherited_resources():
+    """Test that page fingerprints change with shared, inherited resources and only with them."""
+    print("Testing page fingerprints...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for name, kwargs in (
+            ("original", {}),
+            ("copy", {}),
+            ("font", {"font": "Courier"}),
+            ("text", {"page_texts": ("Page one", "Page 2")}),
+        ):
+            paths[name] = os.path.join(tmp, f"{name}.pdf")
+            _write_raw_pdf(paths[name], **kwargs)
+        fingerprints = {name: pdf_page_fingerprints(path) for name, path in paths.items()}
+
+    print(f"Fingerprints: { {name: [f[:8] for f in prints] for name, prints in fingerprints.items()} }")
+    assert fingerprints["copy"] == fingerprints["original"]
+    # The font is shared through the page tree, so a new font changes every page
+    assert all(a != b for a, b in zip(fingerprints["font"], fingerprints["original"]))
+    assert fingerprints["text"][0] == fingerprints["original"][0]
+    assert fingerprints["text"][1] != fingerprints["original"][1]
+
+
+def test_failures_are_tracked_per_block():
+    """Test that failures are collected inside track_extraction_failures and passed outwards."""
+    print("\nTesting extraction failure tracking...")
+
+    record_extraction_failure("outside any page")
+    with track_extraction_failures() as outer:
+        record_extraction_failure("picture: timeout")
+        with track_extraction_failures() as inner:
+            record_extraction_failure("table: rate limited")
+    print(f"Outer: {outer}, inner: {inner}")
+    assert outer == ["picture: timeout", "table: rate limited"]
+    assert inner == ["table: rate limited"]
+
+
+def test_degraded_pages_are_not_stored():
+    """Test that only cleanly extracted pages are stored and reused by the next run."""
+    print("\nTesting the page store with degraded pages...")
+
+    register_ocr_backend("stub-store", _StubOCRBackend)
+    set_default_ocr_backend("stub-store")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "doc.pdf")
+            writer = PdfWriter()
+            for width, height in (_CLEAN_PAGE, _PICTURE_PAGE, _UNREADABLE_PAGE):
+                writer.add_page(PageObject.create_blank_page(width=width, height=height))
+            with open(path, "wb") as f:
+                writer.write(f)
+
+            configure_page_store(os.path.join(tmp, "pages.sqlite"))
+            try:
+                first_rendered, second_rendered = [], []
+                first = _run_pipeline(path, first_rendered)
+                second = _run_pipeline(path, second_rendered)
+            finally:
+                configure_page_store(None)
+    finally:
+        set_default_ocr_backend(OCR_BACKEND)
+
+    print(f"First run: {first}")
+    print(f"Rendered on the second run: {second_rendered}")
+    assert first_rendered == [1, 2, 3]
+    # Only the clean page is served from the store; the degraded ones are extracted again
+    assert second_rendered == [2, 3]
+    assert second == first
+    assert [chunk['page'] for chunk in second] == [1, 2, 2, 3]
+
+
+def main():
+    """Run all tests."""
+    print("Testing Incremental Page Store")
+    print("=" * 50)
+
+    try:
+        test_fingerprints_cover_inherited_resources()
+        test_failures_are_tracked_per_block()
+        test_degraded_pages_are_not_stored()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Test script for PDF rasterization geometry.
+
+This script checks that page sizes come from the CropBox that pdftoppm
+renders and scale with the raster DPI, that pages stream at the layout DPI,
+that region re-renders are asked for the right pixel rectangle, and
+that detail regions are re-rendered in clusters or as one whole page. No
+poppler install is needed: pdftoppm calls are captured, not run.
+"""
+
+import sys
+import os
+import io
+import math
+import asyncio
+import tempfile
+import subprocess
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import RectangleObject
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.parse_config import OCR_BACKEND
+from Unsiloed.utils.fileutils import PDFRaster
+from Unsiloed.utils.chunking import (
+    ChunkingConfig,
+    _containing_box,
+    _extract_bbox_results_for_grouping_with_semaphore,
+    _plan_region_renders,
+)
+from Unsiloed.utils.ocr_backends import OCRBackend, register_ocr_backend, set_default_ocr_backend
+
+
+def _write_pdf(path, pages):
+    """Write blank pages given as (width_pt, height_pt, cropbox or None, rotation)."""
+    writer = PdfWriter()
+    for width, height, cropbox, rotation in pages:
+        page = PageObject.create_blank_page(width=width, height=height)
+        if cropbox is not None:
+            page.cropbox = RectangleObject(cropbox)
+        if rotation:
+            page.rotate(rotation)
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_page_size_uses_cropbox():
+    """Test that page sizes follow the CropBox and rotation at the raster DPI."""
+    print("Testing page geometry...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.pdf")
+        _write_pdf(path, [
+            (612, 792, None, 0),
+            (612, 792, (36, 36, 576, 756), 0),
+            (612, 792, None, 90),
+        ])
+        raster = PDFRaster(path, dpi=200, layout_dpi=100)
+        sizes = [raster.page_size(i) for i in range(raster.page_count)]
+
+    print(f"Page sizes at 200 DPI: {sizes}")
+    assert raster.layout_scale == 2.0
+    assert sizes[0] == (1700, 2200)
+    # 540 x 720 pt cropped area
+    assert sizes[1] == (1500, 2000)
+    assert sizes[2] == (2200, 1700)
+
+
+def test_page_geometry_scales_with_dpi():
+    """Test page sizes at the raster DPI, before and after pages are rendered."""
+    print("\nTesting raster scaling...")
+
+    render_calls = []
+
+    def convert_from_path(pdf_path, dpi, first_page, last_page):
+        render_calls.append(dpi)
+        # pdftoppm may round a pixel differently from the page-box estimate
+        size = (math.ceil(612 * dpi / 72) - 1, math.ceil(792 * dpi / 72))
+        return [Image.new("RGB", size, "white") for _ in range(first_page, last_page + 1)]
+
+    async def stream(raster):
+        return [page_idx async for page_idx, _ in raster.aiter_pages()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.pdf")
+        _write_pdf(path, [(612, 792, None, 0), (792, 612, None, 0)])
+
+        single = PDFRaster(path, dpi=150)
+        estimated = single.page_dimensions()
+        two_pass = PDFRaster(path, dpi=200, layout_dpi=50)
+        with mock.patch("Unsiloed.utils.fileutils.pdf2image.convert_from_path", convert_from_path):
+            asyncio.run(stream(single))
+            asyncio.run(stream(two_pass))
+        rendered = single.page_dimensions()
+        two_pass_size = two_pass.page_size(0)
+
+    print(f"Estimated: {estimated}")
+    print(f"After rendering: {rendered}")
+    assert single.layout_scale == 1.0 and two_pass.layout_scale == 4.0
+    assert estimated == [
+        {"page_number": 1, "width": 1275, "height": 1650},
+        {"page_number": 2, "width": 1650, "height": 1275},
+    ]
+    # A full-DPI render replaces the estimate with the actual pixel size
+    assert rendered[0] == {"page_number": 1, "width": 1274, "height": 1650}
+    # Layout renders are streamed at layout_dpi and never change the geometry at dpi
+    assert render_calls == [150, 50]
+    assert two_pass_size == (1700, 2200)
+
+
+def test_render_region_coordinates():
+    """Test that a region is rendered with pdftoppm at the raster DPI and the given pixel box."""
+    print("\nTesting region rendering...")
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 100), "white").save(buffer, format="PPM")
+    completed = subprocess.CompletedProcess([], 0, stdout=buffer.getvalue())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "doc.pdf")
+        _write_pdf(path, [(612, 792, None, 0)] * 3)
+        raster = PDFRaster(path, dpi=200, layout_dpi=100)
+        with mock.patch("Unsiloed.utils.fileutils.subprocess.run", return_value=completed) as run:
+            image = raster.render_region(2, [100, 250, 400, 350])
+
+    command = run.call_args[0][0]
+    print(f"Command: {command[:-1]}")
+    options = dict(zip(command[1:-2:2], command[2:-2:2]))
+    assert options == {"-r": "200", "-f": "3", "-l": "3", "-x": "100", "-y": "250", "-W": "300", "-H": "100"}
+    assert image.size == (300, 100)
+
+
+def test_region_render_plan():
+    """Test that detail regions are clustered, and that dense pages are rendered whole."""
+    print("\nTesting region render planning...")
+
+    width, height = 1700, 2200
+
+    # A heading and a paragraph close together, and a footnote far below them
+    sparse = [[100, 100, 800, 160], [100, 180, 1600, 500], [100, 2000, 900, 2050]]
+    plan = _plan_region_renders(sparse, width, height)
+    print(f"Sparse page: {plan}")
+    assert plan == [[100, 100, 1600, 500], [100, 2000, 900, 2050]]
+    assert [_containing_box(box, plan) for box in sparse] == [0, 0, 1]
+
+    # Text filling most of the page: one whole-page render instead of a near-page region
+    dense = [[100, 100 + i * 260, 1600, 330 + i * 260] for i in range(8)]
+    plan = _plan_region_renders(dense, width, height)
+    print(f"Dense page: {plan}")
+    assert plan == [[0, 0, width, height]]
+
+    # Many small scattered regions: also rendered whole
+    scattered = [[100 + (i % 2) * 900, 100 + i * 250, 300 + (i % 2) * 900, 150 + i * 250]
+                 for i in range(ChunkingConfig.MAX_REGION_RENDERS + 2)]
+    plan = _plan_region_renders(scattered, width, height)
+    print(f"Scattered page: {len(plan)} render(s)")
+    assert plan == [[0, 0, width, height]]
+
+
+class _SizeOCRBackend(OCRBackend):
+    """Reports the size of each image it reads instead of its text."""
+
+    name = "size"
+
+    def image_to_string(self, image):
+        return f"{image.size[0]}x{image.size[1]}"
+
+    def image_to_words(self, image):
+        width, height = image.size
+        return [{
+            'text': f"page{width}x{height}", 'bbox': [0, 0, width, height], 'conf': 95.0,
+            'block_num': 1, 'par_num': 1, 'line_num': 1, 'word_num': 1,
+        }]
+
+
+class _FakeRaster:
+    """Raster laid out at half the OCR DPI that records region renders."""
+
+    layout_scale = 2.0
+
+    def __init__(self):
+        self.renders = []
+
+    def page_size(self, page_idx):
+        return 1700, 2200
+
+    def render_region(self, page_idx, box):
+        self.renders.append((page_idx, list(box)))
+        return Image.new("RGB", (box[2] - box[0], box[3] - box[1]), "white")
+
+
+class _YOLOResult:
+    names = {0: 'Title', 1: 'Text'}
+
+    def __init__(self, boxes, classes):
+        class Boxes:
+            xyxy = np.array(boxes, dtype=np.float32)
+            conf = np.full(len(boxes), 0.9, dtype=np.float32)
+            cls = np.array(classes)
+
+            def __len__(self):
+                return len(self.xyxy)
+        self.boxes = Boxes()
+
+
+def test_scaled_layout_extraction():
+    """Test that low-DPI boxes are scaled, clusters re-rendered, and crops taken at OCR DPI."""
+    print("\nTesting extraction from a low-DPI layout pass...")
+
+    register_ocr_backend("size", _SizeOCRBackend)
+    set_default_ocr_backend("size")
+    try:
+        # Layout boxes at 100 DPI: title and paragraph together, a footnote at the bottom
+        yolo_result = _YOLOResult([[50, 50, 400, 80], [50, 90, 800, 250], [50, 1000, 450, 1025]], [0, 1, 1])
+        layout_image = Image.new("RGB", (850, 1100), "white")
+        results = {}
+        for ocr_mode in ("region", "page"):
+            raster = _FakeRaster()
+            bbox_results = asyncio.run(_extract_bbox_results_for_grouping_with_semaphore(
+                layout_image, yolo_result, 1, ocr_mode=ocr_mode, raster=raster
+            ))
+            results[ocr_mode] = (raster.renders, bbox_results)
+    finally:
+        set_default_ocr_backend(OCR_BACKEND)
+
+    renders, bbox_results = results["region"]
+    print(f"Renders: {renders}")
+    print(f"Region OCR: {[(r['metadata']['bbox'], r['content']) for r in bbox_results]}")
+    assert renders == [(0, [100, 100, 1600, 500]), (0, [100, 2000, 900, 2050])]
+    assert [r['metadata']['bbox'] for r in bbox_results] == [
+        [100, 100, 800, 160], [100, 180, 1600, 500], [100, 2000, 900, 2050]
+    ]
+    # Every crop has the size of its box at OCR DPI
+    assert [r['content'] for r in bbox_results] == ["700x60", "1500x320", "800x50"]
+
+    renders, bbox_results = results["page"]
+    print(f"Page OCR: {[r['content'] for r in bbox_results]}")
+    # One Tesseract pass per rendered cluster; the stub's single word goes to one region of each
+    assert [r['content'] for r in bbox_results] == ["page1500x400", "page800x50"]
+
+
+def main():
+    """Run all tests."""
+    print("Testing PDF Raster Geometry")
+    print("=" * 50)
+
+    try:
+        test_page_size_uses_cropbox()
+        test_page_geometry_scales_with_dpi()
+        test_render_region_coordinates()
+        test_region_render_plan()
+        test_scaled_layout_extraction()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
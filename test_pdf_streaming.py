@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed PDF rasterization.
+
+This script checks that aiter_pdf_pages renders pages in windows on a
+background thread, that the producer blocks once max_queued_pages rendered
+pages are waiting, that stopping early stops rendering, and that rendering
+errors reach the consumer. pdf2image is replaced by a stub, so poppler is
+not needed.
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+from unittest import mock
+
+from PIL import Image
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.utils.fileutils import aiter_pdf_pages
+
+
+class _StubRenderer:
+    """Stands in for pdf2image.convert_from_path and records every page it renders."""
+
+    def __init__(self, page_count, fail_at=None):
+        self.page_count = page_count
+        self.fail_at = fail_at
+        self.rendered = []
+        self.calls = []
+
+    def convert_from_path(self, pdf_path, dpi, first_page, last_page):
+        self.calls.append((first_page, last_page))
+        if self.fail_at is not None and first_page <= self.fail_at <= last_page:
+            raise RuntimeError(f"cannot render page {self.fail_at}")
+        self.rendered.extend(range(first_page, last_page + 1))
+        return [Image.new("RGB", (10, 10), "white") for _ in range(first_page, last_page + 1)]
+
+
+def _patched(renderer):
+    return mock.patch.multiple(
+        "Unsiloed.utils.fileutils",
+        get_pdf_page_count=lambda path: renderer.page_count,
+        pdf2image=mock.Mock(convert_from_path=renderer.convert_from_path),
+    )
+
+
+def _rasterizer_running():
+    return any(thread.name == "unsiloed-rasterizer" and thread.is_alive() for thread in threading.enumerate())
+
+
+def test_pages_stream_in_windows():
+    """Test that every page arrives in order, rendered a window at a time."""
+    print("Testing windowed rendering...")
+
+    renderer = _StubRenderer(10)
+
+    async def consume():
+        return [page_idx async for page_idx, _ in aiter_pdf_pages("doc.pdf", window_size=4, max_queued_pages=2)]
+
+    with _patched(renderer):
+        pages = asyncio.run(consume())
+
+    print(f"pdf2image calls: {renderer.calls}")
+    assert pages == list(range(10))
+    assert renderer.calls == [(1, 4), (5, 8), (9, 10)]
+
+
+def test_producer_blocks_at_queue_depth():
+    """Test that a stalled consumer keeps the producer at most max_queued_pages ahead."""
+    print("\nTesting the bounded page queue...")
+
+    renderer = _StubRenderer(50)
+    max_queued_pages = 3
+
+    async def consume_slowly():
+        consumed = 0
+        rendered_while_stalled = None
+        async for _ in aiter_pdf_pages("doc.pdf", window_size=1, max_queued_pages=max_queued_pages):
+            consumed += 1
+            if consumed == 2:
+                # Give the producer ample time to run ahead if it were unbounded
+                await asyncio.sleep(0.5)
+                rendered_while_stalled = len(renderer.rendered)
+                break
+        return consumed, rendered_while_stalled
+
+    with _patched(renderer):
+        consumed, rendered_while_stalled = asyncio.run(consume_slowly())
+        time.sleep(0.3)
+        still_running = _rasterizer_running()
+        rendered_after_stop = len(renderer.rendered)
+
+    print(f"Consumed {consumed}, rendered {rendered_while_stalled} while stalled, {rendered_after_stop} in total")
+    # Consumed pages + a full queue + the page the producer is waiting to enqueue
+    assert rendered_while_stalled <= consumed + max_queued_pages + 1
+    # Breaking out stops the producer instead of rendering the rest of the document
+    assert rendered_after_stop <= rendered_while_stalled + 1
+    assert not still_running
+
+
+def test_render_errors_reach_consumer():
+    """Test that a rendering failure is raised to the consumer after the pages before it."""
+    print("\nTesting rendering errors...")
+
+    renderer = _StubRenderer(6, fail_at=5)
+    pages = []
+
+    async def consume():
+        async for page_idx, _ in aiter_pdf_pages("doc.pdf", window_size=2, max_queued_pages=2):
+            pages.append(page_idx)
+
+    with _patched(renderer):
+        try:
+            asyncio.run(consume())
+        except RuntimeError as e:
+            print(f"Raised after pages {pages}: {e}")
+        else:
+            raise AssertionError("Expected the rendering error to be raised")
+
+    assert pages == [0, 1, 2, 3]
+
+    try:
+        asyncio.run(aiter_pdf_pages("doc.pdf", max_queued_pages=0).__anext__())
+    except ValueError as e:
+        print(f"Rejected: {e}")
+    else:
+        raise AssertionError("Expected ValueError for max_queued_pages=0")
+
+
+def main():
+    """Run all tests."""
+    print("Testing PDF Page Streaming")
+    print("=" * 50)
+
+    try:
+        test_pages_stream_in_windows()
+        test_producer_blocks_at_queue_depth()
+        test_render_errors_reach_consumer()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for batch processing with process_many / process_many_sync.
+
+This script checks that documents are processed concurrently up to the
+configured limit, that results stream back in completion order, and that a
+failing document does not affect the others. No API key is needed.
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed
+
+
+def _write_markdown_documents(directory, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"doc{i}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Document {i}\n\nFirst paragraph of document {i}.\n\nSecond paragraph.\n")
+        paths.append(path)
+    return paths
+
+
+def test_process_many_sync_isolates_errors():
+    """Test that every document gets an entry and failures stay per document."""
+    print("Testing process_many_sync...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_markdown_documents(tmp, 4)
+        options_list = [{"filePath": path, "strategy": "paragraph"} for path in paths]
+        options_list.insert(2, {"filePath": os.path.join(tmp, "missing.md"), "strategy": "paragraph"})
+        options_list.append({"filePath": os.path.join(tmp, "notes.xyz"), "strategy": "paragraph"})
+
+        entries = list(Unsiloed.process_many_sync(options_list, max_concurrent_documents=3))
+
+    entries.sort(key=lambda entry: entry["index"])
+    print(f"Errors: {[(entry['index'], entry['errorType']) for entry in entries if entry['error']]}")
+    assert [entry["index"] for entry in entries] == list(range(6))
+    assert [entry["error"] is None for entry in entries] == [True, True, False, True, True, False]
+    assert entries[5]["errorType"] == "ValueError"
+    assert entries[0]["result"]["total_chunks"] > 0
+    assert entries[0]["filePath"] == options_list[0]["filePath"]
+    # Every document gets its own timings and usage
+    assert entries[1]["result"]["llm_usage"]["calls"] == 0
+    assert set(entries[1]["result"]["timings"]["stages"]) == {"text_extraction", "chunking", "reading_order"}
+
+
+def test_process_many_streams_in_completion_order():
+    """Test the concurrency limit, the caller's loop, and that fast documents are not held back."""
+    print("\nTesting process_many concurrency and streaming...")
+
+    in_flight = []
+    peak = []
+    loops = []
+
+    async def fake_process(options):
+        loops.append(asyncio.get_running_loop())
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(options["delay"])
+        in_flight.pop()
+        if options.get("fail"):
+            raise RuntimeError("boom")
+        return {"filePath": options["filePath"]}
+
+    delays = [0.3, 0.05, 0.05, 0.05, 0.05, 0.05]
+    options_list = [
+        {"filePath": f"doc{i}.md", "strategy": "fixed", "delay": delay, "fail": i == 3}
+        for i, delay in enumerate(delays)
+    ]
+
+    async def collect():
+        entries = [entry async for entry in Unsiloed.process_many(options_list, max_concurrent_documents=2)]
+        return entries, asyncio.get_running_loop()
+
+    original = Unsiloed.process
+    Unsiloed.process = fake_process
+    try:
+        entries, caller_loop = asyncio.run(collect())
+    finally:
+        Unsiloed.process = original
+
+    order = [entry["index"] for entry in entries]
+    print(f"Completion order: {order}, peak in flight: {max(peak)}")
+    assert sorted(order) == list(range(6))
+    assert max(peak) == 2
+    # Documents run on the caller's loop, so they share its OpenAI clients and HTTP session
+    assert all(loop is caller_loop for loop in loops) and len(loops) == 6
+    # The slow first document finishes after the short ones that ran beside it
+    assert order[0] != 0 and order.index(0) >= 3
+    failed = [entry for entry in entries if entry["error"]]
+    assert len(failed) == 1 and failed[0]["index"] == 3 and failed[0]["errorType"] == "RuntimeError"
+
+
+def test_process_many_sync_shares_one_loop():
+    """Test that process_many_sync runs every document on one loop and cancels the rest on early stop."""
+    print("\nTesting process_many_sync loop sharing and early stop...")
+
+    loops = []
+    cancelled = []
+
+    async def fake_process(options):
+        loops.append(asyncio.get_running_loop())
+        try:
+            await asyncio.sleep(options["delay"])
+        except asyncio.CancelledError:
+            cancelled.append(options["filePath"])
+            raise
+        return {"filePath": options["filePath"]}
+
+    options_list = [
+        {"filePath": f"doc{i}.md", "strategy": "fixed", "delay": 0.05 if i < 3 else 5}
+        for i in range(5)
+    ]
+    original = Unsiloed.process
+    Unsiloed.process = fake_process
+    try:
+        started = time.perf_counter()
+        entries = list(Unsiloed.process_many_sync(options_list[:3], max_concurrent_documents=3))
+        # Stopping after the first entry cancels the slow documents still in flight
+        early = Unsiloed.process_many_sync(options_list, max_concurrent_documents=5)
+        first = next(early)
+        early.close()
+        elapsed = time.perf_counter() - started
+        deadline = time.monotonic() + 2
+        while not {"doc3.md", "doc4.md"} <= set(cancelled) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        Unsiloed.process = original
+
+    print(f"Loops: {len(set(map(id, loops[:3])))}, cancelled: {sorted(cancelled)}")
+    assert sorted(entry["index"] for entry in entries) == [0, 1, 2]
+    assert len(loops) == 8 and len(set(map(id, loops[:3]))) == 1
+    assert first["index"] < 3
+    assert elapsed < 2
+    assert {"doc3.md", "doc4.md"} <= set(cancelled)
+
+
+def test_mixed_api_keys_accepted():
+    """Test that a batch can mix API keys without touching os.environ."""
+    print("\nTesting mixed API keys...")
+
+    seen = []
+
+    async def fake_process(options):
+        seen.append((options["credentials"]["apiKey"], os.environ.get("OPENAI_API_KEY")))
+        return {"filePath": options["filePath"]}
+
+    options_list = [
+        {"filePath": "a.md", "strategy": "fixed", "credentials": {"apiKey": "key-a"}},
+        {"filePath": "b.md", "strategy": "fixed", "credentials": {"apiKey": "key-b"}},
+    ]
+    original_env_key = os.environ.get("OPENAI_API_KEY")
+    original = Unsiloed.process
+    Unsiloed.process = fake_process
+    try:
+        entries = list(Unsiloed.process_many_sync(options_list))
+    finally:
+        Unsiloed.process = original
+
+    print(f"Keys seen: {sorted(key for key, _ in seen)}")
+    assert all(entry["error"] is None for entry in entries)
+    assert sorted(key for key, _ in seen) == ["key-a", "key-b"]
+    # The environment is left alone; every document carries its own key
+    assert all(env_key == original_env_key for _, env_key in seen)
+    assert os.environ.get("OPENAI_API_KEY") == original_env_key
+
+
+def main():
+    """Run all tests."""
+    print("Testing Batch Processing")
+    print("=" * 50)
+
+    try:
+        test_process_many_sync_isolates_errors()
+        test_process_many_streams_in_completion_order()
+        test_process_many_sync_shares_one_loop()
+        test_mixed_api_keys_accepted()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
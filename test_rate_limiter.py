@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Test script for the process-wide OpenAI rate limiter.
+
+This script checks the concurrency limit across threads and event loops, the
+requests-per-minute budget, AIMD adjustments on 429s and latency, and that
+complete_chat retries a rate-limited request through the limiter. No API key
+is needed.
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed.utils.rate_limiter as rate_limiter
+from Unsiloed.utils.rate_limiter import RateLimiter, configure_rate_limiter, estimate_request_tokens
+from Unsiloed.utils.openai import complete_chat, complete_chat_async
+
+
+def test_concurrency_shared_across_loops():
+    """Test that threads running their own event loops share one concurrency limit."""
+    print("Testing shared concurrency limit...")
+
+    limiter = RateLimiter(max_concurrency=3, initial_concurrency=3)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    async def request():
+        ticket = await limiter.acquire_async()
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        await asyncio.sleep(0.02)
+        with lock:
+            in_flight.pop()
+        limiter.release(ticket, failed=True)  # keep the limit fixed
+
+    async def run_loop():
+        await asyncio.gather(*(request() for _ in range(10)))
+
+    threads = [threading.Thread(target=lambda: asyncio.run(run_loop())) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for _ in range(5):
+        ticket = limiter.acquire()
+        limiter.release(ticket, failed=True)
+    for thread in threads:
+        thread.join()
+
+    stats = limiter.stats()
+    print(f"Peak in flight: {max(peak)}, stats: {stats}")
+    assert len(peak) == 30
+    assert max(peak) <= 3
+    assert stats["in_flight"] == 0 and stats["failed"] == 35
+
+
+def test_timed_out_waiters_are_dropped():
+    """Test that waiters that time out or are cancelled leave no waker behind."""
+    print("\nTesting waiter cleanup...")
+
+    limiter = RateLimiter(max_concurrency=4, initial_concurrency=4)
+    request_seconds = 0.15
+
+    async def request():
+        ticket = await limiter.acquire_async()
+        await asyncio.sleep(request_seconds)
+        limiter.release(ticket, failed=True)  # keep the limit fixed
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(request() for _ in range(20)))
+        elapsed = time.monotonic() - started
+
+        # A cancelled waiter is removed as well
+        tickets = [await limiter.acquire_async() for _ in range(4)]
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        waiting_after_cancel = limiter.stats()["waiting"]
+        for ticket in tickets:
+            limiter.release(ticket, failed=True)
+        return elapsed, waiting_after_cancel
+
+    original_timeout = rate_limiter._WAITER_TIMEOUT
+    # Waiters time out several times while a request is in flight
+    rate_limiter._WAITER_TIMEOUT = 0.02
+    try:
+        elapsed, waiting_after_cancel = asyncio.run(run())
+        # Threads blocked in acquire() clean up after their timeouts too
+        tickets = [limiter.acquire() for _ in range(4)]
+        waiter = threading.Thread(target=lambda: limiter.release(limiter.acquire(), failed=True))
+        waiter.start()
+        time.sleep(0.1)
+        waiting_while_blocked = limiter.stats()["waiting"]
+        for ticket in tickets:
+            limiter.release(ticket, failed=True)
+        waiter.join()
+    finally:
+        rate_limiter._WAITER_TIMEOUT = original_timeout
+
+    stats = limiter.stats()
+    ideal = 20 / 4 * request_seconds
+    print(f"20 requests in {elapsed:.2f}s (ideal {ideal:.2f}s), stats: {stats}")
+    # Freed slots go to live waiters instead of sitting idle until a timeout
+    assert elapsed < ideal * 1.3
+    assert waiting_after_cancel == 0
+    assert waiting_while_blocked == 1
+    assert stats["waiting"] == 0 and stats["in_flight"] == 0
+
+
+def test_requests_per_minute_budget():
+    """Test that requests beyond the burst allowance wait for the bucket to refill."""
+    print("\nTesting requests per minute budget...")
+
+    # 600 RPM: a burst of 100 requests, then 10 per second
+    limiter = RateLimiter(requests_per_minute=600, max_concurrency=200, initial_concurrency=200)
+    start = time.monotonic()
+    for _ in range(105):
+        limiter.release(limiter.acquire(), failed=True)
+    elapsed = time.monotonic() - start
+
+    print(f"105 requests took {elapsed:.2f}s")
+    assert 0.4 <= elapsed < 1.5
+
+
+def test_aimd_adjustments():
+    """Test additive increase on success and multiplicative decrease on 429s and latency."""
+    print("\nTesting AIMD adjustments...")
+
+    limiter = RateLimiter(max_concurrency=16, initial_concurrency=8)
+    for _ in range(9):
+        limiter.release(limiter.acquire())
+    assert limiter.concurrency_limit == 9
+
+    ticket = limiter.acquire()
+    limiter.release(ticket, rate_limited=True, retry_after=0.2)
+    print(f"After 429: {limiter.stats()}")
+    assert limiter.concurrency_limit == 4
+
+    # Traffic is paused for the Retry-After period
+    start = time.monotonic()
+    limiter.release(limiter.acquire(), failed=True)
+    assert time.monotonic() - start >= 0.15
+
+    # A sustained latency rise well above the baseline shrinks the limit
+    limiter = RateLimiter(max_concurrency=16, initial_concurrency=8, latency_tolerance=2.0)
+    for latency in (0.01, 0.01, 0.01, 0.5, 0.5, 0.5):
+        ticket = limiter.acquire()
+        ticket.started_at -= latency
+        limiter.release(ticket)
+    print(f"After latency rise: {limiter.stats()}")
+    assert limiter.concurrency_limit < 8
+
+
+def test_estimate_request_tokens():
+    """Test token estimates for text and image requests."""
+    print("\nTesting token estimates...")
+
+    text_request = {"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 100}
+    image_request = {"messages": [{"role": "user", "content": [
+        {"type": "text", "text": "x" * 40},
+        {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+    ]}]}
+    assert estimate_request_tokens(text_request) == 200
+    assert estimate_request_tokens(image_request) == 10 + rate_limiter.IMAGE_TOKENS + rate_limiter.DEFAULT_COMPLETION_TOKENS
+
+
+def _rate_limit_error():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": "50"}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_complete_chat_retries_rate_limits():
+    """Test that a 429 is reported to the limiter and the request is retried."""
+    print("\nTesting complete_chat retry on 429...")
+
+    attempts = []
+
+    def create(**request):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise _rate_limit_error()
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=42))
+
+    async def acreate(**request):
+        return create(**request)
+
+    limiter = configure_rate_limiter(tokens_per_minute=60000)
+    try:
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        content = complete_chat(client, model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        stats = limiter.stats()
+
+        attempts.clear()
+        async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=acreate)))
+        async_content = asyncio.run(complete_chat_async(
+            async_client, model="gpt-4o", messages=[{"role": "user", "content": "hi"}]
+        ))
+    finally:
+        configure_rate_limiter()
+
+    print(f"Content: {content!r}, attempts: {len(attempts)}, stats: {stats}")
+    assert content == async_content == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.04  # Retry-After was honoured
+    assert stats["rate_limited"] == 1 and stats["completed"] == 1 and stats["in_flight"] == 0
+
+
+def main():
+    """Run all tests."""
+    print("Testing Rate Limiter")
+    print("=" * 50)
+
+    try:
+        test_concurrency_shared_across_loops()
+        test_timed_out_waiters_are_dropped()
+        test_requests_per_minute_budget()
+        test_aimd_adjustments()
+        test_estimate_request_tokens()
+        test_complete_chat_retries_rate_limits()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for per-request credentials.
+
+This script checks that the API key of a RequestContext is used by the
+OpenAI client helpers inside the request only, that it follows the request
+into worker threads, and that concurrent process() calls with different keys
+neither see each other's key nor modify os.environ. No API key is needed.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Unsiloed
+import Unsiloed.services.chunking as chunking_service
+from Unsiloed.utils.openai import get_async_openai_client, aclose_async_openai_clients
+from Unsiloed.utils.request_context import (
+    RequestContext,
+    get_request_api_key,
+    get_request_context,
+    use_request_context,
+)
+
+
+def test_key_resolution():
+    """Test the order explicit key, request context, environment."""
+    print("Testing API key resolution...")
+
+    original_env_key = os.environ.get("OPENAI_API_KEY")
+    os.environ["OPENAI_API_KEY"] = "env-key"
+    try:
+        assert get_request_context() is None
+        assert get_request_api_key() == "env-key"
+        with use_request_context(RequestContext(api_key="context-key")):
+            assert get_request_api_key() == "context-key"
+            assert get_request_api_key("explicit-key") == "explicit-key"
+            # None keeps the active context
+            with use_request_context(None):
+                assert get_request_api_key() == "context-key"
+        # A context without a key falls back to the environment
+        with use_request_context(RequestContext()):
+            assert get_request_api_key() == "env-key"
+        assert get_request_api_key() == "env-key"
+    finally:
+        if original_env_key is None:
+            os.environ.pop("OPENAI_API_KEY", None)
+        else:
+            os.environ["OPENAI_API_KEY"] = original_env_key
+
+    context = RequestContext.from_options({"credentials": {"apiKey": "sk-secret"}})
+    print(f"Context: {context!r}")
+    assert context.api_key == "sk-secret"
+    assert "sk-secret" not in repr(context)
+    assert RequestContext.from_options({}).api_key is None
+
+
+def test_concurrent_contexts_are_isolated():
+    """Test that concurrent tasks and their worker threads use their own keys."""
+    print("\nTesting concurrent request contexts...")
+
+    async def request(api_key):
+        with use_request_context(RequestContext(api_key=api_key)):
+            await asyncio.sleep(0.01)
+            client = get_async_openai_client()
+            thread_key = await asyncio.to_thread(get_request_api_key)
+            return client.api_key, thread_key
+
+    async def run():
+        try:
+            return await asyncio.gather(*(request(f"key-{i}") for i in range(4)))
+        finally:
+            await aclose_async_openai_clients()
+
+    results = asyncio.run(run())
+    print(f"Keys seen: {results}")
+    assert results == [(f"key-{i}", f"key-{i}") for i in range(4)]
+
+
+def test_process_passes_credentials():
+    """Test that concurrent process() calls carry their own key to the pipeline."""
+    print("\nTesting credentials in process()...")
+
+    seen = {}
+
+    async def fake_chunk_document_async(file_path, file_type, strategy, chunk_size, overlap):
+        await asyncio.sleep(0.02)
+        seen[os.path.basename(file_path)] = (get_request_api_key(), os.environ.get("OPENAI_API_KEY"))
+        return {"chunks": [], "total_chunks": 0}
+
+    original_env_key = os.environ.get("OPENAI_API_KEY")
+    original = chunking_service._chunk_document_async
+    chunking_service._chunk_document_async = fake_chunk_document_async
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            options_list = []
+            for name in ("a", "b", "c"):
+                path = os.path.join(tmp, f"{name}.md")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(f"# {name}\n")
+                options_list.append(
+                    {"filePath": path, "strategy": "semantic", "credentials": {"apiKey": f"key-{name}"}}
+                )
+
+            async def run():
+                return await asyncio.gather(*(Unsiloed.process(options) for options in options_list))
+
+            asyncio.run(run())
+    finally:
+        chunking_service._chunk_document_async = original
+
+    print(f"Seen: {seen}")
+    assert {name: key for name, (key, _) in seen.items()} == {"a.md": "key-a", "b.md": "key-b", "c.md": "key-c"}
+    assert all(env_key == original_env_key for _, env_key in seen.values())
+    assert os.environ.get("OPENAI_API_KEY") == original_env_key
+
+
+def main():
+    """Run all tests."""
+    print("Testing Request Context")
+    print("=" * 50)
+
+    try:
+        test_key_resolution()
+        test_concurrent_contexts_are_isolated()
+        test_process_passes_credentials()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP server.
+
+This script checks that uploaded documents are processed on the worker pool
+and streamed back as NDJSON, that request validation rejects bad options,
+and that worker processes are replaced after their document budget. No API
+key or YOLO model is needed.
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+
+from fastapi.testclient import TestClient
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.server import create_app
+from Unsiloed.services.worker_pool import DocumentWorkerPool
+
+
+def test_process_streams_ndjson():
+    """Test uploads in thread mode: one NDJSON line per document, errors kept per document."""
+    print("Testing POST /process...")
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        app = create_app(workers=2, worker_mode="thread", preload_model=False, upload_dir=upload_dir)
+        with TestClient(app) as client:
+            files = [
+                ("files", ("first.md", b"# First\n\nOne paragraph.\n\nAnother paragraph.\n", "text/markdown")),
+                ("files", ("second.md", b"# Second\n\nJust one paragraph.\n", "text/markdown")),
+                ("files", ("notes.xyz", b"unsupported", "application/octet-stream")),
+            ]
+            response = client.post("/process", files=files, data={"strategy": "paragraph"})
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            entries = [json.loads(line) for line in response.text.splitlines()]
+
+            health = client.get("/health").json()
+            print(f"Health: {health}")
+            assert health["running"] and health["documentsCompleted"] == 3
+
+        # Uploaded files are removed once their document is done
+        assert os.listdir(upload_dir) == []
+
+    entries.sort(key=lambda entry: entry["index"])
+    print(f"Entries: {[(entry['filename'], entry['errorType']) for entry in entries]}")
+    assert [entry["filename"] for entry in entries] == ["first.md", "second.md", "notes.xyz"]
+    assert entries[0]["result"]["total_chunks"] > 0 and entries[0]["error"] is None
+    assert entries[1]["result"]["strategy"] == "paragraph"
+    assert entries[2]["result"] is None and entries[2]["errorType"] == "ValueError"
+
+
+def test_request_validation():
+    """Test that unknown strategies and semantic requests without a key are rejected."""
+    print("\nTesting request validation...")
+
+    original_env_key = os.environ.pop("OPENAI_API_KEY", None)
+    try:
+        app = create_app(workers=1, worker_mode="thread", preload_model=False)
+        with TestClient(app) as client:
+            files = [("files", ("doc.md", b"# Doc\n", "text/markdown"))]
+            unknown = client.post("/process", files=files, data={"strategy": "sentences"})
+            no_key = client.post("/process", files=files, data={"strategy": "semantic"})
+    finally:
+        if original_env_key is not None:
+            os.environ["OPENAI_API_KEY"] = original_env_key
+
+    print(f"Status codes: {unknown.status_code}, {no_key.status_code}")
+    assert unknown.status_code == 400
+    assert no_key.status_code == 400
+
+    try:
+        DocumentWorkerPool(workers=1, mode="fork")
+    except ValueError as e:
+        print(f"Rejected: {e}")
+    else:
+        raise AssertionError("Expected ValueError for an unknown worker mode")
+
+
+def test_worker_processes_are_recycled():
+    """Test that a worker process is replaced after max_documents_per_worker tasks."""
+    print("\nTesting worker recycling...")
+
+    if sys.version_info < (3, 11):
+        print("Skipped: worker recycling requires Python 3.11+")
+        return
+
+    pool = DocumentWorkerPool(workers=1, mode="process", max_documents_per_worker=2, preload_model=False)
+
+    async def run():
+        await pool.start()
+        try:
+            # The startup warm-up is the first task of the worker
+            return [await pool.submit(os.getpid) for _ in range(3)]
+        finally:
+            await asyncio.to_thread(pool.shutdown)
+
+    pids = asyncio.run(run())
+    print(f"Worker pids: {pids}")
+    assert pids[0] != os.getpid()
+    assert pids[1] != pids[0]
+    assert pids[2] == pids[1]
+
+
+def main():
+    """Run all tests."""
+    print("Testing HTTP Server")
+    print("=" * 50)
+
+    try:
+        test_process_streams_ndjson()
+        test_request_validation()
+        test_worker_processes_are_recycled()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
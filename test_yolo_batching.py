@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for batched YOLO layout detection in the semantic pipeline.
+
+This script checks that pages reach YOLO in batches of yolo_batch_size (the
+last one shorter) and that every detection ends up on the page it was made
+for. YOLO, OCR and the OpenAI clients are replaced by stubs.
+"""
+
+import sys
+import os
+import asyncio
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Unsiloed.parse_config import OCR_BACKEND
+from Unsiloed.utils.chunking import semantic_chunking_with_semaphore
+from Unsiloed.utils.ocr_backends import OCRBackend, register_ocr_backend, set_default_ocr_backend
+from Unsiloed.utils.yolo_model_utils import batch_pages
+
+
+class _SizeOCRBackend(OCRBackend):
+    """Reads every region as its size."""
+
+    name = "stub-size"
+
+    def image_to_string(self, image):
+        return f"{image.size[0]}x{image.size[1]}"
+
+
+class _YOLOResult:
+    names = {0: 'Text'}
+
+    def __init__(self, width):
+        class Boxes:
+            # One text region whose width identifies the page it was detected on
+            xyxy = np.array([[0, 0, width, 20]], dtype=np.float32)
+            conf = np.array([0.9], dtype=np.float32)
+            cls = np.array([0])
+
+            def __len__(self):
+                return 1
+        self.boxes = Boxes()
+
+    def __len__(self):
+        return 1
+
+
+async def _no_grouping(bbox_results, **kwargs):
+    return [{'page': r['metadata']['page_number'], 'content': r['content']} for r in bbox_results]
+
+
+def test_batch_pages_groups_the_stream():
+    """Test that batch_pages yields full batches as they fill and a shorter last one."""
+    print("Testing batch_pages...")
+
+    async def pages():
+        for page_idx in range(7):
+            yield page_idx, f"page {page_idx}"
+
+    async def collect(batch_size):
+        return [[page_idx for page_idx, _ in batch] async for batch in batch_pages(pages(), batch_size)]
+
+    batches = asyncio.run(collect(3))
+    print(f"Batches: {batches}")
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    try:
+        asyncio.run(collect(0))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("batch_size 0 was accepted")
+
+
+def test_pipeline_detects_pages_in_batches():
+    """Test the YOLO batch sizes of the pipeline and that results map back to their pages."""
+    print("\nTesting batched detection in the semantic pipeline...")
+
+    # Page n is 100 + 10n pixels wide; its detected region spans the full width
+    images = [Image.new("RGB", (100 + 10 * page, 80), "white") for page in range(1, 6)]
+    batch_sizes = []
+
+    def run_yolo_inference(batch):
+        batch_sizes.append(len(batch))
+        return [_YOLOResult(image.width) for image in batch]
+
+    register_ocr_backend("stub-size", _SizeOCRBackend)
+    set_default_ocr_backend("stub-size")
+    try:
+        with mock.patch.multiple(
+            "Unsiloed.utils.chunking",
+            get_openai_client=lambda: object(),
+            run_yolo_inference=run_yolo_inference,
+            _perform_openai_semantic_grouping_with_semaphore=_no_grouping,
+        ):
+            chunks = asyncio.run(semantic_chunking_with_semaphore(images, yolo_batch_size=2))
+    finally:
+        set_default_ocr_backend(OCR_BACKEND)
+
+    print(f"YOLO batch sizes: {batch_sizes}, chunks: {chunks}")
+    assert batch_sizes == [2, 2, 1]
+    assert [chunk['page'] for chunk in chunks] == [1, 2, 3, 4, 5]
+    assert [chunk['content'] for chunk in chunks] == [f"{100 + 10 * page}x20" for page in range(1, 6)]
+
+
+def main():
+    """Run all tests."""
+    print("Testing Batched YOLO Detection")
+    print("=" * 50)
+
+    try:
+        test_batch_pages_groups_the_stream()
+        test_pipeline_detects_pages_in_batches()
+
+        print("\n" + "=" * 50)
+        print("All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\nTest failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)